@@ -0,0 +1,140 @@
+"""Micro-benchmark the API's response pipeline per endpoint, without Solr.
+
+Usage:
+    python bench_responses.py [--requests N] [--rows N]
+
+Solr is replaced by canned JSON bodies built from the documents in ``data/``
+(the same stored fields the real index returns), served through pysolr so
+the whole pipeline runs. For each JSON configuration, ``stdlib`` (Flask's
+provider and ``json`` for Solr responses) and ``fast`` (``src.jsonprovider``
+with orjson when installed), every endpoint reports in microseconds per
+request:
+
+- decode: parsing the Solr body
+- shape: the handler minus decoding, i.e. building the response dict
+- encode: the response dict to bytes through ``app.json``
+- total: a full request through the Flask test client
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+# ensure project root is on sys.path
+ROOT = os.path.dirname(os.path.abspath(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# No rate limiting, query log or artifacts in the way of a tight loop
+os.environ.setdefault("RATE_LIMIT", "1000000000")
+os.environ.setdefault("RATE_LIMIT_BURST", "1000000000")
+os.environ.setdefault("QUERY_LOG_SAMPLE", "0")
+os.environ.setdefault("QUERY_LOG_WARMUP", "0")
+os.environ.setdefault("ARTIFACTS_DIR", tempfile.mkdtemp(prefix="bench-artifacts-"))
+
+import pysolr
+
+import src.api as api
+from src import fastjson
+from src.dataset import DATA_DIR, find_data_files
+from src.documents import transform_files
+
+
+def solr_bodies(docs, rows):
+    """endpoint -> (request path, Solr JSON body the endpoint's query would get)."""
+    page = [dict(d, score=1.0 + i / 100) for i, d in enumerate(docs[:rows])]
+    country_buckets = [{"val": f"Country {i}", "count": 500 - i} for i in range(50)]
+    facets = {
+        "count": len(docs),
+        "country": {"buckets": country_buckets},
+        "city": {"buckets": [{"val": f"City {i}", "count": 300 - i} for i in range(50)]},
+        "source": {"buckets": [{"val": "movie-locations.com", "count": len(docs)}]},
+        "topic": {"buckets": [{"val": f"topic {i}", "count": 90 - i} for i in range(12)]},
+        "decade": {"buckets": [{"val": 1880 + 10 * i, "count": 10 + i} for i in range(16)]},
+    }
+    groups = page[: min(rows, 20)]
+    expanded = {
+        d.get("location_key") or d["id"]: {"numFound": 4, "docs": docs[i + 1 : i + 5]} for i, d in enumerate(groups)
+    }
+    for d in groups:
+        d.setdefault("location_key", d["id"])
+    response = {"numFound": len(docs), "start": 0, "docs": page}
+    return {
+        "search": (f"/api/search?q=castle&k={rows}", {"response": response, "facets": facets}),
+        "browse": (f"/api/browse?q=castle&limit={rows}", {"response": response}),
+        "facets": ("/api/facets?q=castle&facets=all", {"response": dict(response, docs=[]), "facets": facets}),
+        "grouped": ("/api/locations/grouped?q=castle&limit=20", {"response": dict(response, docs=groups), "expanded": expanded}),
+        "nearby": (f"/api/locations/nearby?lat=51.5&lon=-0.1&limit={rows}", {"response": response}),
+        "mlt": (
+            "/api/more-like-this?id=x&count=10",
+            {"response": dict(response, docs=page[:1]), "moreLikeThis": {"x": {"numFound": 10, "docs": page[:10]}}},
+        ),
+    }
+
+
+def timed(fn, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        result = fn()
+    return (time.perf_counter() - start) / n * 1e6, result
+
+
+def run(config, bodies, n):
+    api.JSON_PROVIDER = config
+    saved_orjson = fastjson.orjson
+    if config == "stdlib":
+        fastjson.orjson = None
+    try:
+        app = api.create_app(static_folder="")
+        client = app.test_client()
+        # Waits for the typeahead index create_app() builds in the background
+        client.get("/api/suggest?q=a")
+        decoder = fastjson.SolrDecoder()
+        rows = {}
+        for name, (path, body) in bodies.items():
+            text = json.dumps(body)
+            # Every Solr request of this endpoint gets the canned body
+            pysolr.Solr._send_request = lambda self, *args, **kwargs: text
+            view = app.view_functions[name]
+
+            def handle():
+                with app.test_request_context(path):
+                    return view()
+
+            handle()  # Lazy loads and the first Solr client out of the way
+            decode_us, _ = timed(lambda: decoder.decode(text), n)
+            handler_us, result = timed(handle, n)
+            payload = result[0] if isinstance(result, tuple) else result
+            encode_us, _ = timed(lambda: app.json.response(payload).get_data(), n)
+            total_us, response = timed(lambda: client.get(path), n)
+            assert response.status_code == 200, (name, response.status_code, response.get_data()[:200])
+            rows[name] = (decode_us, handler_us - decode_us, encode_us, total_us, len(response.get_data()))
+        return rows
+    finally:
+        fastjson.orjson = saved_orjson
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint and stage")
+    parser.add_argument("--rows", type=int, default=50, help="Documents per result page")
+    args = parser.parse_args()
+
+    docs = [d for _, solr_docs in transform_files(find_data_files(DATA_DIR), workers=1) for d in solr_docs]
+    bodies = solr_bodies(docs, args.rows)
+    print(f"orjson {'installed' if fastjson.orjson else 'not installed'}, {args.rows} docs per page\n")
+    print(f"{'endpoint':<10} {'json':<7} {'decode':>8} {'shape':>8} {'encode':>8} {'total':>9} {'bytes':>8}")
+    results = {config: run(config, bodies, args.requests) for config in ("stdlib", "fast")}
+    for name in bodies:
+        for config, rows in results.items():
+            decode, shape, encode, total, size = rows[name]
+            print(f"{name:<10} {config:<7} {decode:8.0f} {shape:8.0f} {encode:8.0f} {total:9.0f} {size:8d}")
+        speedup = results["stdlib"][name][3] / results["fast"][name][3]
+        print(f"{'':<10} {'':<7} {'':>8} {'':>8} {'':>8} {speedup:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
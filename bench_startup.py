@@ -0,0 +1,110 @@
+"""Measure the import time of every entry point and fail when one is over budget.
+
+Usage:
+    python bench_startup.py [--runs N] [--scale F] [--profile]
+
+Each entry point is imported in a fresh interpreter ``--runs`` times and the
+median is compared with its budget in ``BUDGETS`` (milliseconds, multiplied
+by ``--scale`` for slow machines). Modules an entry point must load lazily
+are checked too: importing the API must not pull in pysolr, for example.
+The exit status is 1 when anything regressed, so the script can gate CI.
+``--profile`` prints the slowest modules of every entry point
+(``python -X importtime``).
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CRAWLER_DIR = os.path.join(ROOT, "crawler")
+
+# entry point -> (directory it runs from, module, import budget in ms)
+BUDGETS = {
+    "run_api.py": (ROOT, "run_api", 300),
+    "index_data.py": (ROOT, "index_data", 50),
+    "replay_queries.py": (ROOT, "replay_queries", 150),
+    "crawler/movielocations_crawler.py": (CRAWLER_DIR, "movielocations_crawler", 200),
+    "crawler/movielocationsca_crawler.py": (CRAWLER_DIR, "movielocationsca_crawler", 200),
+    "crawler/cinemapper_crawler.py": (CRAWLER_DIR, "cinemapper_crawler", 60),
+}
+
+# Modules that must not be loaded by merely importing an entry point
+LAZY = {
+    "run_api.py": ("pysolr", "requests", "sklearn"),
+    "index_data.py": ("numpy", "pysolr", "requests", "sklearn"),
+    "crawler/movielocations_crawler.py": ("geopy",),
+}
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+print(json.dumps({{"ms": elapsed * 1000, "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+
+def measure(directory, module, lazy):
+    """``(import ms, lazy modules that were loaded anyway)`` in a fresh interpreter."""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, lazy=tuple(lazy))],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result["ms"], result["loaded"]
+
+
+def profile(directory, module, top=10):
+    """The ``top`` modules by self time, as reported by ``-X importtime``."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=directory,
+        capture_output=True,
+        text=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        rows.append((int(self_us), int(cumulative_us), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget by this factor")
+    parser.add_argument("--profile", action="store_true", help="Show the slowest modules per entry point")
+    args = parser.parse_args()
+
+    failures = 0
+    for name, (directory, module, budget_ms) in BUDGETS.items():
+        lazy = LAZY.get(name, ())
+        # The first run also warms the bytecode cache
+        measure(directory, module, lazy)
+        runs = [measure(directory, module, lazy) for _ in range(args.runs)]
+        median = statistics.median(ms for ms, _ in runs)
+        loaded = sorted({m for _, modules in runs for m in modules})
+        budget = budget_ms * args.scale
+        ok = median <= budget and not loaded
+        failures += not ok
+        print(f"{'ok  ' if ok else 'FAIL'} {name:<38} {median:7.1f} ms (budget {budget:.0f} ms)")
+        if loaded:
+            print(f"     should be imported lazily: {', '.join(loaded)}")
+        if args.profile or not ok:
+            for self_us, cumulative_us, module_name in profile(directory, module):
+                print(f"     {self_us / 1000:7.1f} ms self {cumulative_us / 1000:7.1f} ms total  {module_name}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
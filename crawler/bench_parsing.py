@@ -0,0 +1,179 @@
+"""Benchmark page parsing: pages/sec per parser over saved HTML pages.
+
+Usage:
+    python ./crawler/bench_parsing.py [--fixtures DIR] [--repeat N]
+
+Pages in DIR are picked by name: ``ml_movie_*.html`` (movie-locations.com
+movie pages), ``ml_category_*.html``, ``ca_menu_*.html`` and
+``ca_title_*.html`` (moviefilminglocations.ca). Save real pages with e.g.
+``curl -o fixtures/ml_movie_tenet.html <url>``. Without any saved movie
+pages, synthetic ones are generated from ``data/`` in the markup of
+movie-locations.com, so the benchmark always has something to chew on.
+
+Each page kind is parsed with the old approach (a full BeautifulSoup tree
+with ``html.parser``), with BeautifulSoup on lxml restricted by a
+SoupStrainer, and with the XPath parsers in ``parsing.py`` the crawlers
+use. Outputs of the old and new movie page parsers are compared as well.
+"""
+
+import argparse
+import glob
+import html
+import json
+import os
+import time
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from parsing import parse_ca_menu, parse_ca_title, parse_ml_category, parse_ml_movie
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+CONTENT_ONLY = SoupStrainer("div", class_="content")
+
+
+def soup_ml_movie(page: str, parser: str = "html.parser", parse_only=None):
+    """The movie page logic the crawler used before parsing.py, on a configurable soup."""
+    soup = BeautifulSoup(page, parser, parse_only=parse_only)
+    content = soup.find("div", class_="content")
+    if not content:
+        return None
+    image_src = None
+    for img in content.find_all("img"):
+        if "poster" in img.get("alt", "").lower():
+            image_src = img.get("src")
+            break
+    h1 = content.find("h1")
+    text_parts, locations = [], {}
+    for p in content.find_all("p"):
+        p_text = p.get_text(strip=True)
+        text_parts.append(p_text)
+        for span in p.find_all("span", class_="name"):
+            name = span.get_text(strip=True)
+            if not name:
+                continue
+            if name in locations:
+                if p_text not in locations[name]["descriptions"]:
+                    locations[name]["descriptions"].append(p_text)
+            else:
+                locations[name] = {"name": name, "descriptions": [p_text]}
+    return {
+        "title": h1.get_text() if h1 else None,
+        "image_src": image_src,
+        "text_parts": text_parts,
+        "locations": list(locations.values()),
+    }
+
+
+def soup_ml_category(page: str, parser: str = "html.parser", parse_only=None):
+    soup = BeautifulSoup(page, parser, parse_only=parse_only)
+    menu = soup.find("div", id="multicolumn3")
+    if menu is None:
+        return []
+    return [(p.find("a").get("href") if p.find("a") else None, p.text) for p in menu.find_all("p")]
+
+
+def soup_ca_menu(page: str, parser: str = "html.parser", parse_only=None):
+    soup = BeautifulSoup(page, parser, parse_only=parse_only)
+    items = []
+    for item in soup.find_all("div", class_="fulltitle"):
+        title_div = item.find("div", class_="titleright")
+        img = item.find("img")
+        items.append((title_div.find("h2").get_text(strip=True) if title_div else None, img["src"] if img else None))
+    return items
+
+
+def soup_ca_title(page: str, parser: str = "html.parser", parse_only=None):
+    from parsing import extract_titlemarkers
+
+    return extract_titlemarkers(BeautifulSoup(page, parser, parse_only=parse_only).prettify())
+
+
+PARSERS = {
+    "ml_movie": [
+        ("bs4 html.parser (old)", soup_ml_movie),
+        ("bs4 lxml + SoupStrainer", lambda p: soup_ml_movie(p, "lxml", CONTENT_ONLY)),
+        ("lxml xpath (parsing.py)", parse_ml_movie),
+    ],
+    "ml_category": [
+        ("bs4 html.parser (old)", soup_ml_category),
+        ("bs4 lxml + SoupStrainer", lambda p: soup_ml_category(p, "lxml", SoupStrainer("div", id="multicolumn3"))),
+        ("lxml xpath (parsing.py)", parse_ml_category),
+    ],
+    "ca_menu": [
+        ("bs4 html.parser (old)", soup_ca_menu),
+        ("bs4 lxml + SoupStrainer", lambda p: soup_ca_menu(p, "lxml", SoupStrainer("div", class_="fulltitle"))),
+        ("lxml xpath (parsing.py)", parse_ca_menu),
+    ],
+    "ca_title": [
+        ("bs4 html.parser (old)", soup_ca_title),
+        ("raw scan (parsing.py)", parse_ca_title),
+    ],
+}
+
+
+def synthetic_movie_pages(limit: int = 100):
+    """movie-locations.com style pages built from the crawled records in data/."""
+    pages = []
+    with open(os.path.join(ROOT, "data", "movie_locations.json"), "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            paragraphs = []
+            for loc in record.get("locations") or []:
+                for text in loc.get("descriptions") or [""]:
+                    paragraphs.append(
+                        f'<p>{html.escape(text)} <span class="name">{html.escape(loc["name"])}</span></p>'
+                    )
+            nav = "".join(f'<li><a href="/x/{i}.php">Link {i}</a></li>' for i in range(200))
+            pages.append(
+                f"<html><head><title>{html.escape(record['title'])}</title>"
+                f"<script>var x = 1;</script></head><body><div id=\"nav\"><ul>{nav}</ul></div>"
+                f'<div class="content"><h1>{html.escape(record["title"])}</h1>'
+                f'<img src="poster.jpg" alt="Movie Poster">{"".join(paragraphs)}</div>'
+                f'<div id="footer">{nav}</div></body></html>'
+            )
+            if len(pages) >= limit:
+                break
+    return pages
+
+
+def load_fixtures(directory: str):
+    fixtures = {}
+    for kind in PARSERS:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(directory, f"{kind}_*.html"))):
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                pages.append(f.read())
+        if pages:
+            fixtures[kind] = pages
+    if "ml_movie" not in fixtures:
+        print("No saved movie pages found, using synthetic pages built from data/")
+        fixtures["ml_movie"] = synthetic_movie_pages()
+    return fixtures
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark crawler page parsers")
+    arg_parser.add_argument("--fixtures", default=DEFAULT_FIXTURES)
+    arg_parser.add_argument("--repeat", type=int, default=3)
+    args = arg_parser.parse_args()
+
+    for kind, pages in load_fixtures(args.fixtures).items():
+        size = sum(len(p) for p in pages) / len(pages) / 1024
+        print(f"\n{kind}: {len(pages)} pages, {size:.0f} KiB average")
+        outputs = {}
+        for name, parse in PARSERS[kind]:
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                result = [parse(page) for page in pages]
+            elapsed = time.perf_counter() - start
+            outputs[name] = result
+            print(f"  {name:<26} {len(pages) * args.repeat / elapsed:>8.1f} pages/s")
+        first, *others = outputs.values()
+        if any(other != first for other in others):
+            print("  WARNING: parsers disagree on some pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,20 @@
 import json
+import os
 import re
 import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Optional, Set, Tuple
+from typing import Deque, Dict, Optional, Set, Tuple
 
 import requests
-from bs4 import BeautifulSoup
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
 from rich import print as rprint
 
-# Initialize geocoder with a custom user agent (required by Nominatim)
-_geocoder = Nominatim(user_agent="movie-locations-finder-crawler/1.0")
+from parsing import parse_ml_category, parse_ml_index, parse_ml_movie
+
+# Nominatim geocoder, created on first use: geopy and the client's SSL setup
+# cost ~70 ms that a crawl without geocoding (and every worker) would pay
+_geocoder = None
 
 # Cache for geocoding results to avoid repeated API calls
 _geocode_cache: Dict[str, Optional[Tuple[float, float, str]]] = {}
@@ -27,10 +30,19 @@ def geocode_location(location_name: str) -> Optional[Tuple[float, float, str]]:
         A tuple of (latitude, longitude, resolved_address) if found, None otherwise.
         The resolved_address is the full address returned by the geocoding service.
     """
+    global _geocoder
+    from geopy.exc import GeocoderServiceError, GeocoderTimedOut
+
     # Check cache first
     if location_name in _geocode_cache:
         return _geocode_cache[location_name]
-    
+
+    if _geocoder is None:
+        from geopy.geocoders import Nominatim
+
+        # Custom user agent (required by Nominatim)
+        _geocoder = Nominatim(user_agent="movie-locations-finder-crawler/1.0")
+
     try:
         # Rate limit: 1 request per second (Nominatim policy)
         time.sleep(1.0)
@@ -72,7 +84,8 @@ https://movie-locations.com/movies/t/Tenet-film-locations.php
 def crawlMovieLocationsCom(
     save_to_db: bool = False, 
     output: str = "./temp/movie_locations.json",
-    max_pages: Optional[int] = None
+    max_pages: Optional[int] = None,
+    parse_workers: Optional[int] = None,
 ) -> bool:
     """Crawler for movie-locations.com.
 
@@ -80,7 +93,10 @@ def crawlMovieLocationsCom(
         save_to_db: If True, use a provided database connection to save results. For now we are doing it raw dog style with files.
         output: Path to a CSV file where results would be written. Default
             is ``movie_locations.csv``.
-        max_pages: Maximum number of movie pages to crawl. If None, crawl all.
+        max_pages: Maximum number of movie pages to crawl; pages without
+            content or a title do not count. If None, crawl all.
+        parse_workers: Processes parsing movie pages while the next ones are
+            fetched. Defaults to the number of CPUs.
 
     Returns:
         True if the crawl completed successfully and the page parsed;
@@ -102,12 +118,9 @@ def crawlMovieLocationsCom(
     seen = load_seen_urls(output)
     rprint(f"[green]Loaded {len(seen)} seen URLs.[/green]")
 
-    response = requests.get(scrape_url_base)
-    response.encoding = 'utf-8'
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    content_container = soup.find("div", class_="content")
-    if not content_container:
+    session = requests.Session()
+    category_hrefs = parse_ml_index(fetch_html(session, scrape_url_base))
+    if category_hrefs is None:
         rprint(f"[red]Failed to find content container in {scrape_url_base}[/red]")
         return False
     else:
@@ -115,13 +128,7 @@ def crawlMovieLocationsCom(
             "[green]Fetched main page successfully. Commencing with the crawl...[/green]"
         )
 
-    menu_container = content_container.find_all("p")[1]
-
-    rprint(f"[blue]Menu container found: {menu_container is not None}[/blue]")
-
-    category_links = [
-        scrape_url_base + link.get("href") for link in menu_container.find_all("a")
-    ]
+    category_links = [scrape_url_base + href for href in category_hrefs]
 
     if category_links is None or len(category_links) == 0:
         rprint("[red]No category links found in menu container.[/red]")
@@ -133,156 +140,140 @@ def crawlMovieLocationsCom(
 
     pages_crawled = []
 
-    for category_link in category_links:
-        # print(f"Crawing category page: {category_link}")
-        category_name = category_link.split("/")[-1].split("-")[0]
-        # print(category_name)
-
-        category_response = requests.get(category_link)
-        category_response.encoding = 'utf-8'
-        category_soup = BeautifulSoup(category_response.text, "html.parser")
-
-        category_menu = category_soup.find("div", id="multicolumn3")
-
-        for category_item in category_menu.find_all("p"):  # type: ignore
-            if category_item.find("a"):
-                movie_link = (
-                    scrape_movies_url
-                    + f"{category_name}/"
-                    + category_item.find("a").get("href")  # type: ignore
-                )
+    # Movie pages are parsed in worker processes while the main process keeps
+    # fetching; results are written in crawl order
+    parse_workers = parse_workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+        max_pending = parse_workers * 4
+        pending: Deque = deque()
+
+        def finish_oldest():
+            movie_link, category_name, future = pending.popleft()
+            page_object = build_page_object(movie_link, category_name, future.result(), scrape_movies_url)
+            if page_object is None:
+                return
+            append_record(output, page_object)
+            pages_crawled.append(page_object)
+            rprint(f"[bold green]Crawled movie page: {page_object['title']}[/bold green]")
+
+        def reached_max_pages() -> bool:
+            # Only pages that yield a record count, as before parsing moved
+            # to the pool; pages still being parsed might, so they are
+            # waited for before fetching past the limit
+            if max_pages is None:
+                return False
+            while pending and len(pages_crawled) + len(pending) >= max_pages:
+                finish_oldest()
+            return len(pages_crawled) >= max_pages
+
+        for category_link in category_links:
+            # print(f"Crawing category page: {category_link}")
+            category_name = category_link.split("/")[-1].split("-")[0]
+            # print(category_name)
+
+            for href, entry_text in parse_ml_category(fetch_html(session, category_link)):
+                if href:
+                    movie_link = scrape_movies_url + f"{category_name}/" + href
+
+                    # Skip if we've already seen this movie URL
+                    if movie_link in seen:
+                        rprint(
+                            f"[yellow]Already crawled: {movie_link} - skipping.[/yellow]"
+                        )
+                        continue
 
-                # Skip if we've already seen this movie URL
-                if movie_link in seen:
+                    rprint(f"[bold green]Movie link found: {movie_link}[/bold green]")
                     rprint(
-                        f"[yellow]Already crawled: {movie_link} - skipping.[/yellow]"
+                        f"[bold green]Starting to crawl {movie_link} page...[/bold green]"
                     )
-                    continue
-
-                rprint(f"[bold green]Movie link found: {movie_link}[/bold green]")
-                rprint(
-                    f"[bold green]Starting to crawl {movie_link} page...[/bold green]"
-                )
-                movie_response = requests.get(movie_link)
-                movie_response.encoding = 'utf-8'
-                movie_soup = BeautifulSoup(movie_response.text, "html.parser")
-
-                movie_content = movie_soup.find("div", class_="content")
-                if not movie_content:
-                    rprint(f"[red]Failed to find movie content in {movie_link}[/red]")
-                    continue
-
-                # Try to find the movie poster image (usually has 'poster' in alt text)
-                movie_image = None
-                for img in movie_content.find_all("img"):
-                    alt_text = img.get("alt", "").lower()
-                    if "poster" in alt_text:
-                        img_src = img.get("src")
-                        if img_src:
-                            # Convert relative path to full URL
-                            if img_src.startswith("http"):
-                                movie_image = img_src
-                            else:
-                                # Build full URL from relative path
-                                movie_image = f"{scrape_movies_url}{category_name}/{img_src}"
+                    html = fetch_html(session, movie_link)
+                    pending.append((movie_link, category_name, pool.submit(parse_ml_movie, html)))
+                    if len(pending) >= max_pending:
+                        finish_oldest()
+
+                    # Check if we've reached the max_pages limit
+                    if reached_max_pages():
+                        rprint(f"[yellow]Reached max_pages limit ({max_pages}). Stopping crawl.[/yellow]")
                         break
-
-                page_object = {
-                    "url": movie_link,
-                    "title": "",
-                    "image": movie_image,
-                    "text_content": "",
-                    "locations": [],
-                }
-
-                title_and_year_container = movie_content.find("h1")
-                if not title_and_year_container:
+                else:
+                    rprint("[red]No movie link sorry bud.[/red]")
+                    rprint(f"[red]No link movie title: {entry_text}[/red]")
                     rprint(
-                        f"[red]Failed to find title and year container in {movie_link}[/red]"
+                        "[red]If we want to also have empty movie pages, we can change the code here[/red]"
                     )
-                    continue
-
-                # For now the title is both the title and the year together in "title | year" format
-                title = title_and_year_container.get_text()
-                # If we want to have the year we can extract it later
-                # year = title_and_year_container.find("span").text
-                page_object["title"] = title
-
-                # Extract locations from the page
-                # movie-locations.com marks location names with <span class="name"> tags
-                # Use a dict to deduplicate locations by name and collect descriptions
-                text_content_parts = []
-                locations_dict: Dict[str, Dict] = {}
-                
-                for p in movie_content.find_all("p"):
-                    p_text = p.get_text(strip=True)
-                    text_content_parts.append(p_text)
-
-                    # Look for location names in <span class="name"> tags
-                    name_spans = p.find_all("span", class_="name")
-                    if not name_spans:
-                        continue
 
-                    # Process each location name individually to avoid duplicates
-                    for span in name_spans:
-                        location_name = span.get_text(strip=True)
-                        if not location_name:
-                            continue
-                        
-                        if location_name in locations_dict:
-                            # Add description to existing location if not already present
-                            if p_text not in locations_dict[location_name]["descriptions"]:
-                                locations_dict[location_name]["descriptions"].append(p_text)
-                        else:
-                            # Create new location entry
-                            locations_dict[location_name] = {
-                                "name": location_name,
-                                "descriptions": [p_text],
-                            }
-                            rprint(f"[cyan]Found location: {location_name}[/cyan]")
-                
-                # Convert locations_dict to list, geocoding each to validate and get coordinates
-                # Locations that fail geocoding (like person names) are filtered out
-
-                # WARN: This takes a LONG time to run.
-                # rprint(f"[cyan]Geocoding {len(locations_dict)} potential locations...[/cyan]")
-                # for loc_data in locations_dict.values():
-                #     coords = geocode_location(loc_data["name"])
-                #     if coords:
-                #         page_object["locations"].append({
-                #             "name": loc_data["name"],
-                #             "address": coords[2],  # Resolved address from geocoding
-                #             "latitude": coords[0],
-                #             "longitude": coords[1],
-                #             "descriptions": loc_data["descriptions"],
-                #         })
-                #         rprint(f"[green]✓ Geocoded: {loc_data['name']} → {coords[2][:60]}...[/green]")
-                #     else:
-                #         rprint(f"[dim]✗ Filtered out (not a place): {loc_data['name']}[/dim]")
-
-                page_object["text_content"] = "\n".join(text_content_parts)
-                append_record(output, page_object)
-                pages_crawled.append(page_object)
-                rprint(f"[bold green]Crawled movie page: {title}[/bold green]")
-                
-                # Check if we've reached the max_pages limit
-                if max_pages is not None and len(pages_crawled) >= max_pages:
-                    rprint(f"[yellow]Reached max_pages limit ({max_pages}). Stopping crawl.[/yellow]")
-                    break
-            else:
-                rprint("[red]No movie link sorry bud.[/red]")
-                rprint(f"[red]No link movie title: {category_item.text}[/red]")
-                rprint(
-                    "[red]If we want to also have empty movie pages, we can change the code here[/red]"
-                )
-        
-        # Also check at the category level to break out of outer loop
-        if max_pages is not None and len(pages_crawled) >= max_pages:
-            break
+            # Also check at the category level to break out of outer loop
+            if reached_max_pages():
+                break
+
+        while pending:
+            finish_oldest()
 
     return True
 
 
+def fetch_html(session: requests.Session, url: str) -> str:
+    response = session.get(url)
+    response.encoding = 'utf-8'
+    return response.text
+
+
+def build_page_object(movie_link: str, category_name: str, parsed: Optional[dict], scrape_movies_url: str) -> Optional[Dict]:
+    """Turn the output of ``parse_ml_movie`` into the record written to the output file."""
+    if parsed is None:
+        rprint(f"[red]Failed to find movie content in {movie_link}[/red]")
+        return None
+    if parsed["title"] is None:
+        rprint(
+            f"[red]Failed to find title and year container in {movie_link}[/red]"
+        )
+        return None
+
+    # Try to find the movie poster image (usually has 'poster' in alt text)
+    movie_image = None
+    img_src = parsed["image_src"]
+    if img_src:
+        # Convert relative path to full URL
+        if img_src.startswith("http"):
+            movie_image = img_src
+        else:
+            # Build full URL from relative path
+            movie_image = f"{scrape_movies_url}{category_name}/{img_src}"
+
+    for location in parsed["locations"]:
+        rprint(f"[cyan]Found location: {location['name']}[/cyan]")
+
+    # For now the title is both the title and the year together in "title | year" format
+    page_object = {
+        "url": movie_link,
+        "title": parsed["title"],
+        "image": movie_image,
+        "text_content": "\n".join(parsed["text_parts"]),
+        "locations": [],
+    }
+
+    # Convert locations to list, geocoding each to validate and get coordinates
+    # Locations that fail geocoding (like person names) are filtered out
+
+    # WARN: This takes a LONG time to run.
+    # rprint(f"[cyan]Geocoding {len(parsed['locations'])} potential locations...[/cyan]")
+    # for loc_data in parsed["locations"]:
+    #     coords = geocode_location(loc_data["name"])
+    #     if coords:
+    #         page_object["locations"].append({
+    #             "name": loc_data["name"],
+    #             "address": coords[2],  # Resolved address from geocoding
+    #             "latitude": coords[0],
+    #             "longitude": coords[1],
+    #             "descriptions": loc_data["descriptions"],
+    #         })
+    #         rprint(f"[green]✓ Geocoded: {loc_data['name']} → {coords[2][:60]}...[/green]")
+    #     else:
+    #         rprint(f"[dim]✗ Filtered out (not a place): {loc_data['name']}[/dim]")
+
+    return page_object
+
+
 def load_seen_urls(output_path: str) -> Set[str]:
     """
     Load seen URLs from the existing output file to avoid re-crawling.
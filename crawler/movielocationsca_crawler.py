@@ -1,80 +1,21 @@
 # crawler for https://moviefilminglocations.ca
 import json
+import os
 import re
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
-from typing import Set
+from typing import Deque, Optional, Set
 
 import requests
-from bs4 import BeautifulSoup
 from rich import print as rprint
 
-
-def extract_titlemarkers(html):
-    """
-    Extracts the titlemarkers JS object from HTML as a Python dict.
-    """
-    # Find the `const titlemarkers = { ... };` block without using a single
-    # catastrophic regex. We locate the first '{' after the declaration and
-    # scan forward, balancing braces while respecting string literals so we
-    # don't stop on braces that appear inside strings.
-    start_idx = html.find("const titlemarkers")
-    if start_idx == -1:
-        return None
-    eq_idx = html.find("=", start_idx)
-    if eq_idx == -1:
-        return None
-    brace_idx = html.find("{", eq_idx)
-    if brace_idx == -1:
-        return None
-
-    i = brace_idx
-    depth = 0
-    in_string = False
-    string_char = None
-    escape = False
-    end_idx = None
-    while i < len(html):
-        ch = html[i]
-        if in_string:
-            if escape:
-                escape = False
-            elif ch == "\\":
-                escape = True
-            elif ch == string_char:
-                in_string = False
-                string_char = None
-        else:
-            if ch == '"' or ch == "'":
-                in_string = True
-                string_char = ch
-            elif ch == "{":
-                depth += 1
-            elif ch == "}":
-                depth -= 1
-                if depth == 0:
-                    end_idx = i
-                    break
-        i += 1
-
-    if end_idx is None:
-        return None
-
-    js_object = html[brace_idx : end_idx + 1]
-
-    # Convert JS-like object to JSON-ish string:
-    # - Quote unquoted keys (match typical identifier keys only)
-    # - Remove trailing commas before closing braces/brackets
-    js_object_clean = re.sub(r"(?P<key>[A-Za-z_][A-Za-z0-9_]*)\s*:", r'"\g<key>":', js_object)
-    js_object_clean = re.sub(r",\s*(?=[}\]])", "", js_object_clean)
-
-    try:
-        return json.loads(js_object_clean)
-    except Exception:
-        return None
+from parsing import extract_titlemarkers, parse_ca_menu, parse_ca_title  # noqa: F401
 
 
 def crawlMovieLocationsCA(
     output_path: str = "temp/moviefilminglocationsca.json",
+    parse_workers: Optional[int] = None,
 ) -> bool:
     base_url = "https://moviefilminglocations.ca"
     # menu works by appending the page number to all, like /all/2, /all/3, etc.
@@ -86,127 +27,113 @@ def crawlMovieLocationsCA(
     # seen_urls: Set[str] = set()
     # data_rows: Dict[str, Dict[str, str]] = {}
     seen = load_seen_urls(output_path)
-    for i in range(1, known_menu_pages):
-        print(i)
-        response = requests.get(menu_url + f"/{i}")
-        if response.status_code != 200:
-            rprint(f"[red]Failed to fetch menu page {i}: {menu_url}[/red]")
-            return False
-
-        menu_page_soup = BeautifulSoup(response.text, "html.parser")
-
-        page_items = menu_page_soup.find_all("div", class_="fulltitle")
-
-        movies = []
-
-        for item in page_items:
-            title_div = item.find("div", class_="titleright")
-            img = item.find("img")
-            item_title = (
-                title_div.find("h2").get_text(strip=True) if title_div else None
-            )
-            img_src = img["src"] if img else None
-            item_id = None
-            if img_src:
-                m = re.search(r"tt(\d+)", img_src)
-                if m:
-                    item_id = m.group(1)
-
-            if not item_id:
-                rprint(f"[yellow]Skipping item with no id or image: {item_title}[/yellow]")
-                continue
-
-            item_absolute_link = title_url + item_id
-            if item_absolute_link in seen:
-                rprint(
-                    f"[yellow]Skipping already seen URL: {item_absolute_link}[/yellow]"
-                )
-                continue
-            rprint("[blue]----------------------------------------[/blue]")
-            print(f"Title: {item_title}, Link: {item_absolute_link}")
-
-            # Build full image URL
-            movie_image = None
-            if img_src:
-                if img_src.startswith("http"):
-                    movie_image = img_src
-                else:
-                    movie_image = f"{base_url}{img_src}" if img_src.startswith("/") else f"{base_url}/{img_src}"
-
-            movie = {
-                "title": item_title,
-                "url": item_absolute_link,
-                "image": movie_image,
-                "text_content": "",
-                "locations": [],
-            }
-
-            item_page_response = requests.get(item_absolute_link)
-            if item_page_response.status_code != 200:
-                rprint(f"[red]Failed to fetch item page: {item_absolute_link}[/red]")
-                continue
+    session = requests.Session()
+    # Title pages are parsed in worker processes while the next ones are fetched
+    parse_workers = parse_workers or os.cpu_count() or 1
+    max_pending = parse_workers * 4
+    with ProcessPoolExecutor(max_workers=parse_workers) as pool:
+        for i in range(1, known_menu_pages):
+            print(i)
+            response = session.get(menu_url + f"/{i}")
+            if response.status_code != 200:
+                rprint(f"[red]Failed to fetch menu page {i}: {menu_url}[/red]")
+                return False
+
+            pending: Deque = deque()
+
+            for item_title, img_src in parse_ca_menu(response.text):
+                item_id = None
+                if img_src:
+                    m = re.search(r"tt(\d+)", img_src)
+                    if m:
+                        item_id = m.group(1)
+
+                if not item_id:
+                    rprint(f"[yellow]Skipping item with no id or image: {item_title}[/yellow]")
+                    continue
+
+                item_absolute_link = title_url + item_id
+                if item_absolute_link in seen:
+                    rprint(
+                        f"[yellow]Skipping already seen URL: {item_absolute_link}[/yellow]"
+                    )
+                    continue
+                rprint("[blue]----------------------------------------[/blue]")
+                print(f"Title: {item_title}, Link: {item_absolute_link}")
+
+                # Build full image URL
+                movie_image = None
+                if img_src:
+                    if img_src.startswith("http"):
+                        movie_image = img_src
+                    else:
+                        movie_image = f"{base_url}{img_src}" if img_src.startswith("/") else f"{base_url}/{img_src}"
+
+                movie = {
+                    "title": item_title,
+                    "url": item_absolute_link,
+                    "image": movie_image,
+                    "text_content": "",
+                    "locations": [],
+                }
 
-            item_soup = BeautifulSoup(item_page_response.text, "html.parser")
-            rprint(f"[green]Fetched item page for {item_title}[/green]")
-            # rprint(item_soup.prettify())
-            json_result = extract_titlemarkers(item_soup.prettify())
-            # if item_id == "6436726":
-            #     rprint(item_soup.prettify())
-            #     rprint("[cyan]Tu powinna być soupka[/cyan]")
+                item_page_response = session.get(item_absolute_link)
+                if item_page_response.status_code != 200:
+                    rprint(f"[red]Failed to fetch item page: {item_absolute_link}[/red]")
+                    continue
 
-            try:
-                if not json_result:
-                    raise KeyError("no json_result")
-                locations = json_result.get(item_id) or json_result.get(item_title)
-                if not locations:
-                    raise KeyError("no locations")
-            except Exception:
-                rprint(f"[red]No location data found for {item_title}. Skipping[/red]")
-                continue
-            for location in locations if locations else []:
-                # location list: [title, adress, lat, lon, desc]
-                # rprint(f"[cyan]Location data: {str(location)}[/cyan]")
-                print(location[0], location[1], location[2], location[3])
-                location_dict = {
-                    "name": location[0],
-                    "address": location[1],
-                    "latitude": location[2],
-                    "longitude": location[3],
-                    "description": location[4],
-                }
-                movie["locations"].append(location_dict)
-                movie["text_content"] += (
-                    f"Location: {location_dict['name']}\nDescription: {location_dict['description']}\nAddress: {location_dict['address']}\n\n"
-                )
-
-            # location_divs = item_soup.find_all("div", class_="feature-item")
-            # for loc_div in location_divs:
-            #     loc_name = loc_div.find("h3").get_text(strip=True)
-            #     loc_address = loc_div.find("p").get_text(strip=True)
-            #     rprint(f"[green]Location: {loc_name}, Address: {loc_address}[/green]")
-            #     if loc_name != loc_address:
-            #         rprint(f"[yellow]Address differs from name: {loc_address}[/yellow]")
-            #     movie["locations"].append(location_dict)
-            #     movie["text_content"] += (
-            #         f"Location: {loc_name}\nDescription: {location_dict['description']}\nAddress: {loc_address}\n\n"
-            #     )
-
-            rprint(f"[blue]Writing results to {output_path}...[/blue]")
-            try:
-                with open(output_path, "a", encoding="utf-8") as f:
-                    f.write(json.dumps(movie, ensure_ascii=False) + "\n")
-                    f.flush()
-                rprint(
-                    f"[bold green]Successfully saved data to {output_path}[/bold green]"
-                )
-            except Exception as e:
-                rprint(f"[red]Failed to write output file: {str(e)}[/red]")
+                rprint(f"[green]Fetched item page for {item_title}[/green]")
+                pending.append((movie, item_id, pool.submit(parse_ca_title, item_page_response.text)))
+                if len(pending) >= max_pending:
+                    write_movie(output_path, *pending.popleft())
 
-        # print(loc_div)
+            while pending:
+                write_movie(output_path, *pending.popleft())
 
     return True
 
 
+def write_movie(output_path: str, movie: dict, item_id: str, parsed: Future) -> None:
+    """Add the locations parsed from a title page to ``movie`` and append it to the output."""
+    item_title = movie["title"]
+    json_result = parsed.result()
+    try:
+        if not json_result:
+            raise KeyError("no json_result")
+        locations = json_result.get(item_id) or json_result.get(item_title)
+        if not locations:
+            raise KeyError("no locations")
+    except Exception:
+        rprint(f"[red]No location data found for {item_title}. Skipping[/red]")
+        return
+    for location in locations if locations else []:
+        # location list: [title, adress, lat, lon, desc]
+        # rprint(f"[cyan]Location data: {str(location)}[/cyan]")
+        print(location[0], location[1], location[2], location[3])
+        location_dict = {
+            "name": location[0],
+            "address": location[1],
+            "latitude": location[2],
+            "longitude": location[3],
+            "description": location[4],
+        }
+        movie["locations"].append(location_dict)
+        movie["text_content"] += (
+            f"Location: {location_dict['name']}\nDescription: {location_dict['description']}\nAddress: {location_dict['address']}\n\n"
+        )
+
+    rprint(f"[blue]Writing results to {output_path}...[/blue]")
+    try:
+        with open(output_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(movie, ensure_ascii=False) + "\n")
+            f.flush()
+        rprint(
+            f"[bold green]Successfully saved data to {output_path}[/bold green]"
+        )
+    except Exception as e:
+        rprint(f"[red]Failed to write output file: {str(e)}[/red]")
+
+
 def load_seen_urls(output_path: str) -> Set[str]:
     """
     Load seen URLs from the existing output file to avoid re-crawling.
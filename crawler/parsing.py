@@ -0,0 +1,201 @@
+"""Page parsers shared by the HTML crawlers.
+
+The crawlers only need a few nodes from each page (``div.content``,
+``div#multicolumn3``, ``div.fulltitle`` or an inline script), so instead of
+building a full BeautifulSoup tree with ``html.parser`` they parse with lxml
+and pick those nodes with precompiled XPath expressions. The lxml parser
+object is created once per process and reused for every page.
+
+Every ``parse_*`` function takes the page's HTML text and returns plain
+lists/dicts, so it can run in a worker process
+(``concurrent.futures.ProcessPoolExecutor``) while the crawler keeps fetching.
+"""
+
+import json
+import re
+from typing import List, Optional, Tuple
+
+import lxml.html
+from lxml import etree
+
+# Not thread-safe, but each worker process gets its own copy
+_PARSER = lxml.html.HTMLParser(remove_comments=True, remove_pis=True)
+
+
+def _has_class(name: str) -> str:
+    return f'contains(concat(" ", normalize-space(@class), " "), " {name} ")'
+
+
+_CONTENT = etree.XPath(f"//div[{_has_class('content')}]")
+_MULTICOLUMN = etree.XPath('//div[@id="multicolumn3"]')
+_NAME_SPANS = etree.XPath(f".//span[{_has_class('name')}]")
+_FULLTITLES = etree.XPath(f"//div[{_has_class('fulltitle')}]")
+_TITLERIGHT_H2 = etree.XPath(f".//div[{_has_class('titleright')}]//h2")
+
+
+def _tree(html: str):
+    return lxml.html.document_fromstring(html, parser=_PARSER)
+
+
+def _text(element, strip: bool = False) -> str:
+    """``Tag.get_text()`` equivalent; ``strip=True`` strips and joins each text node."""
+    if strip:
+        return "".join(s.strip() for s in element.itertext())
+    return "".join(element.itertext())
+
+
+def _first(elements):
+    return elements[0] if elements else None
+
+
+# movie-locations.com
+
+
+def parse_ml_index(html: str) -> Optional[List[str]]:
+    """Category page hrefs from the home page menu, ``None`` if the layout changed."""
+    content = _first(_CONTENT(_tree(html)))
+    if content is None:
+        return None
+    paragraphs = list(content.iter("p"))
+    if len(paragraphs) < 2:
+        return []
+    return [a.get("href") for a in paragraphs[1].iter("a")]
+
+
+def parse_ml_category(html: str) -> List[Tuple[Optional[str], str]]:
+    """``(movie href or None, entry text)`` for every entry of a category page."""
+    menu = _first(_MULTICOLUMN(_tree(html)))
+    if menu is None:
+        return []
+    entries = []
+    for p in menu.iter("p"):
+        a = next(p.iter("a"), None)
+        entries.append((a.get("href") if a is not None else None, _text(p)))
+    return entries
+
+
+def parse_ml_movie(html: str) -> Optional[dict]:
+    """Title, poster src, paragraph texts and locations of a movie page.
+
+    ``None`` if the page has no content container; ``title`` is ``None`` if
+    it has no heading. Locations are the ``span.name`` entries, deduplicated
+    by name, each with the paragraphs that mention it.
+    """
+    content = _first(_CONTENT(_tree(html)))
+    if content is None:
+        return None
+
+    image_src = None
+    for img in content.iter("img"):
+        if "poster" in (img.get("alt") or "").lower():
+            image_src = img.get("src")
+            break
+
+    h1 = next(content.iter("h1"), None)
+    text_parts = []
+    locations = {}
+    for p in content.iter("p"):
+        p_text = _text(p, strip=True)
+        text_parts.append(p_text)
+        for span in _NAME_SPANS(p):
+            name = _text(span, strip=True)
+            if not name:
+                continue
+            if name in locations:
+                if p_text not in locations[name]["descriptions"]:
+                    locations[name]["descriptions"].append(p_text)
+            else:
+                locations[name] = {"name": name, "descriptions": [p_text]}
+
+    return {
+        "title": _text(h1) if h1 is not None else None,
+        "image_src": image_src,
+        "text_parts": text_parts,
+        "locations": list(locations.values()),
+    }
+
+
+# moviefilminglocations.ca
+
+
+def parse_ca_menu(html: str) -> List[Tuple[Optional[str], Optional[str]]]:
+    """``(title, image src)`` for every film on a menu page."""
+    items = []
+    for item in _FULLTITLES(_tree(html)):
+        h2 = _first(_TITLERIGHT_H2(item))
+        img = next(item.iter("img"), None)
+        items.append((_text(h2, strip=True) if h2 is not None else None, img.get("src") if img is not None else None))
+    return items
+
+
+def extract_titlemarkers(html):
+    """
+    Extracts the titlemarkers JS object from HTML as a Python dict.
+    """
+    # Find the `const titlemarkers = { ... };` block without using a single
+    # catastrophic regex. We locate the first '{' after the declaration and
+    # scan forward, balancing braces while respecting string literals so we
+    # don't stop on braces that appear inside strings.
+    start_idx = html.find("const titlemarkers")
+    if start_idx == -1:
+        return None
+    eq_idx = html.find("=", start_idx)
+    if eq_idx == -1:
+        return None
+    brace_idx = html.find("{", eq_idx)
+    if brace_idx == -1:
+        return None
+
+    i = brace_idx
+    depth = 0
+    in_string = False
+    string_char = None
+    escape = False
+    end_idx = None
+    while i < len(html):
+        ch = html[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == string_char:
+                in_string = False
+                string_char = None
+        else:
+            if ch == '"' or ch == "'":
+                in_string = True
+                string_char = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+                if depth == 0:
+                    end_idx = i
+                    break
+        i += 1
+
+    if end_idx is None:
+        return None
+
+    js_object = html[brace_idx : end_idx + 1]
+
+    # Convert JS-like object to JSON-ish string:
+    # - Quote unquoted keys (match typical identifier keys only)
+    # - Remove trailing commas before closing braces/brackets
+    js_object_clean = re.sub(r"(?P<key>[A-Za-z_][A-Za-z0-9_]*)\s*:", r'"\g<key>":', js_object)
+    js_object_clean = re.sub(r",\s*(?=[}\]])", "", js_object_clean)
+
+    try:
+        return json.loads(js_object_clean)
+    except Exception:
+        return None
+
+
+def parse_ca_title(html: str) -> Optional[dict]:
+    """The ``titlemarkers`` object of a title page.
+
+    The data sits in an inline script, so the raw HTML is scanned directly;
+    no tree is built at all.
+    """
+    return extract_titlemarkers(html)
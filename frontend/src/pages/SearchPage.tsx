@@ -19,6 +19,8 @@ export default function SearchPage() {
     const [results, setResults] = useState<any[]>([]);
     const [clusters, setClusters] = useState<any[]>([]);
     const [selectedCluster, setSelectedCluster] = useState<string | null>(null);
+    // Set when the API corrected a misspelled query and searched for that instead
+    const [correctedQuery, setCorrectedQuery] = useState<string | null>(null);
 
     // Modal state for "More Like This"
     const [isModalOpen, setIsModalOpen] = useState(false);
@@ -74,11 +76,12 @@ export default function SearchPage() {
         if (!tq) return;
         setLoading(true);
         setSelectedCluster(null); // Reset filter on new search
+        setCorrectedQuery(null);
         try {
             const res = await fetch(
                 `/api/search?q=${encodeURIComponent(tq)}&k=${encodeURIComponent(
                     k
-                )}`
+                )}&autocorrect=1`
             );
             if (!res.ok) {
                 setResults([]);
@@ -89,6 +92,7 @@ export default function SearchPage() {
             // API returns {results: [...], clusters: [...]}
             setResults(Array.isArray(data.results) ? data.results : []);
             setClusters(Array.isArray(data.clusters) ? data.clusters : []);
+            setCorrectedQuery(data.corrected_query || null);
         } catch (err) {
             setResults([]);
             setClusters([]);
@@ -147,6 +151,12 @@ export default function SearchPage() {
                 <Box>
                     {loading && <Text>Loading...</Text>}
 
+                    {!loading && correctedQuery && (
+                        <Text mb={3} color="gray.600">
+                            Showing results for <b>{correctedQuery}</b>
+                        </Text>
+                    )}
+
                     {!loading && activeResults.length === 0 && results.length > 0 && (
                         <Text>No results in this topic.</Text>
                     )}
@@ -1,6 +1,7 @@
-import json
 import os
+import queue
 import sys
+import threading
 import time
 
 # ensure project root is on sys.path
@@ -8,9 +9,72 @@ ROOT = os.path.dirname(os.path.abspath(__file__))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-from src.indexer import Indexer
+from src.artifacts import bump_index_version
+from src.dataset import DATA_DIR, find_data_files
+
+# The rest (numpy, pysolr, requests) is imported inside index_data(): worker
+# processes started with spawn/forkserver re-import this module and only
+# need src.documents
+
+# Transform processes (None: one per CPU) and upload settings
+TRANSFORM_WORKERS = int(os.getenv("INDEX_WORKERS", "0")) or None
+UPLOAD_BATCH_SIZE = 100
+UPLOAD_THREADS = 2
+UPLOAD_QUEUE_BATCHES = 8
+
+
+def start_upload(indexer, prepared):
+    """Send ``prepared`` to Solr from background threads through a bounded queue.
+
+    Returns a function that waits for the upload and returns the number of
+    documents indexed.
+    """
+    batches = queue.Queue(maxsize=UPLOAD_QUEUE_BATCHES)
+    indexed = []
+
+    def feed():
+        for data_path, solr_docs in prepared:
+            print(f"\nIndexing {len(solr_docs)} documents from {data_path}...")
+            for i in range(0, len(solr_docs), UPLOAD_BATCH_SIZE):
+                batches.put((data_path, i, solr_docs[i : i + UPLOAD_BATCH_SIZE]))
+        for _ in range(UPLOAD_THREADS):
+            batches.put(None)
+
+    def upload():
+        while True:
+            item = batches.get()
+            if item is None:
+                return
+            data_path, i, batch = item
+            try:
+                indexer.add_documents(batch)
+                indexed.append(len(batch))
+            except Exception as e:
+                print(f"Error indexing batch {i} from {data_path}: {e}")
+
+    threads = [threading.Thread(target=feed, daemon=True)]
+    threads += [threading.Thread(target=upload, daemon=True) for _ in range(UPLOAD_THREADS)]
+    for thread in threads:
+        thread.start()
+
+    def wait():
+        for thread in threads:
+            thread.join()
+        return sum(indexed)
+
+    return wait
+
 
 def index_data():
+    from src.documents import transform_files
+    from src.indexer import Indexer
+    from src.neighbors import build_neighbor_table
+    from src.schema import ensure_schema
+    from src.snapshot import ensure_snapshot
+    from src.spelling import build_spelling_index
+    from src.topics import assign_topics
+    from src.vectors import build_vector_index
+
     # If a specific file is provided, use that. Otherwise scan data/ folder.
     files_to_index = []
     
@@ -23,13 +87,10 @@ def index_data():
             return
     else:
         # Default: scan data directory
-        data_dir = os.path.join(ROOT, "data")
-        if os.path.exists(data_dir):
-            for f in os.listdir(data_dir):
-                if f.endswith(".json"):
-                    files_to_index.append(os.path.join(data_dir, f))
+        if os.path.exists(DATA_DIR):
+            files_to_index = find_data_files(DATA_DIR)
         else:
-             print(f"Error: Data directory {data_dir} not found.")
+             print(f"Error: Data directory {DATA_DIR} not found.")
              return
 
     if not files_to_index:
@@ -39,125 +100,86 @@ def index_data():
     # Get Solr URL from environment or use default
     solr_url = os.getenv("SOLR_URL", "http://localhost:8983/solr/movies")
     print(f"Connecting to Solr at: {solr_url}")
-    indexer = Indexer(solr_url=solr_url)
-    
-    # Clean index before adding new documents
-    print("Cleaning existing Solr index...")
-    indexer.delete_all()
-
-    total_indexed = 0
+    # SOLR_URL may list several replicas; writes go to the leader
+    indexer = Indexer(solr_url=solr_url, leader_url=os.getenv("SOLR_LEADER_URL"))
 
-    for data_path in files_to_index:
-        print(f"\nProcessing {data_path}...")
+    # Default runs read the columnar snapshot, which is only rebuilt when data/ changed
+    snapshot = None
+    if len(sys.argv) == 1:
         try:
-            with open(data_path, "r", encoding="utf-8") as f:
-                documents = []
-                # First try reading as a whole JSON array if it starts with [
-                f.seek(0)
-                first_char = f.read(1)
-                f.seek(0)
-                if first_char == '[':
-                    try:
-                        data = json.load(f)
-                        documents = data
-                    except json.JSONDecodeError as e:
-                         print(f"Error decoding JSON array in {data_path}: {e}")
-                else:
-                    # Assume NDJSON
-                    try:
-                        for line in f:
-                            if line.strip():
-                                documents.append(json.loads(line))
-                    except json.JSONDecodeError as e:
-                        print(f"Error decoding NDJSON in {data_path}: {e}")
-
-            if not documents:
-                print(f"No valid documents found in {data_path}, skipping.")
-                continue
-
-            print(f"Found {len(documents)} movies in {os.path.basename(data_path)}.")
-
-            # Prepare documents for Solr - one document per LOCATION (not per movie)
-            # This enables grouping by location and spatial queries
-            solr_docs = []
-            for doc in documents:
-                movie_title = doc.get("title", "")
-                movie_url = doc.get("url", "")
-                movie_image = doc.get("image", "")
-                movie_content = doc.get("text_content", "")
-                locations = doc.get("locations", [])
-                
-                if not locations:
-                    # Movie with no locations - create a single document
-                    solr_docs.append({
-                        "id": movie_url or f"movie_{len(solr_docs)}",
-                        "movie_title": movie_title,
-                        "title": movie_title,  # Keep for backwards compatibility
-                        "content": movie_content,
-                        "url": movie_url,
-                        "movie_image": movie_image,
-                        "image": movie_image,
-                    })
-                else:
-                    # Create one document per location
-                    for idx, loc in enumerate(locations):
-                        loc_name = loc.get("name") or "Unknown Location"
-                        lat = loc.get("latitude") or 0
-                        lon = loc.get("longitude") or 0
-                        loc_address = loc.get("address") or ""
-                        loc_description = loc.get("description") or ""
-                        loc_image = loc.get("image") or ""
-                        
-                        # Build unique ID for this location
-                        loc_id = f"{movie_url}__loc_{idx}" if movie_url else f"loc_{len(solr_docs)}"
-                        
-                        solr_doc = {
-                            "id": loc_id,
-                            "location_name": loc_name,
-                            "location_address": loc_address,
-                            "location_description": loc_description,
-                            "location_image": loc_image,
-                            "movie_title": movie_title,
-                            "title": f"{loc_name} - {movie_title}",  # Combined for search
-                            "content": f"{loc_name} {loc_address} {loc_description}",
-                            "url": movie_url,
-                            "movie_image": movie_image,
-                            "image": loc_image or movie_image,
-                        }
-                        
-                        # Add spatial field if valid coordinates exist
-                        if lat is not None and lon is not None:
-                            try:
-                                lat_f = float(lat)
-                                lon_f = float(lon)
-                                # Only add if coordinates are valid (not 0,0 which is often missing data)
-                                if not (lat_f == 0 and lon_f == 0):
-                                    solr_doc["location_pt"] = f"{lat_f},{lon_f}"
-                                    solr_doc["latitude"] = lat_f
-                                    solr_doc["longitude"] = lon_f
-                            except (ValueError, TypeError):
-                                pass  # Skip invalid coordinates
-                        
-                        solr_docs.append(solr_doc)
-
-            batch_size = 100
-            print(f"Indexing {len(solr_docs)} documents...")
-            
-            for i in range(0, len(solr_docs), batch_size):
-                batch = solr_docs[i : i + batch_size]
-                try:
-                    indexer.add_documents(batch)
-                    # print(f"Indexed {i + len(batch)} / {len(solr_docs)}")
-                except Exception as e:
-                    print(f"Error indexing batch {i} from {data_path}: {e}")
-            
-            total_indexed += len(solr_docs)
-            print(f"Finished indexing {data_path}.")
-            
+            snapshot = ensure_snapshot()
         except Exception as e:
-            print(f"Failed to process file {data_path}: {e}")
+            # The files are transformed directly instead, where bad ones are skipped
+            print(f"Could not build the dataset snapshot, reading the data files: {e}")
+
+    # Per-location documents, transformed on a process pool; (data_path, solr_docs) per file
+    print(f"\nTransforming {len(files_to_index)} file(s) with {TRANSFORM_WORKERS or os.cpu_count()} worker(s)...")
+    prepared = []
+    for data_path, solr_docs in transform_files(files_to_index, snapshot, workers=TRANSFORM_WORKERS):
+        if not solr_docs:
+            print(f"No valid documents found in {data_path}, skipping.")
+            continue
+        print(f"Prepared {len(solr_docs)} documents from {os.path.basename(data_path)}.")
+        prepared.append((data_path, solr_docs))
+    if not prepared:
+        print("Nothing to index, leaving the Solr index as it is.")
+        return
+
+    # Topic clustering needs the whole corpus, so it runs between transform and upload
+    all_docs = [solr_doc for _, solr_docs in prepared for solr_doc in solr_docs]
+    print(f"\nClustering {len(all_docs)} documents into topics...")
+    try:
+        n_topics = assign_topics(all_docs)
+        print(f"Assigned {n_topics} topics.")
+    except Exception as e:
+        print(f"Topic clustering failed, indexing without topics: {e}")
+
+    # The old index is only wiped once the new documents are ready, so a
+    # failing transform leaves it serving
+    print("\nCleaning existing Solr index...")
+    indexer.delete_all()
 
+    # Typed docValues fields must exist before the first document arrives,
+    # otherwise schemaless mode guesses them as analyzed text
+    print("Ensuring Solr schema fields...")
+    try:
+        commands = ensure_schema(indexer.pool.leader.url)
+        for command, entries in commands.items():
+            print(f"  {command}: {', '.join(e['name'] for e in entries)}")
+    except Exception as e:
+        print(f"Could not update Solr schema: {e}")
+
+    # Uploads run in the background while the similar-documents table and
+    # the vector index are built below
+    wait_for_upload = start_upload(indexer, prepared)
+
+    print("Building similar-documents table...")
+    try:
+        rows = build_neighbor_table(all_docs)
+        print(f"Stored neighbors for {rows} documents.")
+    except Exception as e:
+        print(f"Similar-documents table failed, the API will use live MLT: {e}")
+
+    print("Training LSA embeddings for vector search...")
+    try:
+        rows = build_vector_index(all_docs)
+        print(f"Stored vectors for {rows} documents.")
+    except Exception as e:
+        print(f"Vector index failed, vector/hybrid search will fall back to keyword: {e}")
+
+    print("Building spelling index...")
+    try:
+        words = build_spelling_index(all_docs)
+        print(f"Stored {words} words for spelling suggestions.")
+    except Exception as e:
+        print(f"Spelling index failed, searches will not suggest corrections: {e}")
+
+    total_indexed = wait_for_upload()
     print(f"\nTotal documents indexed across all files: {total_indexed}")
 
+    # Tell running API processes to rebuild their in-memory indexes
+    version = bump_index_version()
+    print(f"Index version is now {version}")
+
 if __name__ == "__main__":
     index_data()
@@ -0,0 +1,108 @@
+"""Replay logged API queries against a server and report latency distributions.
+
+Usage:
+    python replay_queries.py [--target URL] [--speed N] [--concurrency N] [--limit N]
+
+With ``--speed 1`` requests go out at the pace they were logged, ``--speed 10``
+ten times faster, and ``--speed 0`` as fast as the workers allow.
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# ensure project root is on sys.path
+ROOT = os.path.dirname(os.path.abspath(__file__))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from src.querylog import QUERY_LOG_DIR, iter_entries
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def replay(entries, target, speed, concurrency, timeout):
+    local = threading.local()
+    results = []  # (endpoint, status, latency_ms)
+    lock = threading.Lock()
+
+    def send(entry):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            status = session.get(target + entry["path"], params=entry.get("params"), timeout=timeout).status_code
+        except requests.RequestException:
+            status = 0
+        with lock:
+            results.append((entry["endpoint"], status, (time.perf_counter() - start) * 1000))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        first_ts = None
+        for entry in entries:
+            if speed > 0:
+                first_ts = entry["ts"] if first_ts is None else first_ts
+                delay = (entry["ts"] - first_ts) / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(send, entry)
+    return results, time.perf_counter() - started
+
+
+def report(results, elapsed):
+    by_endpoint = {}
+    for endpoint, status, latency in results:
+        by_endpoint.setdefault(endpoint, []).append((status, latency))
+
+    print(f"{len(results)} requests in {elapsed:.1f}s ({len(results) / elapsed if elapsed else 0:.1f} req/s)")
+    print(f"{'endpoint':<10} {'count':>7} {'errors':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  (ms)")
+    for endpoint in sorted(by_endpoint) + ["all"]:
+        rows = results if endpoint == "all" else [(endpoint,) + r for r in by_endpoint[endpoint]]
+        latencies = sorted(latency for _, _, latency in rows)
+        errors = sum(1 for _, status, _ in rows if status == 0 or status >= 500)
+        print(
+            f"{endpoint:<10} {len(rows):>7} {errors:>7} "
+            f"{percentile(latencies, 50):>8.1f} {percentile(latencies, 90):>8.1f} "
+            f"{percentile(latencies, 99):>8.1f} {latencies[-1] if latencies else 0:>8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log-dir", default=QUERY_LOG_DIR)
+    parser.add_argument("--target", default="http://127.0.0.1:5001")
+    parser.add_argument("--speed", type=float, default=1.0, help="Rate multiplier, 0 for no pacing")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--limit", type=int, default=0, help="Replay at most this many queries")
+    parser.add_argument("--endpoint", action="append", help="Only replay these endpoints")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    entries = [e for e in iter_entries(args.log_dir) if e.get("path") and "ts" in e]
+    if args.endpoint:
+        entries = [e for e in entries if e.get("endpoint") in args.endpoint]
+    if args.limit:
+        entries = entries[: args.limit]
+    if not entries:
+        print(f"No logged queries found in {args.log_dir}")
+        return
+
+    print(f"Replaying {len(entries)} queries against {args.target}")
+    results, elapsed = replay(entries, args.target.rstrip("/"), args.speed, args.concurrency, args.timeout)
+    report(results, elapsed)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,14 @@
 """Small runner to start the Flask app from anywhere in the system.
+
+With ``API_WORKERS`` above 1 the app is served by that many forked worker
+processes. The parent imports everything once (including the libraries the
+app only loads on its first Solr request), creates the app with its
+in-memory indexes (``create_app(prefork=True)``), binds the socket and
+forks. Workers start warm, share those pages copy-on-write and accept
+connections from the same socket. The parent starts no threads and never
+talks to Solr, so nothing half-done is forked; each worker starts its own
+query log (``queries-<n>.ndjson``) after the fork, and worker 0 alone
+replays the warm-up queries.
 """
 
 import os
@@ -11,6 +21,68 @@ if ROOT not in sys.path:
 
 from src.api import create_app
 
+HOST = "127.0.0.1"
+PORT = 5001
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+
+# Imported lazily by the app (see src/solrpool.py); preloading them in the
+# parent spares every worker the cost on its first request
+PRELOAD_MODULES = ("pysolr", "requests")
+
+
+def serve_forked(workers: int):
+    import importlib
+    import signal
+    import socket
+
+    from werkzeug.serving import make_server
+
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+    app = create_app(prefork=True)
+    start_worker = app.extensions["start_worker"]
+    listener = socket.create_server((HOST, PORT), backlog=128)
+
+    def spawn(worker: int) -> int:
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            start_worker(worker)
+            server = make_server(HOST, PORT, app, threaded=True, fd=listener.fileno())
+            server.serve_forever()
+            os._exit(0)
+        return pid
+
+    # pid -> worker number; a replacement takes over its predecessor's number
+    children = {spawn(worker): worker for worker in range(workers)}
+    print(f"Serving on http://{HOST}:{PORT} with {workers} worker processes")
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    while children:
+        pid, status = os.wait()
+        worker = children.pop(pid, None)
+        if not stopping and worker is not None:
+            # A crashed worker is replaced from the warm parent
+            print(f"Worker {pid} exited with status {status}, starting a new one")
+            children[spawn(worker)] = worker
+
+
 if __name__ == "__main__":
-    app = create_app()
-    app.run(host="127.0.0.1", port=5001, debug=False)
+    if API_WORKERS > 1 and hasattr(os, "fork"):
+        serve_forked(API_WORKERS)
+    else:
+        app = create_app()
+        app.run(host=HOST, port=PORT, debug=False)
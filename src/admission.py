@@ -0,0 +1,98 @@
+"""Admission control: per-client rate limits and a global cap on Solr work.
+
+Every client gets a token bucket (``rate`` tokens per second, up to
+``burst``); requests spend tokens according to their cost and are turned
+away with a ``Retry-After`` when the bucket is empty. Independently,
+``ConcurrencyLimiter`` bounds how many Solr-backed requests run at once. A
+few more may wait briefly in a queue, and the rest are rejected straight
+away instead of adding to everyone's latency.
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+
+class RateLimiter:
+    """Token buckets keyed by client, oldest clients evicted beyond ``max_clients``."""
+
+    def __init__(self, rate: float, burst: float, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()  # client -> (tokens, updated)
+        self.rejected = 0
+
+    def take(self, client: str, cost: float = 1.0) -> float:
+        """Spend ``cost`` tokens of ``client``. Returns 0 if allowed, else seconds until it would be."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= cost:
+                tokens -= cost
+            else:
+                wait = (cost - tokens) / self.rate
+                self.rejected += 1
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def stats(self) -> dict:
+        return {"clients": len(self._buckets), "rejected": self.rejected}
+
+
+class ConcurrencyLimiter:
+    """At most ``max_concurrent`` holders; up to ``max_queued`` more wait up to ``queue_timeout``."""
+
+    def __init__(self, max_concurrent: int, max_queued: int = 0, queue_timeout: float = 0.5):
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._slots = threading.Semaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.queued = 0
+        self.rejected = 0
+
+    def acquire(self) -> bool:
+        if self._slots.acquire(blocking=False):
+            with self._lock:
+                self.in_flight += 1
+            return True
+        with self._lock:
+            if self.queued >= self.max_queued:
+                self.rejected += 1
+                return False
+            self.queued += 1
+        acquired = self._slots.acquire(timeout=self.queue_timeout)
+        with self._lock:
+            self.queued -= 1
+            if acquired:
+                self.in_flight += 1
+            else:
+                self.rejected += 1
+        return acquired
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "rejected": self.rejected,
+        }
+
+
+def retry_after_header(seconds: float) -> str:
+    """``Retry-After`` takes whole seconds; never advertise 0."""
+    return str(max(1, math.ceil(seconds)))
@@ -1,217 +1,920 @@
 """Flask API to serve the movie locations app and solr search results."""
 
+import hashlib
+import itertools
 import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 
-from flask import Flask, request, send_from_directory
+from flask import Flask, Response, g, request
 from flask_cors import CORS
+from werkzeug.datastructures import MultiDict
 
+from src.admission import ConcurrencyLimiter, RateLimiter, retry_after_header
+from src.artifacts import VersionedResource, read_index_version
+from src.dataset import iter_all_records
+from src.export import EXPORT_FIELDS, FORMATS, csv_lines, gzip_stream, ndjson_lines
+from src.facets import facet_names, parse_facets
+from src.geo import (
+    corridor_matches,
+    doc_coordinates,
+    parse_polygon,
+    parse_route,
+    points_in_polygons,
+    polygon_boxes,
+    route_boxes,
+)
 from src.indexer import Indexer
+from src.jsonprovider import JSON_PROVIDERS
+from src.neighbors import NeighborTable
+from src.query import build_filter_queries
+from src.querylog import QUERY_LOG_DIR, QueryLog, log_file_name, top_queries
+from src.resilience import CircuitBreaker, StaleStore
+from src.snapshot import load_snapshot
+from src.solrpool import is_client_error
+from src.spelling import SpellingIndex
+from src.static import StaticAssets
+from src.suggest import build_suggest_index, build_suggest_index_from_snapshot
+from src.topics import topic_clusters
+from src.vectors import VectorIndex, fuse_scores
 
 ROOT = os.path.dirname(os.path.dirname(__file__))
 
+# app.json provider, see src/jsonprovider.py
+JSON_PROVIDER = os.getenv("JSON_PROVIDER", "fast")
 
-def create_app(static_folder: Optional[str] = None):
+# Solr read timeout per endpoint, in seconds
+ENDPOINT_TIMEOUTS = {
+    "search": 3.0,
+    "browse": 2.0,
+    "facets": 2.0,
+    "mlt": 2.0,
+    "grouped": 3.0,
+    "nearby": 2.0,
+    "within": 3.0,
+    "along": 3.0,
+}
+# Response bodies for a 503 when there is no stale copy to fall back on
+EMPTY_RESPONSES = {
+    "search": {"results": [], "clusters": []},
+    "browse": {"total": 0, "items": []},
+    "facets": {"facets": {}},
+    "mlt": {"results": []},
+    "grouped": {"total_locations": 0, "groups": []},
+    "nearby": {"results": []},
+    "within": {"total": 0, "results": []},
+    "along": {"total": 0, "results": []},
+}
+
+# HTTP caching per endpoint: (Cache-Control, Vary). Endpoints not listed
+# (and shuffled browsing) get neither headers nor an ETag.
+API_CACHE_MAX_AGE = int(os.getenv("API_CACHE_MAX_AGE", "60"))
+HTTP_CACHING = {
+    "search": (f"public, max-age={API_CACHE_MAX_AGE}", "Accept-Encoding"),
+    "browse": (f"public, max-age={API_CACHE_MAX_AGE}", "Accept-Encoding"),
+    "facets": (f"public, max-age={API_CACHE_MAX_AGE}", "Accept-Encoding"),
+    "grouped": (f"public, max-age={API_CACHE_MAX_AGE}", "Accept-Encoding"),
+    "nearby": (f"public, max-age={API_CACHE_MAX_AGE}", "Accept-Encoding"),
+    "within": (f"public, max-age={API_CACHE_MAX_AGE}", "Accept-Encoding"),
+    "along": (f"public, max-age={API_CACHE_MAX_AGE}", "Accept-Encoding"),
+    # Similar documents only change with a reindex
+    "mlt": (f"public, max-age={API_CACHE_MAX_AGE * 10}", "Accept-Encoding"),
+    "suggest": (f"public, max-age={API_CACHE_MAX_AGE * 10}", "Accept-Encoding"),
+}
+
+# Server-side ceilings on client supplied sizes
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+MAX_OFFSET = int(os.getenv("MAX_OFFSET", "10000"))  # Deep paging makes Solr collect offset + rows docs
+MAX_GROUP_SIZE = int(os.getenv("MAX_GROUP_SIZE", "20"))
+MAX_MLT_COUNT = int(os.getenv("MAX_MLT_COUNT", "50"))
+MAX_NEARBY_RESULTS = int(os.getenv("MAX_NEARBY_RESULTS", "200"))
+MAX_RADIUS_KM = float(os.getenv("MAX_RADIUS_KM", "500"))
+MAX_GEOMETRY_POINTS = int(os.getenv("MAX_GEOMETRY_POINTS", "2000"))  # Polygon vertices or route points
+MAX_CORRIDOR_KM = float(os.getenv("MAX_CORRIDOR_KM", "50"))
+MAX_AREA_RESULTS = int(os.getenv("MAX_AREA_RESULTS", "500"))
+# Solr candidates behind a polygon or route query, before the exact test
+GEO_CANDIDATES = int(os.getenv("GEO_CANDIDATES", "5000"))
+
+# Admission control: token-bucket rate per client (requests/second and burst),
+# cost of each endpoint in tokens, and a global cap on concurrent Solr-backed
+# requests with a short queue in front of it
+RATE_LIMIT = float(os.getenv("RATE_LIMIT", "10"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "40"))
+# Behind a reverse proxy every request comes from the proxy's address
+RATE_LIMIT_TRUST_PROXY = os.getenv("RATE_LIMIT_TRUST_PROXY", "0") == "1"
+ENDPOINT_COSTS = {
+    "search": 1.0,
+    "browse": 1.0,
+    "facets": 1.0,
+    "mlt": 1.0,
+    "grouped": 1.0,
+    "nearby": 1.0,
+    # One polygon/route query replaces a radius query per stop
+    "within": 2.0,
+    "along": 2.0,
+    "suggest": 0.2,  # One per keystroke, answered from memory
+    # Plus the cost of each sub-query, charged once the body is parsed
+    "batch": 1.0,
+    "export": 5.0,
+}
+MAX_CONCURRENT_QUERIES = int(os.getenv("MAX_CONCURRENT_QUERIES", "32"))
+MAX_QUEUED_QUERIES = int(os.getenv("MAX_QUEUED_QUERIES", "64"))
+QUEUE_TIMEOUT = float(os.getenv("QUEUE_TIMEOUT", "0.5"))
+
+# Share of requests written to the query log (0 disables it) and how many of
+# the most frequent logged queries to run at startup to warm the caches
+QUERY_LOG_SAMPLE = float(os.getenv("QUERY_LOG_SAMPLE", "0.1"))
+QUERY_LOG_WARMUP = int(os.getenv("QUERY_LOG_WARMUP", "100"))
+
+# Keyword searches with fewer hits than this get a spelling suggestion
+SPELL_MIN_HITS = int(os.getenv("SPELL_MIN_HITS", "3"))
+
+# Concurrent /api/export streams; each one holds a Solr cursor until it ends
+EXPORT_MAX_CONCURRENT = int(os.getenv("EXPORT_MAX_CONCURRENT", "2"))
+
+# /api/batch limits
+BATCH_MAX_QUERIES = int(os.getenv("BATCH_MAX_QUERIES", "20"))
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "8"))
+
+
+def _int_arg(args, name: str) -> Optional[int]:
+    try:
+        return int(args[name]) if args.get(name) else None
+    except ValueError:
+        return None
+
+
+def _filters_from_args(args) -> list:
+    """Build ``fq`` clauses from the structured filter query-string parameters.
+
+    Supported: ``source``, ``country`` and ``city`` (repeatable),
+    ``has_coords=1|0`` and ``year_from``/``year_to``.
+    """
+    has_coords = args.get("has_coords")
+    return build_filter_queries(
+        source=args.getlist("source"),
+        country=args.getlist("country"),
+        city=args.getlist("city"),
+        has_coordinates=None if has_coords in (None, "") else has_coords in ("1", "true"),
+        year_from=_int_arg(args, "year_from"),
+        year_to=_int_arg(args, "year_to"),
+    )
+
+
+def _as_list(value) -> list:
+    # Schemaless cores return single values as one-element lists
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _client_id() -> str:
+    if RATE_LIMIT_TRUST_PROXY:
+        forwarded = request.headers.get("X-Forwarded-For", "").split(",")[0].strip()
+        if forwarded:
+            return forwarded
+    return request.remote_addr or "unknown"
+
+
+def _result_count(payload) -> Optional[int]:
+    for key in ("results", "items", "groups", "suggestions"):
+        if isinstance(payload.get(key), list):
+            return len(payload[key])
+    return None
+
+
+def _load_suggestions():
+    # The snapshot is memory-mapped and counted column-wise; fall back to
+    # parsing data/ when index_data.py has not written a current one
+    snapshot = load_snapshot()
+    if snapshot is not None:
+        return build_suggest_index_from_snapshot(snapshot)
+    return build_suggest_index(iter_all_records())
+
+
+def create_app(static_folder: Optional[str] = None, prefork: bool = False):
+    """The API app.
+
+    With ``prefork`` the app is meant to be created once and forked (see
+    ``run_api.py``): the in-memory indexes are built right away, nothing
+    talks to Solr and no thread is started. Each worker then calls
+    ``app.extensions["start_worker"](n)`` after the fork for its query log
+    and, in worker 0 only, the warm-up.
+    """
     if static_folder is None:
         # React built frontend
         static_folder = os.path.join(ROOT, "frontend/dist")
 
-    app = Flask(__name__, static_folder=static_folder, static_url_path="")
+    # Flask's own static route would stat the file on every request;
+    # StaticAssets serves the frontend from memory instead
+    app = Flask(__name__, static_folder=None)
+    app.json = JSON_PROVIDERS[JSON_PROVIDER](app)
     CORS(app)
+    static_assets = StaticAssets(static_folder)
+
+    # One client (and HTTP connection pool) shared by every request
+    indexer = Indexer(
+        # Comma separated replicas are load balanced, see src/solrpool.py
+        solr_url=os.getenv("SOLR_URL", "http://localhost:8983/solr/movies"),
+        leader_url=os.getenv("SOLR_LEADER_URL"),
+        # Solr rejecting a bad request is not Solr being down
+        breaker=CircuitBreaker(ignore=is_client_error),
+    )
+    # Last good response per request, served when Solr is unavailable
+    stale_store = StaleStore()
+    rate_limiter = RateLimiter(RATE_LIMIT, RATE_LIMIT_BURST)
+    query_slots = ConcurrencyLimiter(MAX_CONCURRENT_QUERIES, MAX_QUEUED_QUERIES, QUEUE_TIMEOUT)
+
+    @app.before_request
+    def admit():
+        """Reject over-limit clients and shed load beyond the concurrency cap with a 429."""
+        cost = ENDPOINT_COSTS.get(request.endpoint)
+        if cost is None:
+            return None
+        wait = rate_limiter.take(_client_id(), cost)
+        if wait:
+            return {"error": "Rate limit exceeded"}, 429, {"Retry-After": retry_after_header(wait)}
+        # Typeahead never reaches Solr; exports have their own limiter and
+        # batches take a slot per sub-query
+        if request.endpoint in ("suggest", "export", "batch"):
+            return None
+        if not query_slots.acquire():
+            return {"error": "Server busy, try again shortly"}, 429, {"Retry-After": retry_after_header(1)}
+        g.holds_query_slot = True
+        return None
+
+    @app.teardown_request
+    def release_query_slot(exc=None):
+        if g.pop("holds_query_slot", False):
+            query_slots.release()
+
+    # Opened by start_background()
+    query_log = None
+
+    # Typeahead index, rebuilt from data/ whenever index_data.py reindexes;
+    # the old one keeps answering keystrokes while the new one is built
+    suggester = VersionedResource(_load_suggestions, background=True)
+    # Facet counts over the whole index, the browse landing view
+    facet_table = VersionedResource(lambda: indexer.facet_counts())
+
+    # Precomputed similar-document table, None until index_data.py has built one
+    neighbor_table = VersionedResource(NeighborTable.load)
+
+    # LSA embeddings for vector/hybrid search, None until index_data.py has built them
+    vector_index = VersionedResource(VectorIndex.load)
 
-    @app.route("/api/search")
-    def search():
-        query = request.args.get("q", "")
+    # Symmetric-delete spelling index, None until index_data.py has built it
+    spelling = VersionedResource(SpellingIndex.load)
+
+    def unfiltered_facets(names):
+        table = facet_table.get()
+        return {name: table.get(name, []) for name in names}
+
+    def search(args):
+        """Keyword, vector or hybrid search.
+
+        When a keyword search finds fewer than ``SPELL_MIN_HITS`` documents
+        the response carries ``did_you_mean`` from the spelling index; with
+        ``autocorrect=1`` the corrected query is run right away and its
+        results are returned under ``corrected_query`` if it finds more.
+        """
+        query = args.get("q", "")
         print(f"[DEBUG] Received query: '{query}'")
         if not query:
             return {"results": []}
 
-        indexer = Indexer()
-        try:
-            results = indexer.search(query, clustering=True)
-            
-            # Extract clusters from raw response
-            clusters = []
-            if hasattr(results, "raw_response"):
-                # Structure: {..., "clusters": [{"labels": ["Topic"], "docs": ["id1",...]}, ...]}
-                raw_clusters = results.raw_response.get("clusters", [])
-                for c in raw_clusters:
-                    labels = c.get("labels", [])
-                    docs = c.get("docs", [])
-                    if labels and docs:
-                        clusters.append({"labels": labels, "docs": docs})
-
-            return {"results": results.docs, "clusters": clusters}
-        except Exception as e:
-            print(f"Search failed: {e}")
-            import traceback
-
-            traceback.print_exc()
-            # Fallback to mock data for demonstration if Solr is down
-            return {
-                "results": [
-                    {
-                        "id": "mock-1",
-                        "title": "Mock Movie (Solr Unavailable)",
-                        "content": "This is a mock result because the Solr server could not be reached. Please ensure Apache Solr is running.",
-                    },
-                    {
-                        "id": "mock-2",
-                        "title": "Another Mock Movie",
-                        "content": "Solr integration is implemented, but the server is offline.",
-                    },
-                ]
-            }
+        k = max(1, min(_int_arg(args, "k") or 10, 100))
+        # keyword (Solr BM25 only), vector (LSA only) or hybrid (both fused)
+        mode = args.get("mode", "keyword")
+        try:
+            alpha = float(args.get("alpha", "0.5"))
+        except ValueError:
+            alpha = 0.5
+        if mode == "vector":
+            alpha = 1.0
+        filters = _filters_from_args(args)
+        facets = facet_names(args.get("facets"))
+        # Carrot2 clustering per request is opt-in; by default clusters come
+        # from the topic labels assigned at index time
+        live_clustering = args.get("clustering") == "live"
+        solr_facets = facets if live_clustering else list(dict.fromkeys(facets + ["topic"]))
+
+        vectors = vector_index.get() if mode in ("vector", "hybrid") else None
+        if mode == "vector" and vectors is not None:
+            return vector_search(vectors, query, k, filters, facets)
+
+        def keyword_search(q):
+            return indexer.search(
+                q,
+                clustering=live_clustering,
+                filters=filters,
+                facets=solr_facets,
+                # Extra keyword candidates give the fusion something to reorder
+                rows=k * 2 if vectors is not None else k,
+                fl="*,score",
+            )
+
+        results = keyword_search(query)
+
+        # Few hits usually means a typo; answering with the correction saves
+        # the user's retries
+        did_you_mean = corrected_query = None
+        speller = spelling.get() if results.hits < SPELL_MIN_HITS and mode != "vector" else None
+        correction = speller.correct(query) if speller is not None else None
+        if correction and args.get("autocorrect") == "1":
+            corrected = keyword_search(correction)
+            if corrected.hits > results.hits:
+                results, query, corrected_query = corrected, correction, correction
+        elif correction:
+            did_you_mean = correction
+
+        counts = parse_facets(results.raw_response.get("facets", {}), solr_facets)
+
+        docs = results.docs
+        if vectors is not None:
+            fused = fuse_scores(
+                [(d["id"], d.get("score", 0.0)) for d in docs],
+                vectors.search(query, k=k * 2),
+                alpha=alpha,
+            )[:k]
+            by_id = {d["id"]: d for d in docs}
+            missing = [doc_id for doc_id, _ in fused if doc_id not in by_id]
+            # Filters apply to vector-only hits too
+            for doc in indexer.get_documents(missing, fq=filters):
+                by_id[doc["id"]] = doc
+            # Copies: Solr results can be shared with coalesced requests
+            docs = [dict(by_id[doc_id], score=score) for doc_id, score in fused if doc_id in by_id]
+
+        clusters = []
+        if live_clustering:
+            # Structure: {..., "clusters": [{"labels": ["Topic"], "docs": ["id1",...]}, ...]}
+            raw_clusters = results.raw_response.get("clusters", [])
+            for c in raw_clusters:
+                labels = c.get("labels", [])
+                cluster_docs = c.get("docs", [])
+                if labels and cluster_docs:
+                    clusters.append({"labels": labels, "docs": cluster_docs})
+        else:
+            clusters = topic_clusters(docs, counts.get("topic", []))
+
+        response = {"results": docs, "clusters": clusters}
+        if did_you_mean:
+            response["did_you_mean"] = did_you_mean
+        if corrected_query:
+            response["corrected_query"] = corrected_query
+        if facets:
+            response["facets"] = {name: counts[name] for name in facets}
+        return response
+
+    def vector_search(vectors, query, k, filters, facets):
+        """Vector-only search: Solr just fetches the hits' documents, with the filters.
+
+        Facets describe everything matching the filters, clusters the page.
+        """
+        # Filters drop hits after ranking, so ask for more candidates then
+        hits = vectors.search(query, k=k * 10 if filters else k * 2)
+        scores = dict(hits)
+        docs = [
+            dict(doc, score=scores[doc["id"]])
+            for doc in indexer.get_documents([doc_id for doc_id, _ in hits], fq=filters)[:k]
+        ]
+        # Page-level topic counts; there is no keyword result set to facet on
+        labels = Counter(label for d in docs for label in _as_list(d.get("topic_label"))[:1])
+        topic_counts = [{"value": label, "count": n} for label, n in labels.most_common()]
+        response = {"results": docs, "clusters": topic_clusters(docs, topic_counts)}
+        if facets:
+            response["facets"] = (
+                indexer.facet_counts(filters=filters, facets=facets) if filters else unfiltered_facets(facets)
+            )
+        return response
+
+    def suggest(args):
+        """Typeahead over movie titles and location names, served from memory."""
+        prefix = args.get("q", "")
+        try:
+            limit = int(args.get("limit", "8") or "8")
+        except Exception:
+            limit = 8
+        limit = max(1, min(limit, 20))
+        kind = args.get("type") or None
+
+        suggestions = suggester.get().suggest(prefix, limit=limit, kind=kind)
+        return {"query": prefix, "suggestions": suggestions}
+
+    def facets_endpoint(args):
+        """Counts per country, city, source and decade for drill-down navigation.
+
+        The unfiltered request is answered from the in-memory facet table.
+        """
+        names = facet_names(args.get("facets") or "all")
+        q = args.get("q", "")
+        filters = _filters_from_args(args)
+        if not q and not filters:
+            return {"facets": unfiltered_facets(names)}
+        return {"facets": indexer.facet_counts(query=q or None, filters=filters, facets=names)}
 
     @app.route("/", defaults={"path": "index.html"})
     @app.route("/<path:path>")
     def serve_frontend(path):
         # serve static frontend files from frontend/dist
-        if app.static_folder and os.path.exists(os.path.join(app.static_folder, path)):
-            return send_from_directory(app.static_folder, path)
-        return ("Not Found", 404)
+        return static_assets.serve(path)
 
-    @app.route("/api/browse")
-    def browse():
+    def browse(args):
         # Provide simple browsing/pagination endpoint backed by Solr
         try:
-            offset = int(request.args.get("offset", "0") or "0")
+            offset = int(args.get("offset", "0") or "0")
         except Exception:
             offset = 0
         try:
-            limit = int(request.args.get("limit", "10") or "10")
+            limit = int(args.get("limit", "10") or "10")
         except Exception:
             limit = 10
-        q = request.args.get("q", "")
-        shuffle = request.args.get("shuffle") == "1"
+        offset = max(0, min(offset, MAX_OFFSET))
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        q = args.get("q", "")
+        shuffle = args.get("shuffle") == "1"
+        filters = _filters_from_args(args)
+        facets = facet_names(args.get("facets"))
+        # The landing view needs no Solr facet work, the table has it
+        use_table = bool(facets) and not q and not filters
 
-        indexer = Indexer()
-        try:
-            results = indexer.browse(
-                query=q or None, offset=offset, limit=limit, shuffle=shuffle
-            )
-            items = [dict(d) for d in results]
-            total = getattr(results, "hits", len(items))
-            return {"total": total, "items": items}
-        except Exception as e:
-            print(f"Browse failed: {e}")
-            import traceback
-
-            traceback.print_exc()
-            return {
-                "total": 2,
-                "items": [
-                    {
-                        "id": "mock-1",
-                        "title": "Mock Movie (Solr Unavailable)",
-                        "content": "This is a mock result because the Solr server could not be reached. Please ensure Apache Solr is running.",
-                        "country": "Demo Land",
-                        "score": 1.0,
-                    },
-                    {
-                        "id": "mock-2",
-                        "title": "Another Mock Site",
-                        "content": "Solr integration is implemented, but the server is offline.",
-                        "country": "Test Country",
-                        "score": 0.8,
-                    },
-                ],
-            }
-            
-    @app.route("/api/more-like-this")
-    def more_like_this():
-        doc_id = request.args.get("id")
+        results = indexer.browse(
+            query=q or None,
+            offset=offset,
+            limit=limit,
+            shuffle=shuffle,
+            filters=filters,
+            facets=None if use_table else facets,
+        )
+        # Solr's docs go out as they are: nothing below mutates them
+        items = results.docs
+        total = getattr(results, "hits", len(items))
+        response = {"total": total, "items": items}
+        if use_table:
+            response["facets"] = unfiltered_facets(facets)
+        elif facets:
+            response["facets"] = parse_facets(results.raw_response.get("facets", {}), facets)
+        return response
+
+    def more_like_this(args):
+        doc_id = args.get("id")
         if not doc_id:
             return {"error": "Missing 'id' parameter"}, 400
-            
-        indexer = Indexer()
-        try:
-            results = indexer.more_like_this(doc_id)
-            # pysolr more_like_this returns a specialized object, but usually it behaves mostly like results
-            # The structure might differ slightly depending on pysolr version, but usually it's iterable
-            items = [dict(d) for d in results]
-            return {"results": items}
-        except Exception as e:
-            print(f"More Like This failed: {e}")
-            import traceback
-            traceback.print_exc()
-            return {
-                "results": [
-                    {
-                        "id": "mock-sim-1",
-                        "title": "Similar Mock Movie",
-                        "content": "Simulated similar content because Solr failed.",
-                        "score": 0.9
-                    }
-                ]
-            }
 
-    @app.route("/api/locations/grouped")
-    def locations_grouped():
+        try:
+            count = int(args.get("count", "10") or "10")
+        except Exception:
+            count = 10
+        count = max(1, min(count, MAX_MLT_COUNT))
+
+        table = neighbor_table.get()
+        if table is not None and doc_id in table:
+            similar = table.similar(doc_id, count)
+            scores = dict(similar)
+            items = indexer.get_documents([neighbor_id for neighbor_id, _ in similar])
+            return {"results": [dict(item, score=scores[item["id"]]) for item in items]}
+
+        # Unknown to the table (e.g. indexed after it was built): live MLT
+        results = indexer.more_like_this(doc_id, count=count)
+        # A plain list of docs (see Indexer.more_like_this)
+        return {"results": results}
+
+    def locations_grouped(args):
         """Search with results grouped by location name."""
-        q = request.args.get("q", "")
+        q = args.get("q", "")
         try:
-            limit = int(request.args.get("limit", "10") or "10")
+            limit = int(args.get("limit", "10") or "10")
         except Exception:
             limit = 10
         try:
-            group_limit = int(request.args.get("group_limit", "5") or "5")
+            group_limit = int(args.get("group_limit", "5") or "5")
         except Exception:
             group_limit = 5
-            
-        indexer = Indexer()
-        try:
-            results = indexer.group_by_location(query=q or None, limit=limit, group_limit=group_limit)
-            # Parse grouped response - pysolr returns grouped results differently
-            raw = results.raw_response
-            grouped = raw.get("grouped", {}).get("location_name", {})
-            groups = grouped.get("groups", [])
-            n_groups = grouped.get("ngroups", len(groups))
-            
-            # Format response
-            formatted_groups = []
-            for g in groups:
-                formatted_groups.append({
-                    "location_name": g.get("groupValue", "Unknown"),
-                    "count": g.get("doclist", {}).get("numFound", 0),
-                    "movies": g.get("doclist", {}).get("docs", [])
-                })
-            
-            return {"total_locations": n_groups, "groups": formatted_groups}
-        except Exception as e:
-            print(f"Grouped search failed: {e}")
-            import traceback
-            traceback.print_exc()
-            return {"error": str(e), "total_locations": 0, "groups": []}
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        group_limit = max(1, min(group_limit, MAX_GROUP_SIZE))
+
+        results = indexer.group_by_location(
+            query=q or None,
+            limit=limit,
+            group_limit=group_limit,
+            filters=_filters_from_args(args),
+        )
+        # Each hit is the head doc of one location; the rest are in "expanded"
+        expanded = results.raw_response.get("expanded", {})
+        formatted_groups = []
+        for head in results.docs:
+            name = head.get("location_name", "Unknown")
+            if isinstance(name, list):
+                name = name[0] if name else "Unknown"
+            more = expanded.get(head.get("location_key"), {})
+            formatted_groups.append({
+                "location_name": name,
+                "count": more.get("numFound", 0) + 1,
+                "movies": [head] + more.get("docs", []),
+            })
+        n_groups = results.hits
 
-    @app.route("/api/locations/nearby")
-    def locations_nearby():
+        return {"total_locations": n_groups, "groups": formatted_groups}
+
+    def locations_nearby(args):
         """Find filming locations near a geographic point."""
         try:
-            lat = float(request.args.get("lat", "0"))
-            lon = float(request.args.get("lon", "0"))
+            lat = float(args.get("lat", "0"))
+            lon = float(args.get("lon", "0"))
         except (ValueError, TypeError):
             return {"error": "Invalid lat/lon parameters"}, 400
-            
+
         try:
-            radius = float(request.args.get("radius", "50"))
+            radius = float(args.get("radius", "50"))
         except Exception:
             radius = 50
         try:
-            limit = int(request.args.get("limit", "20") or "20")
+            limit = int(args.get("limit", "20") or "20")
         except Exception:
             limit = 20
-            
-        indexer = Indexer()
+        radius = max(0.0, min(radius, MAX_RADIUS_KM))
+        limit = max(1, min(limit, MAX_NEARBY_RESULTS))
+
+        results = indexer.nearby_locations(
+            lat=lat, lon=lon, radius_km=radius, limit=limit, filters=_filters_from_args(args)
+        )
+        return {"results": results.docs, "center": {"lat": lat, "lon": lon}, "radius_km": radius}
+
+    def _area_limit(args) -> int:
+        try:
+            limit = int(args.get("limit", "100") or "100")
+        except ValueError:
+            limit = 100
+        return max(1, min(limit, MAX_AREA_RESULTS))
+
+    def locations_within(args):
+        """Filming locations inside a GeoJSON Polygon or MultiPolygon (``polygon``)."""
+        try:
+            polygons = parse_polygon(args.get("polygon", ""))
+        except ValueError as e:
+            return {"error": f"Invalid polygon: {e}"}, 400
+        if sum(len(ring) for rings in polygons for ring in rings) > MAX_GEOMETRY_POINTS:
+            return {"error": f"At most {MAX_GEOMETRY_POINTS} polygon vertices"}, 400
+        limit = _area_limit(args)
+
+        results = indexer.locations_in_boxes(
+            polygon_boxes(polygons), limit=GEO_CANDIDATES, filters=_filters_from_args(args)
+        )
+        docs = list(results)
+        lat, lon = doc_coordinates(docs)
+        items = [d for d, inside in zip(docs, points_in_polygons(lat, lon, polygons)) if inside]
+        return {"total": len(items), "results": items[:limit], "truncated": results.hits > len(docs)}
+
+    def locations_along(args):
+        """Filming locations within ``width`` km of a route, ordered from its start.
+
+        ``route`` is ``lat,lon;lat,lon;...`` or a GeoJSON LineString. Each
+        result carries ``_dist_`` (km off the route) and ``_route_km_`` (km
+        along it).
+        """
+        try:
+            route = parse_route(args.get("route", ""))
+        except ValueError as e:
+            return {"error": f"Invalid route: {e}"}, 400
+        if len(route) > MAX_GEOMETRY_POINTS:
+            return {"error": f"At most {MAX_GEOMETRY_POINTS} route points"}, 400
         try:
-            results = indexer.nearby_locations(lat=lat, lon=lon, radius_km=radius, limit=limit)
-            items = [dict(d) for d in results]
-            return {"results": items, "center": {"lat": lat, "lon": lon}, "radius_km": radius}
+            width = float(args.get("width", "5"))
+        except ValueError:
+            width = 5.0
+        width = max(0.0, min(width, MAX_CORRIDOR_KM))
+        limit = _area_limit(args)
+
+        results = indexer.locations_in_boxes(
+            route_boxes(route, width), limit=GEO_CANDIDATES, filters=_filters_from_args(args)
+        )
+        docs = list(results)
+        lat, lon = doc_coordinates(docs)
+        indices, distance, along, length = corridor_matches(lat, lon, route, width)
+        items = [
+            dict(docs[i], _dist_=round(float(d), 3), _route_km_=round(float(a), 3))
+            for i, d, a in zip(indices[:limit], distance, along)
+        ]
+        return {
+            "total": len(indices),
+            "results": items,
+            "route_km": round(length, 3),
+            "width_km": width,
+            "truncated": results.hits > len(docs),
+        }
+
+    def resilient(name, handler):
+        """Wrap a Solr-backed handler with its timeout and the stale fallback.
+
+        Successful responses are remembered per request. When Solr fails,
+        times out or the breaker is open, the last good response for the
+        same request is served with ``"stale": true`` and refreshed in the
+        background; without one the client gets a 503 with an empty result.
+        """
+        timeout = ENDPOINT_TIMEOUTS.get(name)
+
+        def run(args):
+            with indexer.read_timeout(timeout):
+                return handler(args)
+
+        def refresh(args):
+            result = run(args)
+            if isinstance(result, tuple):
+                raise ValueError("not cacheable")
+            return result
+
+        def wrapped(args):
+            key = (name, tuple(sorted(args.items(multi=True))))
+            try:
+                result = run(args)
+            except Exception as e:
+                print(f"{name} failed: {e}")
+                if is_client_error(e):
+                    # Solr rejected this request; a stale answer would be to another one
+                    return dict(EMPTY_RESPONSES.get(name, {}), error="Invalid request"), 400
+                stale = stale_store.get(key)
+                if stale is None:
+                    return dict(EMPTY_RESPONSES.get(name, {}), error="Search backend unavailable"), 503
+                stale_store.refresh_in_background(key, lambda: refresh(args))
+                value, stored_at = stale
+                return dict(value, stale=True, stale_since=stored_at)
+            if not isinstance(result, tuple):
+                stale_store.put(key, result)
+            return result
+
+        return wrapped
+
+    @app.route("/api/metrics")
+    def metrics():
+        """Operational counters for this API process."""
+        return {
+            "solr": indexer.pool.stats(),
+            "singleflight": indexer.flights.stats() if indexer.flights else None,
+            "circuit_breaker": indexer.breaker.stats() if indexer.breaker else None,
+            "stale_store": stale_store.stats(),
+            "query_log": query_log.stats() if query_log else None,
+            "rate_limit": rate_limiter.stats(),
+            "concurrency": query_slots.stats(),
+            "exports": export_slots.stats(),
+        }
+
+    # Changes whenever index_data.py reindexes, checked at most once a second
+    index_version = VersionedResource(read_index_version)
+
+    def cached(name, handler):
+        """Add ETag/Cache-Control/Vary to ``handler``'s responses and answer If-None-Match.
+
+        The ETag covers the index version and the normalized parameters, so
+        a matching If-None-Match gets its 304 without running the handler.
+        """
+        cache_control, vary = HTTP_CACHING.get(name, (None, None))
+        if cache_control is None:
+            return handler
+
+        def wrapped(args):
+            if name == "browse" and args.get("shuffle") == "1":
+                return handler(args)
+            # Sorted by name only: handlers read the first of repeated
+            # values, so their order (and empty ones) must stay in the key
+            params = sorted(args.items(multi=True), key=lambda item: item[0])
+            digest = hashlib.blake2b(repr((index_version.get(), name, params)).encode("utf-8"), digest_size=12)
+            etag = digest.hexdigest()
+            headers = {"ETag": f'"{etag}"', "Cache-Control": cache_control, "Vary": vary}
+            if request.if_none_match.contains(etag):
+                return "", 304, headers
+
+            result = handler(args)
+            payload, status = result if isinstance(result, tuple) else (result, 200)
+            # Errors and stale fallbacks must not be stored under the current version
+            if status != 200 or payload.get("stale"):
+                return payload, status, {"Cache-Control": "no-store"}
+            return payload, status, headers
+
+        return wrapped
+
+    def logged(path, name, handler):
+        """Route view for ``handler`` that records a sample of requests in the query log."""
+
+        def view():
+            if query_log is None or not query_log.sampled():
+                return handler(request.args)
+            start = time.perf_counter()
+            result = handler(request.args)
+            payload, status = (result[0], result[1]) if isinstance(result, tuple) else (result, 200)
+            if status == 304:
+                cache = "not_modified"
+            else:
+                cache = "stale" if payload.get("stale") else "live"
+            query_log.record({
+                "ts": time.time(),
+                "endpoint": name,
+                "path": path,
+                "params": request.args.to_dict(flat=False),
+                "status": status,
+                "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+                "results": _result_count(payload) if isinstance(payload, dict) else None,
+                "cache": cache,
+            })
+            return result
+
+        return view
+
+    # Query type -> handler, shared by the HTTP routes and /api/batch
+    handlers = {
+        "search": resilient("search", search),
+        "suggest": suggest,
+        "facets": resilient("facets", facets_endpoint),
+        "browse": resilient("browse", browse),
+        "mlt": resilient("mlt", more_like_this),
+        "grouped": resilient("grouped", locations_grouped),
+        "nearby": resilient("nearby", locations_nearby),
+        "within": resilient("within", locations_within),
+        "along": resilient("along", locations_along),
+    }
+    for rule, name in (
+        ("/api/search", "search"),
+        ("/api/suggest", "suggest"),
+        ("/api/facets", "facets"),
+        ("/api/browse", "browse"),
+        ("/api/more-like-this", "mlt"),
+        ("/api/locations/grouped", "grouped"),
+        ("/api/locations/nearby", "nearby"),
+        ("/api/locations/within", "within"),
+        ("/api/locations/along", "along"),
+    ):
+        app.add_url_rule(rule, name, logged(rule, name, cached(name, handlers[name])))
+
+    def warm_up():
+        """Replay the most frequent logged queries so Solr and the stale store start warm."""
+        queries = top_queries(n=QUERY_LOG_WARMUP)
+        for name, params in queries:
+            handler = handlers.get(name)
+            if handler is None:
+                continue
+            try:
+                handler(MultiDict([(k, v) for k, values in params.items() for v in values]))
+            except Exception as e:
+                print(f"Warm-up {name} query failed: {e}")
+        if queries:
+            print(f"Warmed up with {len(queries)} logged queries")
+
+    def start_background(worker: Optional[int] = None):
+        """Open the query log and start the warm-up; once per process, after any fork."""
+        nonlocal query_log
+        if QUERY_LOG_SAMPLE > 0:
+            try:
+                query_log = QueryLog(sample_rate=QUERY_LOG_SAMPLE, name=log_file_name(worker))
+            except OSError as e:
+                # e.g. a read-only checkout; the API works the same without it
+                print(f"Warning: query log disabled, cannot write to {QUERY_LOG_DIR}: {e}")
+        # Solr's caches are shared, so one worker warming them is enough
+        if query_log and QUERY_LOG_WARMUP > 0 and not worker:
+            threading.Thread(target=warm_up, daemon=True).start()
+
+    batch_pool = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix="batch")
+
+    def run_subquery(sub) -> dict:
+        if not isinstance(sub, dict):
+            return {"status": 400, "error": "Each query must be an object"}
+        kind = sub.get("type")
+        entry = {"id": sub.get("id"), "type": kind}
+        handler = handlers.get(kind) if isinstance(kind, str) else None
+        if handler is None:
+            entry.update(status=400, error=f"Unknown query type '{kind}'")
+            return entry
+
+        raw_params = sub.get("params") or {}
+        if not isinstance(raw_params, dict):
+            entry.update(status=400, error="'params' must be an object")
+            return entry
+        params = MultiDict()
+        for key, value in raw_params.items():
+            for v in value if isinstance(value, list) else [value]:
+                params.add(key, str(v))
+        # Each sub-query counts against the concurrency cap like a request of its own
+        holds_slot = kind != "suggest"
+        if holds_slot and not query_slots.acquire():
+            entry.update(status=429, error="Server busy, try again shortly")
+            return entry
+        try:
+            result = handler(params)
         except Exception as e:
-            print(f"Nearby locations search failed: {e}")
-            import traceback
-            traceback.print_exc()
-            return {"error": str(e), "results": []}
+            print(f"Batch {kind} query failed: {e}")
+            entry.update(status=500, error=str(e))
+            return entry
+        finally:
+            if holds_slot:
+                query_slots.release()
+
+        status = 200
+        if isinstance(result, tuple):
+            result, status = result
+        entry.update(status=status, result=result)
+        if status >= 400:
+            entry["error"] = result.get("error")
+        return entry
+
+    export_slots = ConcurrencyLimiter(EXPORT_MAX_CONCURRENT)
+
+    @app.route("/api/export")
+    def export():
+        """Stream every matching document as NDJSON (default) or CSV.
+
+        Takes ``q`` and the filters of /api/search plus ``format=ndjson|csv``,
+        ``fields=id,title,...`` and ``limit``. Documents are read from Solr
+        with a cursor and written as they arrive, gzip-compressed when the
+        client accepts it.
+        """
+        args = request.args
+        fmt = args.get("format", "ndjson")
+        if fmt not in FORMATS:
+            return {"error": f"Unknown format '{fmt}', expected one of {', '.join(FORMATS)}"}, 400
+        fields = [f.strip() for f in args.get("fields", "").split(",") if f.strip()] or list(EXPORT_FIELDS)
+        unknown = [f for f in fields if f not in EXPORT_FIELDS]
+        if unknown:
+            return {"error": f"Unknown fields: {', '.join(unknown)}"}, 400
+        limit = None
+        if args.get("limit"):
+            limit = _int_arg(args, "limit")
+            if limit is None or limit < 1:
+                return {"error": "'limit' must be a positive integer"}, 400
+        if not export_slots.acquire():
+            return {"error": "Too many exports in progress"}, 429, {"Retry-After": retry_after_header(5)}
+
+        try:
+            docs = indexer.export(query=args.get("q") or None, filters=_filters_from_args(args), fields=fields)
+            if limit:
+                docs = itertools.islice(docs, limit)
+            body = (ndjson_lines if fmt == "ndjson" else csv_lines)(docs, fields)
+
+            content_type, extension = FORMATS[fmt]
+            headers = {
+                "Content-Disposition": f'attachment; filename="export.{extension}"',
+                "Cache-Control": "no-store",
+                "Vary": "Accept-Encoding",
+            }
+            if request.accept_encodings["gzip"]:
+                body = gzip_stream(body)
+                headers["Content-Encoding"] = "gzip"
+
+            def stream():
+                try:
+                    yield from body
+                except Exception as e:
+                    # Headers are gone already; all we can do is cut the stream short
+                    print(f"Export failed mid-stream: {e}")
+
+            response = Response(stream(), content_type=content_type, headers=headers)
+            # Runs when the server closes the response, also if the client went away
+            response.call_on_close(export_slots.release)
+        except Exception:
+            # No response will be closed, so nothing else gives the slot back
+            export_slots.release()
+            raise
+        return response
+
+    @app.route("/api/batch", methods=["POST"])
+    def batch():
+        """Run several queries in one round trip, concurrently.
+
+        Body: ``{"queries": [{"id": "a", "type": "search", "params": {"q": "..."}}, ...]}``
+        where ``type`` is one of search, suggest, facets, browse, mlt, grouped,
+        nearby, within or along and ``params`` are that endpoint's query-string parameters.
+        Results come back in request order, each with its own ``status``; a
+        sub-query that finds the server at its concurrency cap gets a 429.
+        """
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict):
+            return {"error": "Expected a JSON object"}, 400
+        queries = body.get("queries")
+        if not isinstance(queries, list) or not queries:
+            return {"error": "Expected a non-empty 'queries' list"}, 400
+        if len(queries) > BATCH_MAX_QUERIES:
+            return {"error": f"At most {BATCH_MAX_QUERIES} queries per batch"}, 400
+
+        # A batch costs what its queries would cost one by one (never more
+        # than a full bucket, or it could not be admitted at all)
+        kinds = [sub.get("type") for sub in queries if isinstance(sub, dict)]
+        cost = sum(ENDPOINT_COSTS.get(kind, 0.0) for kind in kinds if isinstance(kind, str) and kind in handlers)
+        wait = rate_limiter.take(_client_id(), min(cost, rate_limiter.burst))
+        if wait:
+            return {"error": "Rate limit exceeded"}, 429, {"Retry-After": retry_after_header(wait)}
+
+        return {"results": list(batch_pool.map(run_subquery, queries))}
+
+    if prefork:
+        # Built once in the parent and shared copy-on-write by the workers.
+        # The facet table needs Solr, each worker fetches it on first use.
+        for resource in (suggester, neighbor_table, vector_index, spelling):
+            resource.get()
+        app.extensions["start_worker"] = start_background
+    else:
+        # Build it up front so the first keystroke does not pay for it
+        threading.Thread(target=suggester.get, daemon=True).start()
+        start_background()
 
     return app
 
@@ -0,0 +1,130 @@
+"""Index version tracking and derived in-memory data that follows it.
+
+``index_data.py`` bumps the index version after every reindex. API processes
+hold derived structures (suggestions, facet tables, ...) in a
+``VersionedResource`` which rebuilds them lazily once the version changes.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Callable, Generic, Optional, TypeVar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARTIFACTS_DIR = os.getenv("ARTIFACTS_DIR", os.path.join(ROOT, "artifacts"))
+INDEX_VERSION_FILE = "index_version"
+
+T = TypeVar("T")
+
+
+def artifact_path(name: str) -> str:
+    return os.path.join(ARTIFACTS_DIR, name)
+
+
+def read_index_version() -> str:
+    """Return the current index version, or ``"0"`` if nothing was indexed yet."""
+    try:
+        with open(artifact_path(INDEX_VERSION_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip() or "0"
+    except OSError:
+        return "0"
+
+
+def bump_index_version() -> str:
+    """Record that the index changed. Returns the new version string."""
+    os.makedirs(ARTIFACTS_DIR, exist_ok=True)
+    version = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+    tmp_path = artifact_path(INDEX_VERSION_FILE + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+    # Atomic so readers never see a half-written version
+    os.replace(tmp_path, artifact_path(INDEX_VERSION_FILE))
+    return version
+
+
+def save_array(path: str, array) -> None:
+    """``np.save`` to ``path`` through a temporary file and ``os.replace``.
+
+    A process that memory-mapped the previous file keeps its inode, so a
+    rebuild never truncates an array someone is still reading.
+    """
+    import numpy as np
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
+
+
+def save_json(path: str, value) -> None:
+    """Write ``value`` as JSON to ``path``, atomically like ``save_array``."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(value, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+class VersionedResource(Generic[T]):
+    """Holds a value built by ``loader`` and rebuilds it when the index version changes.
+
+    The version file is checked at most once per ``check_interval`` seconds,
+    so ``get()`` is a couple of attribute reads on the hot path. With
+    ``background`` a rebuild after a reindex runs on its own thread and
+    ``get()`` keeps returning the previous value until the new one is ready;
+    only the very first build blocks.
+    """
+
+    def __init__(self, loader: Callable[[], T], check_interval: float = 1.0, background: bool = False):
+        self._loader = loader
+        self._check_interval = check_interval
+        self._background = background
+        self._lock = threading.Lock()
+        self._value: Optional[T] = None
+        self._version: Optional[str] = None
+        self._next_check = 0.0
+        self._reloading = False
+
+    @property
+    def version(self) -> Optional[str]:
+        return self._version
+
+    def get(self) -> T:
+        now = time.monotonic()
+        if self._version is not None and now < self._next_check:
+            return self._value  # type: ignore[return-value]
+
+        with self._lock:
+            if self._version is not None and now < self._next_check:
+                return self._value  # type: ignore[return-value]
+            version = read_index_version()
+            if version != self._version:
+                if self._background and self._version is not None:
+                    if not self._reloading:
+                        self._reloading = True
+                        threading.Thread(target=self._reload, args=(version,), daemon=True).start()
+                else:
+                    self._value = self._loader()
+                    self._version = version
+            self._next_check = now + self._check_interval
+            return self._value  # type: ignore[return-value]
+
+    def _reload(self, version: str):
+        try:
+            value = self._loader()
+        except Exception as e:
+            # Keep serving the old value; the next check tries again
+            print(f"Background reload failed: {e}")
+            with self._lock:
+                self._reloading = False
+            return
+        with self._lock:
+            self._value = value
+            self._version = version
+            self._reloading = False
+
+    def invalidate(self):
+        """Force a rebuild on the next ``get()``."""
+        with self._lock:
+            self._version = None
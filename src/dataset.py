@@ -0,0 +1,63 @@
+"""Helpers for locating and reading the crawled movie data files.
+
+Both ``index_data.py`` and the API read the same files in ``data/``; keeping
+the discovery and parsing logic here makes sure they agree on what the
+dataset is.
+"""
+
+import json
+import os
+from typing import List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, "data")
+
+
+def find_data_files(data_dir: str = DATA_DIR) -> List[str]:
+    """Return the ``.json`` data files in ``data_dir`` (sorted for stable order)."""
+    if not os.path.isdir(data_dir):
+        return []
+    return sorted(
+        os.path.join(data_dir, f) for f in os.listdir(data_dir) if f.endswith(".json")
+    )
+
+
+def load_records(path: str) -> List[dict]:
+    """Read crawled movie records from a JSON array or NDJSON file.
+
+    Decoding errors are reported and whatever was parsed before the error is
+    returned, so one bad line does not throw away the whole file.
+    """
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        first_char = f.read(1)
+        f.seek(0)
+        if first_char == "[":
+            try:
+                records = json.load(f)
+            except json.JSONDecodeError as e:
+                print(f"Error decoding JSON array in {path}: {e}")
+        else:
+            # Assume NDJSON
+            try:
+                for line in f:
+                    if line.strip():
+                        records.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                print(f"Error decoding NDJSON in {path}: {e}")
+    return records
+
+
+def location_description(loc: dict) -> str:
+    """A location's description; movie-locations.com records keep one paragraph per mention."""
+    description = loc.get("description")
+    if description:
+        return str(description)
+    return "\n".join(str(d) for d in loc.get("descriptions") or [] if d)
+
+
+def iter_all_records(data_dir: str = DATA_DIR):
+    """Yield every movie record from every data file in ``data_dir``."""
+    for path in find_data_files(data_dir):
+        for record in load_records(path):
+            yield record
@@ -0,0 +1,178 @@
+"""Crawled movie records -> Solr documents, one per location.
+
+The transform is pure string and float work, so ``transform_files`` spreads
+it over a process pool in chunks of records. Each chunk knows the position
+of its first document within its file, which keeps the fallback ids of
+records without a URL (``movie_<n>``/``loc_<n>``) identical to a
+sequential run. Results come back in input order.
+
+With a snapshot, workers memory-map it themselves and only receive row
+numbers, so no record is ever pickled.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.dataset import load_records, location_description
+from src.enrichment import enrich
+from src.snapshot import Snapshot
+
+# Records per task handed to a worker process
+CHUNK_RECORDS = 256
+
+
+def transform_records(records, first_doc_index: int = 0) -> List[dict]:
+    """Solr documents for ``records``; ``first_doc_index`` is the file position of the first one."""
+    # Prepare documents for Solr - one document per LOCATION (not per movie)
+    # This enables grouping by location and spatial queries
+    solr_docs = []
+    for doc in records:
+        doc_index = first_doc_index + len(solr_docs)
+        movie_title = doc.get("title", "")
+        movie_url = doc.get("url", "")
+        movie_image = doc.get("image", "")
+        movie_content = doc.get("text_content", "")
+        locations = doc.get("locations", [])
+
+        if not locations:
+            # Movie with no locations - create a single document
+            solr_docs.append({
+                "id": movie_url or f"movie_{doc_index}",
+                "movie_title": movie_title,
+                "title": movie_title,  # Keep for backwards compatibility
+                "content": movie_content,
+                "url": movie_url,
+                "movie_image": movie_image,
+                "image": movie_image,
+            })
+            continue
+
+        # Create one document per location
+        for idx, loc in enumerate(locations):
+            loc_name = loc.get("name") or "Unknown Location"
+            lat = loc.get("latitude") or 0
+            lon = loc.get("longitude") or 0
+            loc_address = loc.get("address") or ""
+            loc_description = location_description(loc)
+            loc_image = loc.get("image") or ""
+
+            # Build unique ID for this location
+            loc_id = f"{movie_url}__loc_{idx}" if movie_url else f"loc_{doc_index + idx}"
+
+            solr_doc = {
+                "id": loc_id,
+                "location_name": loc_name,
+                "location_address": loc_address,
+                "location_description": loc_description,
+                "location_image": loc_image,
+                "movie_title": movie_title,
+                "title": f"{loc_name} - {movie_title}",  # Combined for search
+                "content": f"{loc_name} {loc_address} {loc_description}",
+                "url": movie_url,
+                "movie_image": movie_image,
+                "image": loc_image or movie_image,
+            }
+
+            # Add spatial field if valid coordinates exist
+            if lat is not None and lon is not None:
+                try:
+                    lat_f = float(lat)
+                    lon_f = float(lon)
+                    # Only add if coordinates are valid (not 0,0 which is often missing data)
+                    if not (lat_f == 0 and lon_f == 0):
+                        solr_doc["location_pt"] = f"{lat_f},{lon_f}"
+                        solr_doc["latitude"] = lat_f
+                        solr_doc["longitude"] = lon_f
+                except (ValueError, TypeError):
+                    pass  # Skip invalid coordinates
+
+            solr_docs.append(solr_doc)
+
+    # Enrichment stage: derive typed fields for sorting/faceting/filtering
+    for solr_doc in solr_docs:
+        enrich(solr_doc)
+    return solr_docs
+
+
+# Per worker process: snapshot directory -> memory-mapped Snapshot
+_snapshots: Dict[str, Snapshot] = {}
+
+
+def _transform_snapshot_rows(task) -> List[dict]:
+    directory, rows, first_doc_index = task
+    snapshot = _snapshots.get(directory)
+    if snapshot is None:
+        snapshot = _snapshots[directory] = Snapshot.load(directory)
+    return transform_records(snapshot.records(movies=rows), first_doc_index)
+
+
+def _transform_record_chunk(task) -> List[dict]:
+    records, first_doc_index = task
+    return transform_records(records, first_doc_index)
+
+
+def _file_tasks(file_index: int, path: str, snapshot: Optional[Snapshot]) -> list:
+    """``(file_index, worker function, task)`` per chunk of one file, in record order."""
+    tasks = []
+    if snapshot is not None:
+        rows = snapshot.movies_in_file(file_index)
+        offsets = snapshot.column("movie_loc_offsets")
+        # A movie without locations still becomes one document
+        docs_per_movie = np.maximum(offsets[rows + 1] - offsets[rows], 1)
+        first = np.concatenate([[0], np.cumsum(docs_per_movie)])
+        for start in range(0, len(rows), CHUNK_RECORDS):
+            chunk = rows[start : start + CHUNK_RECORDS].tolist()
+            tasks.append((file_index, _transform_snapshot_rows, (snapshot.directory, chunk, int(first[start]))))
+    else:
+        records = load_records(path)
+        first = 0
+        for start in range(0, len(records), CHUNK_RECORDS):
+            chunk = records[start : start + CHUNK_RECORDS]
+            tasks.append((file_index, _transform_record_chunk, (chunk, first)))
+            first += sum(max(1, len(r.get("locations") or [])) for r in chunk)
+    return tasks
+
+
+def transform_files(
+    files: List[str], snapshot: Optional[Snapshot] = None, workers: Optional[int] = None
+) -> List[Tuple[str, List[dict]]]:
+    """``(path, solr_docs)`` for every file, transformed on ``workers`` processes.
+
+    ``snapshot`` must have been built from exactly ``files``; without it the
+    files are parsed here and their records shipped to the workers. A file
+    with a record that fails to transform is reported and comes back with
+    no documents, the other files are unaffected.
+    """
+    tasks = []
+    failed = set()
+    for file_index, path in enumerate(files):
+        try:
+            tasks.extend(_file_tasks(file_index, path, snapshot))
+        except Exception as e:
+            print(f"Failed to process file {path}: {e}")
+            failed.add(file_index)
+
+    docs_per_file: List[List[dict]] = [[] for _ in files]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        # Not worth starting processes for
+        outcomes = (partial(fn, task) for _, fn, task in tasks)
+    else:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+        futures = [pool.submit(fn, task) for _, fn, task in tasks]
+        pool.shutdown(wait=False)
+        outcomes = (future.result for future in futures)
+    for (file_index, _, _), outcome in zip(tasks, outcomes):
+        if file_index in failed:
+            continue
+        try:
+            docs_per_file[file_index].extend(outcome())
+        except Exception as e:
+            print(f"Failed to process file {files[file_index]}: {e}")
+            failed.add(file_index)
+            docs_per_file[file_index] = []
+    return [(path, docs) for path, docs in zip(files, docs_per_file)]
@@ -0,0 +1,220 @@
+"""Index-time enrichment of location documents with typed fields.
+
+Crawled data keeps the year inside the title ("(500) Days of Summer | 2009"),
+has no notion of where it came from and only free-text addresses. The helpers
+here derive plain values for the docValues fields declared in
+``src.schema`` so Solr can sort, group, facet and filter on them cheaply.
+"""
+
+import re
+from typing import Optional, Tuple
+from urllib.parse import urlparse
+
+from src.text import normalize, slugify
+
+_TITLE_PIPE_YEAR = re.compile(r"^(?P<name>.*?)\s*\|\s*(?P<year>\d{4})\s*$")
+_TITLE_PAREN_YEAR = re.compile(r"^(?P<name>.*?)\s*\((?P<year>\d{4})\)\s*$")
+# Postcodes and house numbers, e.g. "WC2H 7DE", "90013", "V6B 1A1"
+_POSTCODE = re.compile(r"^(?=.*\d)[A-Z0-9][A-Z0-9 -]{1,9}$", re.IGNORECASE)
+# Address parts that are administrative areas rather than towns
+_ADMIN_AREA = re.compile(
+    r"\b(county|district|region|province|prefecture|municipality|borough of|state of|oblast|department"
+    r"|parish|council|township|rural|capitale|arrondissement|metropolitan|comunidad|federal|kommune|kraj|okres"
+    r"|obvod|hlavní město|округ)\b"
+    r"|shire$",
+    re.IGNORECASE,
+)
+# Named regions geocoders put between the town and the state
+_REGIONS = frozenset(
+    normalize(name)
+    for name in (
+        "Île-de-France",
+        "Golden Horseshoe",
+        "North East",
+        "North West",
+        "South East",
+        "South West",
+        "East Midlands",
+        "West Midlands",
+        "East of England",
+        "Yorkshire and the Humber",
+        "West of England",
+    )
+)
+# Levels between the country and the state, dropped together with the country
+_SUBCOUNTRY = frozenset({"france metropolitaine"})
+# Multilingual country names, e.g. "Éire / Ireland", "Κύπρος - Kıbrıs"
+_NAME_SEPARATORS = re.compile(r"\s*/\s*|\s+-\s+")
+
+# English country name -> other spellings, including the local names
+# geocoders return ("Deutschland", "Россия")
+COUNTRIES = {
+    "United States": ("USA", "US", "U.S.A.", "United States of America"),
+    "United Kingdom": ("UK", "U.K.", "Great Britain"),
+    "Argentina": (),
+    "Australia": (),
+    "Austria": ("Österreich",),
+    "Bangladesh": ("বাংলাদেশ",),
+    "Barbados": (),
+    "Belgium": ("België", "Belgique", "Belgien"),
+    "Brazil": ("Brasil",),
+    "Burkina Faso": (),
+    "Cameroon": ("Cameroun",),
+    "Canada": (),
+    "Chile": (),
+    "China": ("中国",),
+    "Colombia": (),
+    "Croatia": ("Hrvatska",),
+    "Cuba": (),
+    "Cyprus": ("Κύπρος", "Kıbrıs"),
+    "Czechia": ("Česko", "Czech Republic"),
+    "Democratic Republic of the Congo": ("République démocratique du Congo",),
+    "Denmark": ("Danmark",),
+    "Egypt": ("مصر",),
+    "Estonia": ("Eesti",),
+    "Finland": ("Suomi",),
+    "France": (),
+    "Germany": ("Deutschland",),
+    "Ghana": (),
+    "Greece": ("Ελλάς", "Ελλάδα"),
+    "Guinea": ("Guinée",),
+    "Guyana": (),
+    "Haiti": ("Ayiti", "Haïti"),
+    "Hungary": ("Magyarország",),
+    "Iceland": ("Ísland",),
+    "India": (),
+    "Indonesia": (),
+    "Ireland": ("Éire",),
+    "Israel": ("ישראל",),
+    "Italy": ("Italia",),
+    "Jamaica": (),
+    "Japan": ("日本",),
+    "Liberia": (),
+    "Luxembourg": ("Lëtzebuerg",),
+    "Malaysia": (),
+    "Maldives": ("ދިވެހިރާއްޖެ",),
+    "Malta": (),
+    "Mexico": ("México",),
+    "Morocco": ("Maroc", "Maroc ⵍⵎⵖⵔⵉⴱ المغرب", "المغرب"),
+    "Netherlands": ("Nederland",),
+    "New Zealand": ("Aotearoa",),
+    "Norway": ("Norge",),
+    "Palestinian Territories": ("الأراضي الفلسطينية",),
+    "Papua New Guinea": ("Papua Niugini",),
+    "Peru": ("Perú",),
+    "Philippines": (),
+    "Poland": ("Polska",),
+    "Portugal": (),
+    "Romania": ("România",),
+    "Russia": ("Россия",),
+    "Samoa": ("Sāmoa",),
+    "Sierra Leone": (),
+    "Singapore": (),
+    "Slovakia": ("Slovensko",),
+    "South Africa": (),
+    "South Korea": ("대한민국",),
+    "Spain": ("España",),
+    "Sweden": ("Sverige",),
+    "Switzerland": ("Schweiz", "Suisse", "Svizzera", "Svizra"),
+    "Tanzania": (),
+    "Thailand": ("ประเทศไทย",),
+    "Timor-Leste": (),
+    "Turkey": ("Türkiye",),
+    "Uganda": (),
+    "Ukraine": ("Україна",),
+    "United Arab Emirates": ("الإمارات العربية المتحدة",),
+    "Uruguay": (),
+    "Vanuatu": (),
+    "Vatican City": ("Civitas Vaticana", "Città del Vaticano"),
+}
+_COUNTRY_NAMES = {
+    normalize(alias): name for name, aliases in COUNTRIES.items() for alias in (name,) + aliases
+}
+
+
+def parse_title(title: str) -> Tuple[str, Optional[int]]:
+    """Split ``"Name | 2009"`` or ``"Name (2009)"`` into ``("Name", 2009)``."""
+    title = (title or "").strip()
+    for pattern in (_TITLE_PIPE_YEAR, _TITLE_PAREN_YEAR):
+        m = pattern.match(title)
+        if m:
+            return m.group("name").strip(), int(m.group("year"))
+    return title, None
+
+
+def source_from_url(url: str) -> Optional[str]:
+    """Return the crawled site for a document URL, e.g. ``"cinemapper.com"``."""
+    host = urlparse(url or "").hostname
+    if not host:
+        return None
+    return host[4:] if host.startswith("www.") else host
+
+
+def country_name(part: str) -> Optional[str]:
+    """English name of the country ``part`` names, in any of the spellings in ``COUNTRIES``."""
+    for name in [part] + _NAME_SEPARATORS.split(part):
+        country = _COUNTRY_NAMES.get(normalize(name))
+        if country:
+            return country
+    return None
+
+
+def parse_address(address: str) -> Tuple[Optional[str], Optional[str]]:
+    """Best-effort ``(city, country)`` from a comma separated address.
+
+    Geocoded addresses look like "Place, Street, Town, County, State,
+    Postcode, Country": the country is the last part, the state the one
+    before it, and the town the nearest remaining part that is not an
+    administrative area. Addresses that do not end in a known country
+    ("432 South Main Street", "Pasadena") yield nothing.
+    """
+    parts = [p.strip() for p in (address or "").split(",")]
+    parts = [p for p in parts if p and not _POSTCODE.match(p)]
+    if len(parts) < 2:
+        return None, None
+    country = country_name(parts[-1])
+    if not country:
+        return None, None
+
+    parts = parts[:-1]
+    # "Noord-Holland, Nederland, 1171 PE, Nederland" names the country twice
+    while parts and (normalize(parts[-1]) in _SUBCOUNTRY or country_name(parts[-1]) == country):
+        parts.pop()
+    # With two or more parts left the last one is a state/region
+    candidates = parts[:-1] if len(parts) >= 2 else parts
+    city = None
+    for part in reversed(candidates):
+        # Street addresses ("432 South Main Street") are never the town
+        if _ADMIN_AREA.search(part) or normalize(part) in _REGIONS or part[0].isdigit():
+            continue
+        city = part[len("Greater "):] if part.startswith("Greater ") else part
+        break
+    return city, country
+
+
+def movie_id(name: str, year: Optional[int]) -> str:
+    """Canonical id shared by every location of a movie across all sources."""
+    slug = slugify(name) or "untitled"
+    return f"{slug}-{year}" if year else slug
+
+
+def enrich(doc: dict) -> dict:
+    """Add typed fields (year, source, city, country, movie_id, location_key) in place."""
+    name, year = parse_title(doc.get("movie_title", ""))
+    doc["movie_id"] = movie_id(name, year)
+    if year:
+        doc["year"] = year
+
+    source = source_from_url(doc.get("url", ""))
+    if source:
+        doc["source"] = source
+
+    city, country = parse_address(doc.get("location_address", ""))
+    if city:
+        doc["city"] = city
+    if country:
+        doc["country"] = country
+
+    if doc.get("location_name"):
+        doc["location_key"] = slugify(doc["location_name"])
+    return doc
@@ -0,0 +1,89 @@
+"""Serialization for ``/api/export``: documents in, NDJSON or CSV chunks out.
+
+Everything here works on iterators, so an export of the whole index holds
+one Solr page plus one encoded chunk in memory at a time.
+"""
+
+import csv
+import io
+import zlib
+from typing import Iterable, Iterator, List
+
+from src.fastjson import dumps
+
+# Stored fields a partner can ask for; the default export has all of them
+EXPORT_FIELDS = (
+    "id",
+    "title",
+    "movie_title",
+    "movie_id",
+    "year",
+    "location_name",
+    "location_address",
+    "location_description",
+    "location_key",
+    "city",
+    "country",
+    "latitude",
+    "longitude",
+    "url",
+    "source",
+    "image",
+    "movie_image",
+    "location_image",
+    "topic_label",
+)
+FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+}
+
+# Documents per encoded chunk handed to the WSGI server
+CHUNK_DOCS = 200
+
+
+def _scalar(value):
+    # Schemaless fields come back as single-element lists
+    if isinstance(value, list):
+        return value[0] if len(value) == 1 else "; ".join(str(v) for v in value)
+    return value
+
+
+def _chunks(docs: Iterable[dict]) -> Iterator[List[dict]]:
+    chunk = []
+    for doc in docs:
+        chunk.append(doc)
+        if len(chunk) >= CHUNK_DOCS:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ndjson_lines(docs: Iterable[dict], fields: List[str]) -> Iterator[bytes]:
+    for chunk in _chunks(docs):
+        yield b"".join(dumps({f: _scalar(doc[f]) for f in fields if f in doc}) + b"\n" for doc in chunk)
+
+
+def csv_lines(docs: Iterable[dict], fields: List[str]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for chunk in _chunks(docs):
+        for doc in chunk:
+            writer.writerow(["" if doc.get(f) is None else _scalar(doc[f]) for f in fields])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Gzip a byte stream incrementally (one gzip member, flushed per chunk)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
@@ -0,0 +1,51 @@
+"""Solr JSON facet definitions for drill-down navigation.
+
+Facets run over typed, docValues-backed fields (see ``index_data.py``), so
+Solr counts them straight from column storage without un-inverting text.
+"""
+
+import json
+from typing import Dict, Iterable, List, Optional
+
+FACETS: Dict[str, dict] = {
+    "country": {"type": "terms", "field": "country", "limit": 50, "mincount": 1},
+    "city": {"type": "terms", "field": "city", "limit": 50, "mincount": 1},
+    "source": {"type": "terms", "field": "source", "limit": 20, "mincount": 1},
+    # Precomputed topic clusters, see src.topics
+    "topic": {"type": "terms", "field": "topic_label", "limit": 12, "mincount": 1},
+    "decade": {
+        "type": "range",
+        "field": "year",
+        "start": 1880,
+        "end": 2040,
+        "gap": 10,
+        "mincount": 1,
+    },
+}
+
+
+def facet_names(value: Optional[str]) -> List[str]:
+    """Parse a ``facets=`` parameter (comma separated, ``all`` for every facet)."""
+    if not value:
+        return []
+    names = [n.strip() for n in value.split(",")]
+    if "all" in names:
+        return list(FACETS)
+    return [n for n in names if n in FACETS]
+
+
+def json_facet_param(names: Iterable[str]) -> str:
+    """Return the ``json.facet`` request parameter for the given facets."""
+    return json.dumps({name: FACETS[name] for name in names}, sort_keys=True)
+
+
+def parse_facets(raw: dict, names: Iterable[str]) -> Dict[str, List[dict]]:
+    """Flatten a Solr ``facets`` response into ``{name: [{value, count}, ...]}``."""
+    parsed = {}
+    for name in names:
+        buckets = (raw or {}).get(name, {}).get("buckets", [])
+        if name == "decade":
+            parsed[name] = [{"value": f"{int(b['val'])}s", "count": b["count"]} for b in buckets]
+        else:
+            parsed[name] = [{"value": b["val"], "count": b["count"]} for b in buckets]
+    return parsed
@@ -0,0 +1,52 @@
+"""JSON on the hot paths: API responses, Solr responses and exports.
+
+orjson is used when it is installed (it is in requirements.txt) and the
+standard library otherwise, so everything keeps working without it.
+orjson encodes straight to UTF-8 bytes, which is what gets written to the
+socket anyway, and parses Solr's responses several times faster than
+``json.JSONDecoder``.
+
+The Flask side, a pluggable ``app.json`` provider, is in
+``src.jsonprovider``.
+"""
+
+import json
+from typing import Any, Callable, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Dict keys that are not strings (e.g. facet values) and NumPy scalars/arrays
+# are encoded instead of rejected
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY) if orjson else 0
+
+
+def _stdlib_default(value):
+    # NumPy scalars from the in-memory indexes
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """``obj`` as compact UTF-8 JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        obj, ensure_ascii=False, separators=(",", ":"), default=default or _stdlib_default
+    ).encode("utf-8")
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class SolrDecoder:
+    """``decoder`` for ``pysolr.Solr``, which only ever calls ``decode``."""
+
+    def decode(self, text: str) -> Any:
+        return loads(text)
@@ -0,0 +1,224 @@
+"""Polygon and route-corridor matching for location queries.
+
+Solr narrows the candidates down with bounding boxes on ``location_pt``
+(see ``Indexer.locations_in_boxes``); the exact test runs here, vectorized
+over all candidates at once:
+
+- polygons: even-odd ray casting over every ring, so holes work
+- routes: distance from each point to each segment of the polyline in a
+  local equirectangular projection (per segment, so long routes keep
+  their accuracy), which also gives the position along the route
+
+A long route gets one box per stretch of segments instead of a single box
+around the whole trip, so the prefilter stays close to the corridor.
+Geometries crossing the antimeridian are not supported.
+"""
+
+import json
+import math
+from typing import List, Tuple, Union
+
+import numpy as np
+
+KM_PER_DEGREE = 111.195  # Mean Earth radius (6371 km) * pi / 180
+
+# Boxes per route prefilter; stretches of segments share a box beyond that
+MAX_ROUTE_BOXES = 32
+
+# Cells per (points, edges) block, keeps the temporaries at a few MB
+_BLOCK_CELLS = 1 << 18
+
+# (min_lat, min_lon, max_lat, max_lon)
+Box = Tuple[float, float, float, float]
+
+
+def _geometry(value: Union[str, dict]) -> dict:
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            raise ValueError("Geometry is not valid JSON")
+    if not isinstance(value, dict):
+        raise ValueError("Geometry must be a GeoJSON object")
+    if value.get("type") == "Feature":
+        value = value.get("geometry") or {}
+    return value
+
+
+def _ring(coordinates) -> np.ndarray:
+    """GeoJSON ``[[lon, lat], ...]`` -> float array of ``(lat, lon)`` rows."""
+    try:
+        ring = np.asarray(coordinates, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError("Coordinates must be [lon, lat] pairs")
+    if ring.ndim != 2 or ring.shape[1] < 2 or len(ring) < 3:
+        raise ValueError("A polygon ring needs at least three [lon, lat] positions")
+    ring = ring[:, [1, 0]]
+    if not np.isfinite(ring).all() or (np.abs(ring[:, 0]) > 90).any() or (np.abs(ring[:, 1]) > 180).any():
+        raise ValueError("Coordinates out of range")
+    return ring
+
+
+def parse_polygon(value: Union[str, dict]) -> List[List[np.ndarray]]:
+    """A GeoJSON Polygon or MultiPolygon (or a Feature of one) as polygons of ``(lat, lon)`` rings."""
+    geometry = _geometry(value)
+    kind = geometry.get("type")
+    coordinates = geometry.get("coordinates")
+    if kind == "Polygon":
+        polygons = [coordinates]
+    elif kind == "MultiPolygon":
+        polygons = coordinates
+    else:
+        raise ValueError("Expected a GeoJSON Polygon or MultiPolygon")
+    if not isinstance(polygons, list) or not polygons:
+        raise ValueError("Polygon has no coordinates")
+    parsed = []
+    for rings in polygons:
+        if not isinstance(rings, list) or not rings:
+            raise ValueError("Polygon has no rings")
+        parsed.append([_ring(ring) for ring in rings])
+    return parsed
+
+
+def parse_route(value: str) -> np.ndarray:
+    """``lat,lon;lat,lon;...`` or a GeoJSON LineString (or a Feature of one) as ``(lat, lon)`` rows."""
+    value = value.strip()
+    if value.startswith("{"):
+        geometry = _geometry(value)
+        if geometry.get("type") != "LineString":
+            raise ValueError("Expected a GeoJSON LineString")
+        try:
+            route = np.asarray(geometry.get("coordinates"), dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError("Coordinates must be [lon, lat] pairs")
+        if route.ndim != 2 or route.shape[1] < 2:
+            raise ValueError("Coordinates must be [lon, lat] pairs")
+        route = route[:, [1, 0]]
+    else:
+        try:
+            route = np.array([[float(c) for c in point.split(",")] for point in value.split(";") if point.strip()])
+        except ValueError:
+            raise ValueError("Route points must be 'lat,lon' separated by ';'")
+        if route.ndim != 2 or route.shape[1] != 2:
+            raise ValueError("Route points must be 'lat,lon' separated by ';'")
+    if len(route) < 2:
+        raise ValueError("A route needs at least two points")
+    if not np.isfinite(route).all() or (np.abs(route[:, 0]) > 90).any() or (np.abs(route[:, 1]) > 180).any():
+        raise ValueError("Coordinates out of range")
+    return route
+
+
+def _point(value) -> Tuple[float, float]:
+    # Schemaless cores return single values as one-element lists
+    if isinstance(value, list):
+        value = value[0] if value else None
+    try:
+        lat, lon = str(value).split(",")
+        return float(lat), float(lon)
+    except ValueError:
+        return math.nan, math.nan
+
+
+def doc_coordinates(docs: List[dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """``(lat, lon)`` arrays from the ``location_pt`` of Solr documents, NaN where missing."""
+    points = np.array([_point(doc.get("location_pt")) for doc in docs], dtype=float).reshape(-1, 2)
+    return points[:, 0], points[:, 1]
+
+
+def _box(points: np.ndarray, margin_km: float = 0.0) -> Box:
+    lat_margin = margin_km / KM_PER_DEGREE
+    max_abs_lat = min(np.abs(points[:, 0]).max() + lat_margin, 89.0)
+    lon_margin = margin_km / (KM_PER_DEGREE * math.cos(math.radians(max_abs_lat)))
+    return (
+        max(float(points[:, 0].min()) - lat_margin, -90.0),
+        max(float(points[:, 1].min()) - lon_margin, -180.0),
+        min(float(points[:, 0].max()) + lat_margin, 90.0),
+        min(float(points[:, 1].max()) + lon_margin, 180.0),
+    )
+
+
+def polygon_boxes(polygons: List[List[np.ndarray]]) -> List[Box]:
+    """One bounding box per polygon (its outer ring)."""
+    return [_box(rings[0]) for rings in polygons]
+
+
+def route_boxes(route: np.ndarray, width_km: float) -> List[Box]:
+    """Bounding boxes covering the corridor, at most ``MAX_ROUTE_BOXES``."""
+    segments = len(route) - 1
+    step = max(1, math.ceil(segments / MAX_ROUTE_BOXES))
+    return [_box(route[i : i + step + 1], width_km) for i in range(0, segments, step)]
+
+
+def _blocks(n_points: int, n_edges: int):
+    step = max(1, _BLOCK_CELLS // max(n_edges, 1))
+    for start in range(0, n_points, step):
+        yield slice(start, start + step)
+
+
+def points_in_polygons(lat: np.ndarray, lon: np.ndarray, polygons: List[List[np.ndarray]]) -> np.ndarray:
+    """Boolean mask of the points inside any of ``polygons``."""
+    inside_any = np.zeros(len(lat), dtype=bool)
+    for rings in polygons:
+        inside = np.zeros(len(lat), dtype=bool)
+        for ring in rings:
+            # Edges (a -> b), closing the ring whether or not GeoJSON repeated the first point
+            a_lat, a_lon = ring[:, 0], ring[:, 1]
+            b_lat, b_lon = np.roll(a_lat, -1), np.roll(a_lon, -1)
+            for block in _blocks(len(lat), len(ring)):
+                # (points, edges): does a ray going east from the point cross the edge?
+                p_lat, p_lon = lat[block, None], lon[block, None]
+                straddles = (a_lat > p_lat) != (b_lat > p_lat)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    cross_lon = a_lon + (p_lat - a_lat) * (b_lon - a_lon) / (b_lat - a_lat)
+                crossings = np.count_nonzero(straddles & (p_lon < cross_lon), axis=1)
+                inside[block] ^= crossings % 2 == 1
+        inside_any |= inside
+    return inside_any
+
+
+def route_positions(lat: np.ndarray, lon: np.ndarray, route: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float]:
+    """Distance of each point to ``route`` and its position along it, both in km.
+
+    Returns ``(distance_km, along_km, route_length_km)``. Each point is
+    matched to its closest segment; ``along_km`` is the route distance from
+    the start to the projection of the point on that segment.
+    """
+    a, b = route[:-1], route[1:]
+    # km per degree of longitude, per segment
+    lon_scale = KM_PER_DEGREE * np.cos(np.radians((a[:, 0] + b[:, 0]) / 2))
+    seg_y = (b[:, 0] - a[:, 0]) * KM_PER_DEGREE
+    seg_x = (b[:, 1] - a[:, 1]) * lon_scale
+    seg_len = np.hypot(seg_x, seg_y)
+    starts = np.concatenate([[0.0], np.cumsum(seg_len)[:-1]])
+
+    distance = np.empty(len(lat))
+    along = np.empty(len(lat))
+    for block in _blocks(len(lat), len(seg_len)):
+        # (points, segments)
+        py = (lat[block, None] - a[:, 0]) * KM_PER_DEGREE
+        px = (lon[block, None] - a[:, 1]) * lon_scale
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(seg_len > 0, (px * seg_x + py * seg_y) / seg_len**2, 0.0)
+        t = np.clip(t, 0.0, 1.0)
+        offsets = np.hypot(px - t * seg_x, py - t * seg_y)
+
+        nearest = offsets.argmin(axis=1)
+        rows = np.arange(len(nearest))
+        distance[block] = offsets[rows, nearest]
+        along[block] = starts[nearest] + t[rows, nearest] * seg_len[nearest]
+    return distance, along, float(seg_len.sum())
+
+
+def corridor_matches(
+    lat: np.ndarray, lon: np.ndarray, route: np.ndarray, width_km: float
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """The points within ``width_km`` of ``route``, in route order.
+
+    Returns ``(indices, distance_km, along_km, route_length_km)`` with one
+    entry per matching point; points at the same position along the route
+    come closest first.
+    """
+    distance, along, length = route_positions(lat, lon, route)
+    keep = np.flatnonzero(distance <= width_km)
+    keep = keep[np.lexsort((distance[keep], along[keep]))]
+    return keep, distance[keep], along[keep], length
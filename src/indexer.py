@@ -1,9 +1,72 @@
-import pysolr
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from src.facets import FACETS, json_facet_param, parse_facets
+from src.query import build_search_params
+from src.resilience import CircuitBreaker
+from src.singleflight import SingleFlight
+from src.solrpool import SolrPool
+
+# Joins ids in {!terms} queries; a control character never occurs in a URL
+ID_SEPARATOR = "\x1f"
 
 
 class Indexer:
-    def __init__(self, solr_url="http://localhost:8983/solr/movies"):
-        self.solr = pysolr.Solr(solr_url, always_commit=True)
+    def __init__(
+        self,
+        solr_url="http://localhost:8983/solr/movies",
+        coalesce: bool = True,
+        timeout: float = 60,
+        breaker: Optional[CircuitBreaker] = None,
+        leader_url: Optional[str] = None,
+    ):
+        """``solr_url`` is one core URL or several replicas, comma separated or as a list.
+
+        Reads are balanced over the replicas, writes go to ``leader_url``
+        (default: the first URL). See ``src.solrpool``.
+        """
+        self.pool = SolrPool(solr_url, leader_url=leader_url, timeout=timeout)
+        # Writes and anything else that must hit the leader
+        self.solr = self.pool.leader.client()
+        # Identical searches running at the same time share one Solr call
+        self.flights = SingleFlight() if coalesce else None
+        # Optional: reads fail fast while Solr keeps erroring
+        self.breaker = breaker
+        self._local = threading.local()
+
+    @contextmanager
+    def read_timeout(self, seconds: Optional[float]):
+        """Apply ``seconds`` as the Solr timeout for reads made by this thread."""
+        previous = getattr(self._local, "timeout", None)
+        self._local.timeout = seconds
+        try:
+            yield
+        finally:
+            self._local.timeout = previous
+
+    def _search(self, q: str, **params):
+        """All reads go through here so concurrent identical queries are coalesced.
+
+        Results may be shared between callers and must not be mutated.
+        """
+        timeout = getattr(self._local, "timeout", None)
+        # The header echoes every parameter back (long fq/json.facet strings);
+        # nothing reads it
+        params.setdefault("omitHeader", "true")
+
+        def read():
+            return self.pool.read(lambda solr: solr.search(q, **params), timeout)
+
+        def call():
+            if self.breaker is None:
+                return read()
+            return self.breaker.call(read)
+
+        if self.flights is None:
+            return call()
+        key = (q, tuple(sorted((name, repr(value)) for name, value in params.items())))
+        return self.flights.do(key, call)
 
     def add_document(self, doc_id: str, content: str, **kwargs):
         doc = {
@@ -11,30 +74,37 @@ class Indexer:
             "content": content,
         }
         doc.update(kwargs)
-        self.solr.add([doc])
+        self.pool.write(lambda solr: solr.add([doc]))
 
     def add_documents(self, docs: list):
         """
         Add a list of documents to Solr.
         Each doc should be a dictionary.
         """
-        self.solr.add(docs)
+        self.pool.write(lambda solr: solr.add(docs))
 
     def delete_all(self):
         """
         Delete all documents from the Solr index.
         """
-        self.solr.delete(q="*:*")
-
-    def search(self, query: str, clustering: bool = False, **kwargs):
-        # Search across title and content fields
-        # Use Solr's query syntax to search multiple fields
-        solr_query = f"title:({query}) OR content:({query})"
-        params = kwargs.copy()
-        if clustering:
-            params["clustering"] = "true"
-        
-        return self.solr.search(solr_query, **params)
+        self.pool.write(lambda solr: solr.delete(q="*:*"))
+
+    def search(
+        self, query: str, clustering: bool = False, filters: list = None, facets: list = None, **kwargs
+    ):
+        """Relevance search over title, location and content fields.
+
+        ``filters`` is a list of ``fq`` clauses, see ``src.query.build_filter_queries``.
+        ``facets`` names entries of ``src.facets.FACETS`` to count alongside the hits.
+        """
+        solr_query, params = build_search_params(query, filters)
+        params.update(kwargs)
+        # Explicit either way: older Solr configs enable clustering by default
+        params["clustering"] = "true" if clustering else "false"
+        if facets:
+            params["json.facet"] = json_facet_param(facets)
+
+        return self._search(solr_query, **params)
 
     def browse(
         self,
@@ -42,18 +112,18 @@ class Indexer:
         offset: int = 0,
         limit: int = 10,
         shuffle: bool = False,
+        filters: list = None,
+        facets: list = None,
         **kwargs,
     ):
         """Browse documents with pagination and optional shuffle.
 
         Returns a Solr results object.
         """
-        if query:
-            solr_query = f"title:({query}) OR content:({query})"
-        else:
-            solr_query = "*:*"
-
-        params = kwargs.copy()
+        solr_query, params = build_search_params(query, filters)
+        params.update(kwargs)
+        if facets:
+            params["json.facet"] = json_facet_param(facets)
         params.setdefault("start", offset)
         params.setdefault("rows", limit)
 
@@ -67,7 +137,43 @@ class Indexer:
             # Default sort by score desc when available
             params.setdefault("sort", "score desc")
 
-        return self.solr.search(solr_query, **params)
+        return self._search(solr_query, **params)
+
+    def facet_counts(self, query: str = None, filters: list = None, facets: list = None):
+        """Return ``{facet: [{value, count}, ...]}`` without fetching any documents."""
+        facets = facets or list(FACETS)
+        results = self.search(query, filters=filters, facets=facets, rows=0)
+        return parse_facets(results.raw_response.get("facets", {}), facets)
+
+    def get_documents(self, ids: list, **kwargs) -> list:
+        """Fetch documents by id, returned in the order of ``ids`` (missing ones skipped)."""
+        if not ids:
+            return []
+        params = {"rows": len(ids)}
+        params.update(kwargs)
+        # Ids are URLs and may contain commas, the terms parser's default separator
+        query = f"{{!terms f=id separator='{ID_SEPARATOR}'}}{ID_SEPARATOR.join(ids)}"
+        results = self._search(query, **params)
+        by_id = {doc["id"]: doc for doc in results.docs}
+        return [by_id[doc_id] for doc_id in ids if doc_id in by_id]
+
+    def export(self, query: str = None, filters: list = None, fields: list = None, page_size: int = 500):
+        """Yield every matching document, paging with ``cursorMark``.
+
+        Cursor paging keeps each request as cheap as the first one (no
+        ``start`` offset to skip over), and only one page is held at a time.
+        """
+        solr_query, params = build_search_params(query, filters)
+        params.update({"sort": "id asc", "rows": page_size})  # Cursors need a uniqueKey sort
+        if fields:
+            params["fl"] = ",".join(fields)
+        cursor = "*"
+        while True:
+            results = self._search(solr_query, cursorMark=cursor, **params)
+            yield from results.docs
+            if not results.docs or not results.nextCursorMark or results.nextCursorMark == cursor:
+                return
+            cursor = results.nextCursorMark
 
     def more_like_this(self, doc_id: str, mlt_fields: list = None, count: int = 10, **kwargs):
         """Find similar documents using Solr's Standard Request Handler with mlt=true."""
@@ -87,7 +193,8 @@ class Indexer:
         }
         params.update(kwargs)
 
-        results = self.solr.search(f'id:"{doc_id}"', **params)
+        # term parser takes the id verbatim, URLs with quotes or colons included
+        results = self._search(f"{{!term f=id}}{doc_id}", **params)
         
         # pysolr stores moreLikeThis in raw_response, not as a direct attribute
         mlt_response = results.raw_response.get("moreLikeThis", {})
@@ -98,42 +205,62 @@ class Indexer:
             return mlt_data.get("docs", [])
         return mlt_data
 
-    def group_by_location(self, query: str = None, limit: int = 10, group_limit: int = 5, **kwargs):
-        """Search with results grouped by location_name.
-        
-        Returns results grouped by location, showing multiple movies per location.
+    def group_by_location(
+        self, query: str = None, limit: int = 10, group_limit: int = 5, filters: list = None, **kwargs
+    ):
+        """Search with results grouped by location.
+
+        Uses the collapse query parser on the ``location_key`` docValues field:
+        each returned doc is the best match of its location, and ``expand``
+        adds up to ``group_limit - 1`` more movies per location. Unlike
+        ``group.ngroups`` there is no second pass to count groups, because
+        after collapsing ``numFound`` already is the number of locations.
         """
-        if query:
-            solr_query = f"title:({query}) OR content:({query}) OR location_name:({query})"
-        else:
-            solr_query = "*:*"
-        
-        params = {
-            "group": "true",
-            "group.field": "location_name",
-            "group.limit": group_limit,  # Max docs per group
-            "group.ngroups": "true",  # Return total number of groups
-            "rows": limit,  # Number of groups to return
-        }
+        solr_query, params = build_search_params(query, filters)
+        params["fq"] = params.get("fq", []) + ["{!collapse field=location_key nullPolicy=ignore}"]
+        params.update({
+            "expand": "true",
+            "expand.rows": max(group_limit - 1, 0),  # Head doc is the first movie
+            "rows": limit,  # Number of locations to return
+        })
         params.update(kwargs)
-        
-        results = self.solr.search(solr_query, **params)
+
+        results = self._search(solr_query, **params)
         return results
 
-    def nearby_locations(self, lat: float, lon: float, radius_km: float = 50, limit: int = 20, **kwargs):
+    def nearby_locations(
+        self, lat: float, lon: float, radius_km: float = 50, limit: int = 20, filters: list = None, **kwargs
+    ):
         """Find filming locations within a radius of a point.
         
         Uses Solr's spatial search with geodist() function.
         """
         # Only query documents that have location coordinates
         params = {
-            "fq": f"{{!geofilt sfield=location_pt pt={lat},{lon} d={radius_km}}}",
+            "fq": [f"{{!geofilt sfield=location_pt pt={lat},{lon} d={radius_km}}}"] + (filters or []),
             "sort": f"geodist(location_pt,{lat},{lon}) asc",  # Sort by distance
             "fl": f"*, _dist_:geodist(location_pt,{lat},{lon})",  # Include distance in results
             "rows": limit,
         }
         params.update(kwargs)
         
-        results = self.solr.search("location_pt:*", **params)
+        results = self._search("location_pt:*", **params)
         return results
 
+
+    def locations_in_boxes(self, boxes: list, limit: int = 5000, filters: list = None, **kwargs):
+        """Filming locations inside any of ``boxes``, ``(min_lat, min_lon, max_lat, max_lon)`` each.
+
+        The bounding-box prefilter of the polygon and route queries; the
+        exact geometry test happens in ``src.geo``.
+        """
+        clauses = [f"location_pt:[{b[0]},{b[1]} TO {b[2]},{b[3]}]" for b in boxes]
+        params = {
+            "fq": [" OR ".join(clauses)] + (filters or []),
+            "sort": "id asc",  # Stable candidates when there are more than ``limit``
+            "rows": limit,
+        }
+        params.update(kwargs)
+
+        results = self._search("location_pt:*", **params)
+        return results
@@ -0,0 +1,33 @@
+"""Pluggable JSON providers for the Flask app (``app.json``).
+
+``JSON_PROVIDER`` names one of ``JSON_PROVIDERS``. ``fast`` (the default)
+encodes with ``src.fastjson``, so with orjson installed a dict returned by a
+handler becomes response bytes in one call. ``stdlib`` is Flask's own
+provider, with sorted keys and indentation in debug mode. Both accept the
+same extra types as Flask: dates, decimals, UUIDs and dataclasses.
+"""
+
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+from src import fastjson
+
+
+class FastJSONProvider(JSONProvider):
+    mimetype = "application/json"
+
+    def dumps(self, obj, **kwargs) -> str:
+        return fastjson.dumps(obj, default=DefaultJSONProvider.default).decode("utf-8")
+
+    def loads(self, s, **kwargs):
+        return fastjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = fastjson.dumps(obj, default=DefaultJSONProvider.default)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+JSON_PROVIDERS = {
+    "fast": FastJSONProvider,
+    "stdlib": DefaultJSONProvider,
+}
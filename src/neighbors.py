@@ -0,0 +1,133 @@
+"""Precomputed "more like this" neighbors served from memory-mapped arrays.
+
+At index time every document is compared with every other one through
+sparse TF-IDF matrix products (in row chunks on a thread pool, each chunk
+ranked with one vectorized argpartition; scipy's sparse kernels and numpy's
+sorts release the GIL) and the top-k neighbors are written to ``artifacts/``:
+
+- ``mlt_ids.json``: document ids, the row number is the position
+- ``mlt_neighbors.npy``: int32 ``(n, k)`` neighbor rows, ``-1`` pads short rows
+- ``mlt_scores.npy``: float16 ``(n, k)`` cosine similarities
+
+The API memory-maps the two arrays, so a lookup is a dict access plus one
+row read regardless of corpus size.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from src.artifacts import ARTIFACTS_DIR, save_array, save_json
+
+IDS_FILE = "mlt_ids.json"
+NEIGHBORS_FILE = "mlt_neighbors.npy"
+SCORES_FILE = "mlt_scores.npy"
+
+# Peak bytes of dense similarity blocks across all workers
+MEMORY_BUDGET = 512 * 1024 * 1024
+MAX_WORKERS = 8
+
+
+def _doc_text(doc: dict) -> str:
+    # Title repeated to mirror the live MLT boost (mlt.qf=title^3 content^1)
+    title = str(doc.get("title") or "")
+    return " ".join([title] * 3 + [str(doc.get("content") or ""), str(doc.get("location_description") or "")])
+
+
+def _top_k_rows(matrix, start: int, stop: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k neighbors for rows ``start:stop`` of the L2-normalized ``matrix``."""
+    sims = (matrix[start:stop] @ matrix.T).toarray()
+    rows = np.arange(stop - start)
+    sims[rows, start + rows] = 0  # A document is not its own neighbor
+    neighbors = np.full((stop - start, k), -1, dtype=np.int32)
+    scores = np.zeros((stop - start, k), dtype=np.float16)
+    n = sims.shape[1]
+    k = min(k, n)
+    # Whole-chunk argpartition/argsort: no per-row Python loop, and numpy
+    # releases the GIL while it sorts
+    cols = np.argpartition(sims, n - k, axis=1)[:, n - k :] if k < n else np.broadcast_to(np.arange(n), sims.shape)
+    vals = np.take_along_axis(sims, cols, axis=1)
+    order = np.argsort(-vals, axis=1, kind="stable")
+    cols = np.take_along_axis(cols, order, axis=1)
+    vals = np.take_along_axis(vals, order, axis=1)
+    # Zero similarity means no shared term: pad instead
+    found = vals > 0
+    neighbors[:, :k] = np.where(found, cols, -1)
+    scores[:, :k] = np.where(found, vals, 0)
+    return neighbors, scores
+
+
+def build_neighbor_table(
+    docs: List[dict],
+    k: int = 20,
+    chunk_size: int = 512,
+    workers: Optional[int] = None,
+    out_dir: str = ARTIFACTS_DIR,
+    memory_budget: int = MEMORY_BUDGET,
+) -> int:
+    """Compute and write the top-``k`` neighbor table for ``docs``. Returns rows written.
+
+    Each worker holds a dense ``chunk_size x n`` block of similarities plus
+    its argpartition indices; ``chunk_size`` is lowered so that all workers
+    together stay within ``memory_budget`` bytes.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    if not docs:
+        return 0
+    vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True, min_df=1, dtype=np.float32)
+    matrix = vectorizer.fit_transform([_doc_text(d) for d in docs]).tocsr()
+
+    n = matrix.shape[0]
+    workers = workers or min(os.cpu_count() or 1, MAX_WORKERS)
+    # Worst case per cell: the sparse product (value + column), its dense
+    # float32 copy and an int64 argpartition index
+    chunk_size = max(1, min(chunk_size, memory_budget // (workers * n * 20)))
+    chunks = [(start, min(start + chunk_size, n)) for start in range(0, n, chunk_size)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(lambda c: _top_k_rows(matrix, c[0], c[1], k), chunks))
+
+    os.makedirs(out_dir, exist_ok=True)
+    # The API may have the old arrays mapped: replace the files, never rewrite them
+    save_array(os.path.join(out_dir, NEIGHBORS_FILE), np.vstack([p[0] for p in parts]))
+    save_array(os.path.join(out_dir, SCORES_FILE), np.vstack([p[1] for p in parts]))
+    save_json(os.path.join(out_dir, IDS_FILE), [d["id"] for d in docs])
+    return n
+
+
+class NeighborTable:
+    """Read-only view over a neighbor table written by ``build_neighbor_table``."""
+
+    def __init__(self, ids: List[str], neighbors: np.ndarray, scores: np.ndarray):
+        self.ids = ids
+        self.rows = {doc_id: row for row, doc_id in enumerate(ids)}
+        self.neighbors = neighbors
+        self.scores = scores
+
+    @classmethod
+    def load(cls, directory: str = ARTIFACTS_DIR) -> Optional["NeighborTable"]:
+        """Memory-map the table in ``directory``; ``None`` if it was never built."""
+        try:
+            with open(os.path.join(directory, IDS_FILE), "r", encoding="utf-8") as f:
+                ids = json.load(f)
+            neighbors = np.load(os.path.join(directory, NEIGHBORS_FILE), mmap_mode="r")
+            scores = np.load(os.path.join(directory, SCORES_FILE), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        return cls(ids, neighbors, scores)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self.rows
+
+    def similar(self, doc_id: str, count: int = 10) -> List[Tuple[str, float]]:
+        """``[(neighbor_id, score), ...]`` for a known ``doc_id``, best first."""
+        row = self.rows[doc_id]
+        result = []
+        for idx, score in zip(self.neighbors[row, :count], self.scores[row, :count]):
+            if idx < 0:
+                break
+            result.append((self.ids[idx], float(score)))
+        return result
@@ -0,0 +1,120 @@
+"""Build Solr request parameters for user searches.
+
+User text goes through edismax with per-field boosts (``qf``) instead of being
+pasted into a ``title:(...) OR content:(...)`` string, and structured filters
+become separate ``fq`` clauses. Solr caches each ``fq`` on its own in the
+``filterCache``, so the same filter is reused across different queries.
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Union
+
+# Field -> boost used for relevance scoring
+SEARCH_FIELDS: Dict[str, float] = {
+    "title": 3,
+    "movie_title": 2,
+    "location_name": 2,
+    "location_address": 1,
+    "content": 1,
+}
+# Fields that additionally get a boost when the whole query matches as a phrase
+PHRASE_FIELDS: Dict[str, float] = {
+    "title": 5,
+    "location_name": 3,
+}
+
+# Characters with a meaning in Lucene query syntax. Double quotes are handled
+# separately so that balanced phrases keep working.
+_SPECIAL_CHARS = re.compile(r'([+\-!(){}\[\]^~*?:\\/&|])')
+_OPERATORS = re.compile(r"\b(AND|OR|NOT)\b")
+
+FilterValue = Union[str, Iterable[str], None]
+
+# Years are four digits; bounds outside are clamped, Solr rejects values that
+# overflow the int field
+MIN_YEAR = 0
+MAX_YEAR = 9999
+
+
+def escape_query(text: str) -> str:
+    """Escape user input so it is always parsed as plain search terms.
+
+    Balanced double quotes are kept so ``"castle hill"`` still searches for
+    a phrase; an unbalanced quote is escaped like any other special char.
+    """
+    text = _SPECIAL_CHARS.sub(r"\\\1", text)
+    if text.count('"') % 2:
+        text = text.replace('"', '\\"')
+    # Uppercase boolean operators would otherwise be treated as syntax
+    return _OPERATORS.sub(lambda m: m.group(1).lower(), text).strip()
+
+
+def _boosts(fields: Dict[str, float]) -> str:
+    return " ".join(f"{name}^{boost:g}" for name, boost in fields.items())
+
+
+def _values(value: FilterValue) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    return [v.strip() for v in value if v and v.strip()]
+
+
+def build_filter_queries(
+    source: FilterValue = None,
+    country: FilterValue = None,
+    city: FilterValue = None,
+    has_coordinates: Optional[bool] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+) -> List[str]:
+    """Translate structured filters into a list of ``fq`` clauses.
+
+    Term filters use the ``term``/``terms`` query parsers, which take the
+    value verbatim, so no escaping is needed and the clause text is stable
+    for the ``filterCache``.
+    """
+    fq = []
+    for field, value in (("source", source), ("country", country), ("city", city)):
+        values = _values(value)
+        if len(values) == 1:
+            fq.append(f"{{!term f={field}}}{values[0]}")
+        elif values:
+            fq.append(f"{{!terms f={field}}}{','.join(sorted(values))}")
+
+    if has_coordinates is True:
+        fq.append("location_pt:[-90,-180 TO 90,180]")
+    elif has_coordinates is False:
+        fq.append("-location_pt:[-90,-180 TO 90,180]")
+
+    if year_from is not None or year_to is not None:
+        lo = min(max(year_from, MIN_YEAR), MAX_YEAR) if year_from is not None else "*"
+        hi = min(max(year_to, MIN_YEAR), MAX_YEAR) if year_to is not None else "*"
+        fq.append(f"year:[{lo} TO {hi}]")
+
+    return fq
+
+
+def build_search_params(
+    query: Optional[str],
+    filters: Optional[List[str]] = None,
+    fields: Optional[Dict[str, float]] = None,
+) -> tuple:
+    """Return ``(q, params)`` for a pysolr ``search`` call.
+
+    An empty query matches all documents; filters still apply.
+    """
+    params: Dict[str, object] = {}
+    text = escape_query(query) if query else ""
+    if text:
+        q = text
+        params["defType"] = "edismax"
+        params["qf"] = _boosts(fields or SEARCH_FIELDS)
+        params["pf"] = _boosts(PHRASE_FIELDS)
+        params["q.op"] = "OR"
+    else:
+        q = "*:*"
+    if filters:
+        params["fq"] = list(filters)
+    return q, params
@@ -0,0 +1,178 @@
+"""Sampled query log for the API, written as rotating NDJSON files.
+
+Request threads only decide whether to sample and put a small dict on a
+queue; a background thread serializes entries and appends them to
+``queries.ndjson`` in ``QUERY_LOG_DIR``. When the file grows past
+``max_bytes`` it is rotated to ``queries.ndjson.1`` (older files shift up to
+``backup_count``). If the writer falls behind, entries are dropped rather
+than slowing requests down.
+
+Worker processes of a prefork server (see ``run_api.py``) each write their
+own ``queries-<n>.ndjson``, since rotation is not safe across processes.
+Readers merge all of them by timestamp.
+
+Each line looks like::
+
+    {"ts": 1767225600.1, "endpoint": "search", "path": "/api/search",
+     "params": {"q": ["castle"]}, "status": 200, "latency_ms": 12.4,
+     "results": 10, "cache": "live"}
+
+The same files feed ``replay_queries.py`` and the API's warm-up on startup.
+"""
+
+import heapq
+import json
+import os
+import queue
+import random
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.dataset import ROOT
+
+QUERY_LOG_DIR = os.getenv("QUERY_LOG_DIR", os.path.join(ROOT, "logs", "queries"))
+LOG_FILE = "queries.ndjson"
+# queries.ndjson or a worker's queries-<n>.ndjson
+_LOG_NAME = re.compile(r"^queries(-\d+)?\.ndjson$")
+
+
+def log_file_name(worker: Optional[int] = None) -> str:
+    """The file a process writes: ``LOG_FILE``, or one per prefork ``worker``."""
+    return LOG_FILE if worker is None else f"queries-{worker}.ndjson"
+
+
+class QueryLog:
+    def __init__(
+        self,
+        directory: str = QUERY_LOG_DIR,
+        sample_rate: float = 0.1,
+        name: str = LOG_FILE,
+        max_bytes: int = 64 * 1024 * 1024,
+        backup_count: int = 5,
+        queue_size: int = 10000,
+    ):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.path = os.path.join(directory, name)
+        self._queue: "queue.Queue[Optional[dict]]" = queue.Queue(maxsize=queue_size)
+        self.written = 0
+        self.dropped = 0
+        # Opened here so an unwritable directory raises OSError to the caller
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._writer = threading.Thread(target=self._run, name="querylog", daemon=True)
+        self._writer.start()
+
+    def sampled(self) -> bool:
+        return random.random() < self.sample_rate
+
+    def record(self, entry: dict):
+        """Queue ``entry`` for writing; never blocks."""
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout: float = 5.0):
+        """Flush queued entries and stop the writer."""
+        self._queue.put(None)
+        self._writer.join(timeout)
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            older = f"{self.path}.{i}"
+            if os.path.exists(older):
+                os.replace(older, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def _run(self):
+        f = self._file
+        size = f.tell()
+        while True:
+            # Block for one entry, then drain whatever else is waiting so a
+            # burst costs one write and one flush
+            entries = [self._queue.get()]
+            while len(entries) < 1000:
+                try:
+                    entries.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in entries
+            entries = [e for e in entries if e is not None]
+            lines = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+            try:
+                f.write(lines)
+                f.flush()
+            except OSError as e:
+                print(f"Query log write failed: {e}")
+            self.written += len(entries)
+            size += len(lines.encode("utf-8"))
+            if stop:
+                break
+            if size >= self.max_bytes:
+                f.close()
+                self._rotate()
+                f = open(self.path, "a", encoding="utf-8")
+                size = 0
+        f.close()
+
+    def stats(self) -> dict:
+        return {
+            "sample_rate": self.sample_rate,
+            "written": self.written,
+            "dropped": self.dropped,
+            "queued": self._queue.qsize(),
+        }
+
+
+def log_files(directory: str = QUERY_LOG_DIR) -> List[List[str]]:
+    """Existing log files per writing process, each list oldest first."""
+    if not os.path.isdir(directory):
+        return []
+    names = os.listdir(directory)
+    streams = []
+    for current in sorted(n for n in names if _LOG_NAME.match(n)):
+        rotated = []
+        for name in names:
+            suffix = name[len(current) + 1 :]
+            if name.startswith(current + ".") and suffix.isdigit():
+                rotated.append((int(suffix), os.path.join(directory, name)))
+        files = [path for _, path in sorted(rotated, reverse=True)]
+        streams.append(files + [os.path.join(directory, current)])
+    return streams
+
+
+def _read_entries(paths: List[str]) -> Iterator[dict]:
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+
+def iter_entries(directory: str = QUERY_LOG_DIR) -> Iterator[dict]:
+    """Every logged entry, in timestamp order across processes; unreadable lines are skipped."""
+    streams = [_read_entries(paths) for paths in log_files(directory)]
+    return heapq.merge(*streams, key=lambda entry: entry.get("ts", 0))
+
+
+def top_queries(
+    directory: str = QUERY_LOG_DIR, n: int = 100
+) -> List[Tuple[str, Dict[str, List[str]]]]:
+    """The ``n`` most frequent successful ``(endpoint, params)`` pairs."""
+    counts: Counter = Counter()
+    for entry in iter_entries(directory):
+        if entry.get("status") != 200 or not entry.get("endpoint"):
+            continue
+        params = tuple(sorted((k, tuple(v)) for k, v in (entry.get("params") or {}).items()))
+        counts[(entry["endpoint"], params)] += 1
+    return [
+        (endpoint, {k: list(v) for k, v in params})
+        for (endpoint, params), _ in counts.most_common(n)
+    ]
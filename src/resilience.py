@@ -0,0 +1,138 @@
+"""Failure handling for Solr: a circuit breaker and a last-known-good store.
+
+When Solr is restarting or stuck in a GC pause, waiting for every request to
+time out only piles up blocked workers. The breaker starts failing fast after
+a run of errors and lets a single probe through once ``reset_timeout`` has
+passed. Meanwhile the API answers from ``StaleStore``: the last successful
+response for the same request, marked as stale.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Solr while the breaker is open."""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 10.0,
+        ignore: Optional[Callable[[Exception], bool]] = None,
+    ):
+        """``ignore(error)`` is true for errors that mean the backend did answer
+        (e.g. a rejected bad request); they don't count as failures."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.ignore = ignore
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.state = self.CLOSED
+        self.rejected = 0
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    raise CircuitOpenError("Solr circuit is open, failing fast")
+                self.state = self.HALF_OPEN
+            if self.state == self.HALF_OPEN:
+                # Only one probe at a time while we find out if Solr is back
+                if self._probing:
+                    self.rejected += 1
+                    raise CircuitOpenError("Solr circuit is half-open, probe in progress")
+                self._probing = True
+
+    def _on_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self.state = self.CLOSED
+
+    def _on_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def call(self, fn: Callable[[], Any]) -> Any:
+        self._before_call()
+        try:
+            result = fn()
+        except CircuitOpenError:
+            # Another breaker failing fast says nothing about this backend
+            with self._lock:
+                self._probing = False
+            raise
+        except Exception as e:
+            if self.ignore is not None and self.ignore(e):
+                self._on_success()
+            else:
+                self._on_failure()
+            raise
+        self._on_success()
+        return result
+
+    def stats(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self._failures, "rejected": self.rejected}
+
+
+class StaleStore:
+    """Bounded LRU of the last successful response per request key."""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self._refreshing = set()
+        self.served = 0
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[Tuple[Any, float]]:
+        """``(value, stored_at)`` or ``None``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.served += 1
+            return entry
+
+    def refresh_in_background(self, key: Hashable, fn: Callable[[], Any]):
+        """Recompute ``key`` on a daemon thread; at most one refresh per key at a time."""
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                self.put(key, fn())
+            except Exception:
+                pass  # Still failing; the stale value stays until the next try
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "served": self.served, "refreshing": len(self._refreshing)}
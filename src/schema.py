@@ -0,0 +1,67 @@
+"""Bootstrap the Solr schema fields the indexer relies on.
+
+The ``movies`` core is created from the default schemaless configset, which
+guesses every string as analyzed, multivalued text. Sorting, grouping and
+faceting on such fields means un-inverting text on the heap, so the typed
+fields produced by ``src.enrichment`` are declared explicitly, with
+docValues, before any document is added.
+"""
+
+from typing import Dict, List
+
+import requests
+
+FIELD_TYPES: List[dict] = [
+    {"name": "location", "class": "solr.LatLonPointSpatialField", "docValues": True},
+]
+
+FIELDS: List[dict] = [
+    {"name": "year", "type": "pint", "indexed": True, "stored": True, "docValues": True},
+    {"name": "source", "type": "string", "indexed": True, "stored": True, "docValues": True},
+    {"name": "country", "type": "string", "indexed": True, "stored": True, "docValues": True},
+    {"name": "city", "type": "string", "indexed": True, "stored": True, "docValues": True},
+    {"name": "movie_id", "type": "string", "indexed": True, "stored": True, "docValues": True},
+    {"name": "location_key", "type": "string", "indexed": True, "stored": True, "docValues": True},
+    {"name": "topic_id", "type": "pint", "indexed": True, "stored": True, "docValues": True},
+    {"name": "topic_label", "type": "string", "indexed": True, "stored": True, "docValues": True},
+    {"name": "location_pt", "type": "location", "indexed": True, "stored": True},
+    {"name": "latitude", "type": "pdouble", "indexed": True, "stored": True, "docValues": True},
+    {"name": "longitude", "type": "pdouble", "indexed": True, "stored": True, "docValues": True},
+]
+
+
+def _differs(wanted: dict, existing: dict) -> bool:
+    return any(existing.get(key) != value for key, value in wanted.items())
+
+
+def schema_commands(schema: dict) -> Dict[str, List[dict]]:
+    """Return the Schema API commands needed to bring ``schema`` up to date."""
+    commands: Dict[str, List[dict]] = {}
+    types = {t["name"]: t for t in schema.get("fieldTypes", [])}
+    for field_type in FIELD_TYPES:
+        if field_type["name"] not in types:
+            commands.setdefault("add-field-type", []).append(field_type)
+
+    fields = {f["name"]: f for f in schema.get("fields", [])}
+    for field in FIELDS:
+        existing = fields.get(field["name"])
+        if existing is None:
+            commands.setdefault("add-field", []).append(field)
+        elif _differs(field, existing):
+            commands.setdefault("replace-field", []).append(field)
+    return commands
+
+
+def ensure_schema(solr_url: str, timeout: float = 30) -> Dict[str, List[dict]]:
+    """Declare missing field types and fields on the core at ``solr_url``.
+
+    Idempotent: fields that already match are left alone. Returns the
+    commands that were sent.
+    """
+    response = requests.get(f"{solr_url}/schema", params={"wt": "json"}, timeout=timeout)
+    response.raise_for_status()
+    commands = schema_commands(response.json().get("schema", {}))
+    if commands:
+        response = requests.post(f"{solr_url}/schema", json=commands, timeout=timeout)
+        response.raise_for_status()
+    return commands
@@ -0,0 +1,245 @@
+"""Columnar snapshot of the crawled dataset.
+
+Parsing ``data/*.json`` means decoding every record into dicts, which gets
+slower as the crawl grows. ``build_snapshot`` does that once and writes the
+dataset to ``artifacts/snapshot/`` as flat NumPy arrays:
+
+- ``strings.npy`` / ``string_offsets.npy``: every distinct string once, as
+  one UTF-8 blob plus offsets. The other columns store ids into this table.
+- ``movie_*.npy``: one row per movie (url, title, text, image, year, source
+  file) and ``movie_loc_offsets.npy``, where the locations of movie ``i`` are
+  rows ``offsets[i]:offsets[i + 1]`` of the location columns
+- ``loc_*.npy``: one row per location (name, address, description, image,
+  latitude, longitude; NaN when a coordinate is missing or not a number)
+- ``meta.json``: counts plus the size and mtime of each source file, written
+  last so a half-written snapshot is never loaded
+
+``Snapshot.load`` memory-maps the arrays, which takes milliseconds however
+large the dataset is. Column-wise consumers (see ``build_suggest_index_from_snapshot``)
+work on the arrays directly; ``records()`` rebuilds crawler-shaped dicts for
+code that wants them, with each location's ``description`` as
+``src.dataset.location_description`` returns it.
+"""
+
+import json
+import os
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.artifacts import ARTIFACTS_DIR, save_array
+from src.dataset import DATA_DIR, find_data_files, load_records, location_description
+from src.enrichment import parse_title
+
+SNAPSHOT_DIR = os.path.join(ARTIFACTS_DIR, "snapshot")
+FORMAT_VERSION = 2
+META_FILE = "meta.json"
+
+MOVIE_STRING_COLUMNS = ("url", "title", "text_content", "image")
+LOCATION_STRING_COLUMNS = ("name", "address", "description", "image")
+
+
+def _source_info(paths: List[str]) -> List[dict]:
+    infos = []
+    for path in paths:
+        st = os.stat(path)
+        infos.append({"name": os.path.basename(path), "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+    return infos
+
+
+def _coordinates(loc: dict) -> Tuple[float, float]:
+    """``(lat, lon)`` with NaN for missing values, read like ``transform_records`` reads them.
+
+    A pair with a value that is not a number is dropped as a whole, so it
+    must not come back as one missing and one valid coordinate.
+    """
+    lat, lon = loc.get("latitude") or None, loc.get("longitude") or None
+    try:
+        return (float(lat) if lat is not None else np.nan, float(lon) if lon is not None else np.nan)
+    except (TypeError, ValueError):
+        return np.nan, np.nan
+
+
+class _StringTable:
+    """Interns strings while building; id 0 is the empty string."""
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {"": 0}
+        self.values: List[str] = [""]
+
+    def __call__(self, value) -> int:
+        value = "" if value is None else str(value)
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return string_id
+
+    def arrays(self):
+        encoded = [v.encode("utf-8") for v in self.values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def build_snapshot(data_files: Optional[List[str]] = None, out_dir: str = SNAPSHOT_DIR) -> dict:
+    """Convert ``data_files`` (default: everything in ``data/``) to a snapshot. Returns its metadata."""
+    data_files = find_data_files(DATA_DIR) if data_files is None else data_files
+    strings = _StringTable()
+    movies = {name: [] for name in MOVIE_STRING_COLUMNS}
+    movie_year, movie_file, loc_offsets = [], [], [0]
+    locations = {name: [] for name in LOCATION_STRING_COLUMNS}
+    lat, lon = [], []
+
+    sources = _source_info(data_files)
+    for file_index, path in enumerate(data_files):
+        for record in load_records(path):
+            for name in MOVIE_STRING_COLUMNS:
+                movies[name].append(strings(record.get(name)))
+            _, year = parse_title(record.get("title") or "")
+            movie_year.append(year or 0)
+            movie_file.append(file_index)
+            for loc in record.get("locations") or []:
+                locations["name"].append(strings(loc.get("name")))
+                locations["address"].append(strings(loc.get("address")))
+                locations["description"].append(strings(location_description(loc)))
+                locations["image"].append(strings(loc.get("image")))
+                loc_lat, loc_lon = _coordinates(loc)
+                lat.append(loc_lat)
+                lon.append(loc_lon)
+            loc_offsets.append(len(lat))
+
+    blob, offsets = strings.arrays()
+    arrays = {
+        "strings": blob,
+        "string_offsets": offsets,
+        "movie_year": np.array(movie_year, dtype=np.int16),
+        "movie_file": np.array(movie_file, dtype=np.int16),
+        "movie_loc_offsets": np.array(loc_offsets, dtype=np.int64),
+        "loc_lat": np.array(lat, dtype=np.float64),
+        "loc_lon": np.array(lon, dtype=np.float64),
+    }
+    for name, ids in movies.items():
+        arrays[f"movie_{name}"] = np.array(ids, dtype=np.int32)
+    for name, ids in locations.items():
+        arrays[f"loc_{name}"] = np.array(ids, dtype=np.int32)
+
+    os.makedirs(out_dir, exist_ok=True)
+    # Invalidate the old snapshot before overwriting its arrays
+    meta_path = os.path.join(out_dir, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    # Replaced, not rewritten: the API may have the old arrays mapped
+    for name, array in arrays.items():
+        save_array(os.path.join(out_dir, f"{name}.npy"), array)
+    meta = {
+        "format": FORMAT_VERSION,
+        "sources": sources,
+        "movies": len(movie_year),
+        "locations": len(lat),
+        "strings": len(strings.values),
+    }
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+    return meta
+
+
+class Snapshot:
+    """Read-only, memory-mapped view over a snapshot directory."""
+
+    def __init__(self, meta: dict, arrays: Dict[str, np.ndarray], directory: Optional[str] = None):
+        self.directory = directory
+        self.meta = meta
+        self.arrays = arrays
+        self._blob = arrays["strings"]
+        self._offsets = arrays["string_offsets"]
+        self._decoded: Dict[int, str] = {}
+        self.n_movies = meta["movies"]
+        self.n_locations = meta["locations"]
+
+    @classmethod
+    def load(cls, directory: str = SNAPSHOT_DIR) -> Optional["Snapshot"]:
+        """Memory-map the snapshot in ``directory``; ``None`` if missing or unreadable."""
+        try:
+            with open(os.path.join(directory, META_FILE), "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("format") != FORMAT_VERSION:
+                return None
+            arrays = {
+                name[: -len(".npy")]: np.load(os.path.join(directory, name), mmap_mode="r")
+                for name in os.listdir(directory)
+                if name.endswith(".npy")
+            }
+        except (OSError, ValueError):
+            return None
+        return cls(meta, arrays, directory)
+
+    def is_current(self, data_files: List[str]) -> bool:
+        """Whether the snapshot was built from exactly these, unmodified, files."""
+        try:
+            return _source_info(data_files) == self.meta.get("sources")
+        except OSError:
+            return False
+
+    def column(self, name: str) -> np.ndarray:
+        """A raw column, e.g. ``column("loc_lat")`` or the string ids of ``column("movie_title")``."""
+        return self.arrays[name]
+
+    def string(self, string_id: int) -> str:
+        value = self._decoded.get(string_id)
+        if value is None:
+            start, stop = self._offsets[string_id], self._offsets[string_id + 1]
+            value = self._decoded[string_id] = self._blob[start:stop].tobytes().decode("utf-8")
+        return value
+
+    def locations_of(self, movie: int) -> range:
+        offsets = self.arrays["movie_loc_offsets"]
+        return range(int(offsets[movie]), int(offsets[movie + 1]))
+
+    def movies_in_file(self, file_index: int) -> np.ndarray:
+        """Row numbers of the movies read from the ``file_index``-th source file."""
+        return np.flatnonzero(self.arrays["movie_file"] == file_index)
+
+    def records(self, file_index: Optional[int] = None, movies: Optional[Iterable[int]] = None) -> Iterator[dict]:
+        """Crawler-shaped movie dicts: all of them, those of one source file or the given rows."""
+        a = self.arrays
+        if movies is None:
+            movies = range(self.n_movies) if file_index is None else self.movies_in_file(file_index)
+        for movie in movies:
+            locations = []
+            for loc in self.locations_of(movie):
+                lat, lon = float(a["loc_lat"][loc]), float(a["loc_lon"][loc])
+                locations.append({
+                    "name": self.string(a["loc_name"][loc]),
+                    "address": self.string(a["loc_address"][loc]),
+                    "description": self.string(a["loc_description"][loc]),
+                    "image": self.string(a["loc_image"][loc]),
+                    "latitude": None if np.isnan(lat) else lat,
+                    "longitude": None if np.isnan(lon) else lon,
+                })
+            record = {name: self.string(a[f"movie_{name}"][movie]) for name in MOVIE_STRING_COLUMNS}
+            record["locations"] = locations
+            yield record
+
+
+def load_snapshot(data_dir: str = DATA_DIR, directory: str = SNAPSHOT_DIR) -> Optional[Snapshot]:
+    """The snapshot of ``data_dir`` if one exists and is up to date, else ``None``."""
+    snapshot = Snapshot.load(directory)
+    if snapshot is None or not snapshot.is_current(find_data_files(data_dir)):
+        return None
+    return snapshot
+
+
+def ensure_snapshot(data_dir: str = DATA_DIR, directory: str = SNAPSHOT_DIR) -> Snapshot:
+    """Load the snapshot of ``data_dir``, rebuilding it first if it is missing or stale."""
+    snapshot = load_snapshot(data_dir, directory)
+    if snapshot is None:
+        build_snapshot(find_data_files(data_dir), directory)
+        snapshot = Snapshot.load(directory)
+    return snapshot
+
+
+if __name__ == "__main__":
+    meta = build_snapshot()
+    print(f"Wrote {meta['movies']} movies, {meta['locations']} locations, {meta['strings']} strings to {SNAPSHOT_DIR}")
@@ -0,0 +1,201 @@
+"""Client side load balancing over several Solr replicas.
+
+Each read goes to the healthy node with the fewest requests in flight, so a
+node stuck in a GC pause or a slow merge stops attracting traffic as soon as
+its requests start piling up. A read that fails with a connection error,
+timeout or 5xx marks the node down and is retried once on another node.
+Writes only ever go to the leader. A background thread, started with the
+first read, pings every node (``/admin/ping``) and brings recovered nodes
+back into rotation.
+
+Nodes are core (or collection) URLs, e.g.
+``http://solr1:8983/solr/movies,http://solr2:8983/solr/movies``.
+
+pysolr and requests are only imported when the first request goes out, so
+importing the API does not pay for them.
+"""
+
+import os
+import random
+import re
+import threading
+import time
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, TypeVar, Union
+
+from src.fastjson import SolrDecoder
+
+if TYPE_CHECKING:
+    import pysolr
+    import requests
+
+T = TypeVar("T")
+
+# pysolr reports HTTP errors as "... (HTTP 400): ..."; client errors would
+# fail the same way on every replica
+_CLIENT_ERROR = re.compile(r"\(HTTP 4\d\d\)")
+
+
+def is_client_error(error: Exception) -> bool:
+    """True for Solr rejecting the request itself (HTTP 4xx), not for Solr being unwell."""
+    return _CLIENT_ERROR.search(str(error)) is not None
+
+
+def parse_solr_urls(value: Union[str, List[str]]) -> List[str]:
+    """``"a, b"`` or ``["a", "b"]`` -> ``["a", "b"]`` without trailing slashes."""
+    urls = value.split(",") if isinstance(value, str) else value
+    return [url.strip().rstrip("/") for url in urls if url and url.strip()]
+
+
+class SolrNode:
+    def __init__(self, url: str, timeout: float = 60):
+        self.url = url
+        self.timeout = timeout
+        self._session: Optional["requests.Session"] = None
+        self._clients: Dict[Optional[float], "pysolr.Solr"] = {}
+        self.healthy = True
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def session(self) -> "requests.Session":
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+        return self._session
+
+    def client(self, timeout: Optional[float] = None) -> "pysolr.Solr":
+        """A pysolr client for this node; one per timeout, all sharing the HTTP session."""
+        client = self._clients.get(timeout)
+        if client is None:
+            import pysolr
+
+            client = pysolr.Solr(
+                self.url,
+                decoder=SolrDecoder(),
+                always_commit=True,
+                timeout=timeout or self.timeout,
+                session=self.session,
+            )
+            self._clients[timeout] = client
+        return client
+
+    def ping(self, timeout: float = 2.0) -> bool:
+        import requests
+
+        try:
+            response = self.session.get(f"{self.url}/admin/ping", params={"wt": "json"}, timeout=timeout)
+            return response.status_code == 200 and response.json().get("status") == "OK"
+        except (requests.RequestException, ValueError):
+            return False
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "failures": self.failures,
+            "last_error": self.last_error,
+        }
+
+
+class SolrPool:
+    """Replica set with least-outstanding-requests reads and leader writes."""
+
+    def __init__(
+        self,
+        urls: Union[str, List[str]],
+        leader_url: Optional[str] = None,
+        timeout: float = 60,
+        read_retries: int = 1,
+        health_interval: float = 5.0,
+    ):
+        urls = parse_solr_urls(urls)
+        if not urls:
+            raise ValueError("At least one Solr URL is required")
+        self.nodes = [SolrNode(url, timeout) for url in urls]
+        leader_url = leader_url.rstrip("/") if leader_url else urls[0]
+        self.leader = next((n for n in self.nodes if n.url == leader_url), None) or SolrNode(leader_url, timeout)
+        self.read_retries = read_retries
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._health_pid: Optional[int] = None
+
+    def _start_health_checks(self):
+        # On first use rather than in __init__: a process forked after the
+        # pool was created (run_api.py) needs a thread of its own. A single
+        # node has nowhere else to send traffic, nothing to check.
+        if self._health_pid != os.getpid() and len(self.nodes) > 1 and self.health_interval > 0:
+            self._health_pid = os.getpid()
+            threading.Thread(target=self._check_health, name="solr-health", daemon=True).start()
+
+    def _acquire(self, exclude: List[SolrNode]) -> Optional[SolrNode]:
+        with self._lock:
+            self._start_health_checks()
+            candidates = [n for n in self.nodes if n not in exclude]
+            # When everything looks down, try anyway rather than fail without asking
+            healthy = [n for n in candidates if n.healthy] or candidates
+            if not healthy:
+                return None
+            # Random tie-break spreads idle-time traffic evenly
+            node = min(healthy, key=lambda n: (n.outstanding, random.random()))
+            node.outstanding += 1
+            node.requests += 1
+            return node
+
+    def _release(self, node: SolrNode, error: Optional[Exception] = None, answered: bool = False):
+        """``error``: the node failed and leaves rotation; ``answered``: it is evidently up."""
+        with self._lock:
+            node.outstanding -= 1
+            if error is not None:
+                node.failures += 1
+                node.healthy = False
+                node.last_error = str(error)[:200]
+            elif answered:
+                # Also how a single node (no health checks) comes back
+                node.healthy = True
+
+    def read(self, fn: Callable[["pysolr.Solr"], T], timeout: Optional[float] = None) -> T:
+        """Run the idempotent ``fn(client)`` on the best node, retrying on another one on failure."""
+        import pysolr
+
+        tried: List[SolrNode] = []
+        while True:
+            node = self._acquire(tried)
+            error: Optional[Exception] = None
+            answered = False
+            try:
+                result = fn(node.client(timeout))
+                answered = True
+                return result
+            except pysolr.SolrError as e:
+                if is_client_error(e):
+                    answered = True
+                    raise
+                error = e
+                tried.append(node)
+                if len(tried) > self.read_retries or len(tried) == len(self.nodes):
+                    raise
+                print(f"Solr read failed on {node.url}, retrying on another node: {e}")
+            finally:
+                # Whatever was raised (e.g. an undecodable body), the request is over
+                self._release(node, error, answered)
+
+    def write(self, fn: Callable[["pysolr.Solr"], T]) -> T:
+        """Run ``fn(client)`` on the leader; writes are never retried elsewhere."""
+        return fn(self.leader.client())
+
+    def _check_health(self):
+        while True:
+            time.sleep(self.health_interval)
+            for node in self.nodes:
+                healthy = node.ping()
+                if healthy != node.healthy:
+                    print(f"Solr node {node.url} is {'up' if healthy else 'down'}")
+                node.healthy = healthy
+
+    def stats(self) -> dict:
+        return {"leader": self.leader.url, "nodes": [n.stats() for n in self.nodes]}
@@ -0,0 +1,179 @@
+"""Spelling correction for search queries (symmetric delete, as in SymSpell).
+
+At index time the words of titles, location names and content are counted,
+and every word is stored under its deletes: the strings left after removing
+up to ``MAX_EDIT_DISTANCE`` characters from its first ``PREFIX_LENGTH``.
+Artifacts in ``artifacts/``:
+
+- ``spell_words.json``: the vocabulary, the row number is the word id
+- ``spell_counts.npy``: int32 number of documents containing each word
+- ``spell_delete_hashes.npy`` / ``spell_delete_words.npy``: sorted uint64
+  hashes of the deletes and the word id each one belongs to, memory-mapped
+
+A misspelled word is looked up through its own deletes (a few dozen at
+most) with a binary search over the hashes, so the real edit distance is
+only computed for the handful of words sharing one. Correcting a word
+takes a few hundred microseconds and never touches Solr.
+"""
+
+import hashlib
+import json
+import os
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from src.artifacts import ARTIFACTS_DIR, save_array, save_json
+from src.text import normalize
+
+WORDS_FILE = "spell_words.json"
+COUNTS_FILE = "spell_counts.npy"
+HASHES_FILE = "spell_delete_hashes.npy"
+DELETE_WORDS_FILE = "spell_delete_words.npy"
+
+MAX_EDIT_DISTANCE = 2
+# Deletes only cover the start of a word; longer words are checked in full
+PREFIX_LENGTH = 7
+MIN_WORD_LENGTH = 3
+
+
+def _hash(text: str) -> int:
+    # Stable across processes, unlike hash(); collisions only add candidates
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _deletes(word: str, max_distance: int) -> Set[str]:
+    """``word``'s prefix and everything left after removing up to ``max_distance`` characters."""
+    word = word[:PREFIX_LENGTH]
+    result = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1 :] for w in frontier for i in range(len(w))} - result
+        result |= frontier
+    return result
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein distance (adjacent transpositions), ``limit + 1`` once it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return min(previous[-1], limit + 1)
+
+
+def _words(text) -> List[str]:
+    return [w for w in normalize(str(text or "")).split(" ") if len(w) >= MIN_WORD_LENGTH and not w.isdigit()]
+
+
+def build_spelling_index(docs: List[dict], min_content_count: int = 2, out_dir: str = ARTIFACTS_DIR) -> int:
+    """Count the vocabulary of ``docs`` and write the delete index. Returns the number of words.
+
+    Every word of a title or location name is kept; words only seen in
+    content need ``min_content_count`` documents, which keeps the typos of
+    the crawled text out of the suggestions.
+    """
+    counts: Counter = Counter()
+    names: Set[str] = set()
+    for doc in docs:
+        name_words = set(_words(doc.get("movie_title"))) | set(_words(doc.get("location_name")))
+        names |= name_words
+        counts.update(name_words | set(_words(doc.get("content"))))
+    words = sorted(w for w, n in counts.items() if w in names or n >= min_content_count)
+    if not words:
+        return 0
+
+    hashes, owners = [], []
+    for word_id, word in enumerate(words):
+        for delete in _deletes(word, MAX_EDIT_DISTANCE):
+            hashes.append(_hash(delete))
+            owners.append(word_id)
+    hashes = np.array(hashes, dtype=np.uint64)
+    order = np.argsort(hashes, kind="stable")
+
+    os.makedirs(out_dir, exist_ok=True)
+    # The API may have the old arrays mapped: replace the files, never rewrite them
+    save_array(os.path.join(out_dir, COUNTS_FILE), np.array([counts[w] for w in words], dtype=np.int32))
+    save_array(os.path.join(out_dir, HASHES_FILE), hashes[order])
+    save_array(os.path.join(out_dir, DELETE_WORDS_FILE), np.array(owners, dtype=np.int32)[order])
+    save_json(os.path.join(out_dir, WORDS_FILE), words)
+    return len(words)
+
+
+class SpellingIndex:
+    """Query-side view over the artifacts written by ``build_spelling_index``."""
+
+    def __init__(self, words: List[str], counts, hashes, delete_words):
+        self.words = words
+        self.word_ids: Dict[str, int] = {w: i for i, w in enumerate(words)}
+        self.counts = counts
+        self.hashes = hashes
+        self.delete_words = delete_words
+
+    @classmethod
+    def load(cls, directory: str = ARTIFACTS_DIR) -> Optional["SpellingIndex"]:
+        """Load the vocabulary and memory-map the delete index; ``None`` if never built."""
+        try:
+            with open(os.path.join(directory, WORDS_FILE), "r", encoding="utf-8") as f:
+                words = json.load(f)
+            arrays = [
+                np.load(os.path.join(directory, name), mmap_mode="r")
+                for name in (COUNTS_FILE, HASHES_FILE, DELETE_WORDS_FILE)
+            ]
+        except (OSError, ValueError):
+            return None
+        return cls(words, *arrays)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def _candidates(self, word: str, max_distance: int) -> Iterable[int]:
+        hashes = np.array([_hash(d) for d in _deletes(word, max_distance)], dtype=np.uint64)
+        lo = np.searchsorted(self.hashes, hashes, side="left")
+        hi = np.searchsorted(self.hashes, hashes, side="right")
+        candidates = set()
+        for start, stop in zip(lo.tolist(), hi.tolist()):
+            if start < stop:
+                candidates.update(self.delete_words[start:stop].tolist())
+        return candidates
+
+    def lookup(self, word: str) -> Optional[str]:
+        """The closest known word to the normalized ``word``, most frequent on ties.
+
+        Known words come back unchanged; ``None`` when nothing is close enough.
+        Words of up to five characters allow one edit, longer ones two.
+        """
+        if word in self.word_ids:
+            return word
+        max_distance = 1 if len(word) <= 5 else MAX_EDIT_DISTANCE
+        best, best_key = None, None
+        for word_id in self._candidates(word, max_distance):
+            candidate = self.words[word_id]
+            distance = edit_distance(word, candidate, max_distance)
+            if distance > max_distance:
+                continue
+            key = (distance, -int(self.counts[word_id]))
+            if best_key is None or key < best_key:
+                best, best_key = candidate, key
+        return best
+
+    def correct(self, query: str) -> Optional[str]:
+        """``query`` normalized with its unknown words corrected; ``None`` if there is nothing to correct."""
+        words = normalize(query).split(" ")
+        corrected = [
+            (self.lookup(w) or w) if len(w) >= MIN_WORD_LENGTH and not w.isdigit() else w for w in words
+        ]
+        if corrected == words:
+            return None
+        return " ".join(corrected)
@@ -0,0 +1,128 @@
+"""In-memory serving of the built frontend (``frontend/dist``).
+
+The directory is scanned once at startup. Every file is kept in memory with
+its content type, an ETag and compressed variants: ``.gz``/``.br`` files
+produced by the build are used when present. Otherwise gzip is computed at
+startup, and brotli too when the optional ``brotli`` package is installed.
+A request is then a dict lookup and a write, with no filesystem access.
+
+Caching follows the Vite output layout: hashed files under ``assets/``
+never change and are cached for a year as immutable, while ``index.html``
+is always revalidated with its ETag.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import Dict, Optional
+
+from flask import Response, request
+
+# Vite names bundles like index-B4x9cD2e.js
+HASHED_NAME = re.compile(r"[-.][A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "image/svg+xml", "application/xml")
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+SHORT = "public, max-age=3600"
+
+
+def _brotli_compress(data: bytes) -> Optional[bytes]:
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli.compress(data, quality=11)
+
+
+class StaticFile:
+    __slots__ = ("body", "content_type", "etag", "cache_control", "variants")
+
+    def __init__(self, body: bytes, content_type: str, cache_control: str):
+        self.body = body
+        self.content_type = content_type
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self.cache_control = cache_control
+        self.variants: Dict[str, bytes] = {}  # content-encoding -> body
+
+
+class StaticAssets:
+    def __init__(self, root: Optional[str], min_compress_size: int = 512):
+        self.root = root
+        self.min_compress_size = min_compress_size
+        self.files: Dict[str, StaticFile] = {}
+        if root and os.path.isdir(root):
+            self._scan()
+
+    def _read(self, path: str) -> Optional[bytes]:
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _scan(self):
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                full = os.path.join(directory, name)
+                rel = os.path.relpath(full, self.root).replace(os.sep, "/")
+                # Precompressed siblings become variants of their original
+                if rel.endswith((".gz", ".br")) and os.path.exists(full[:-3]):
+                    continue
+                body = self._read(full)
+                if body is None:
+                    continue
+                self.files[rel] = self._prepare(rel, full, body)
+
+    def _prepare(self, rel: str, full: str, body: bytes) -> StaticFile:
+        content_type = mimetypes.guess_type(rel)[0] or "application/octet-stream"
+        if content_type.startswith("text/") or content_type == "application/javascript":
+            content_type += "; charset=utf-8"
+        if rel == "index.html":
+            cache_control = REVALIDATE
+        elif rel.startswith("assets/") and HASHED_NAME.search(rel):
+            cache_control = IMMUTABLE
+        else:
+            cache_control = SHORT
+        static_file = StaticFile(body, content_type, cache_control)
+
+        if len(body) >= self.min_compress_size and content_type.startswith(COMPRESSIBLE):
+            br = self._read(full + ".br") or _brotli_compress(body)
+            gz = self._read(full + ".gz") or gzip.compress(body, compresslevel=9, mtime=0)
+            for encoding, data in (("br", br), ("gzip", gz)):
+                if data is not None and len(data) < len(body):
+                    static_file.variants[encoding] = data
+        return static_file
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def serve(self, path: str) -> Response:
+        static_file = self.files.get(path)
+        if static_file is None:
+            # Client-side routes (/movie/123) get the app shell; missing
+            # files and unknown API paths stay 404s
+            if path.startswith("api/") or "." in path.rsplit("/", 1)[-1]:
+                return Response("Not Found", 404)
+            static_file = self.files.get("index.html")
+            if static_file is None:
+                return Response("Not Found", 404)
+
+        encoding = None
+        if static_file.variants:
+            accepted = request.accept_encodings
+            encoding = next((e for e in ("br", "gzip") if e in static_file.variants and accepted[e]), None)
+        etag = static_file.etag + (f"-{encoding}" if encoding else "")
+        headers = {"ETag": f'"{etag}"', "Cache-Control": static_file.cache_control}
+        if static_file.variants:
+            headers["Vary"] = "Accept-Encoding"
+
+        if request.if_none_match.contains(etag):
+            return Response(status=304, headers=headers)
+
+        body = static_file.variants[encoding] if encoding else static_file.body
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return Response(body, headers=headers, content_type=static_file.content_type)
@@ -0,0 +1,136 @@
+"""In-memory typeahead index over movie titles and location names.
+
+Suggestions are answered from a sorted array of normalized keys with binary
+search, so a lookup never touches Solr. Every value is also indexed under the
+start of each of its words ("summer" finds "(500) Days of Summer"). The top
+entries for very short prefixes are precomputed, because those prefixes match
+a large slice of the array and are exactly what gets typed first.
+"""
+
+import heapq
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from src.enrichment import parse_title
+from src.text import normalize
+
+MOVIE = "movie"
+LOCATION = "location"
+
+
+class SuggestIndex:
+    """Prefix index over weighted ``(text, type)`` entries."""
+
+    def __init__(self, weights: Dict[Tuple[str, str], int], precompute_depth: int = 3, top_k: int = 20):
+        # Entry tables, referenced by position from the key array
+        self.texts: List[str] = []
+        self.types: List[str] = []
+        self.weights: List[int] = []
+
+        pairs = []
+        for (text, kind), weight in weights.items():
+            entry = len(self.texts)
+            self.texts.append(text)
+            self.types.append(kind)
+            self.weights.append(weight)
+            norm = normalize(text)
+            words = norm.split(" ")
+            for i in range(len(words)):
+                key = " ".join(words[i:])
+                if key:
+                    pairs.append((key, entry))
+
+        pairs.sort()
+        self.keys = [k for k, _ in pairs]
+        self.entries = [e for _, e in pairs]
+
+        self.top_k = top_k
+        self.precompute_depth = precompute_depth
+        self._precomputed: Dict[str, List[int]] = {}
+        for prefix in {k[:n] for k in self.keys for n in range(1, precompute_depth + 1)}:
+            self._precomputed[prefix] = self._rank(self._entries_in_range(prefix), top_k)
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def _entries_in_range(self, prefix: str) -> Iterable[int]:
+        lo = bisect_left(self.keys, prefix)
+        # "\uffff" sorts after every character we keep, closing the prefix range
+        hi = bisect_left(self.keys, prefix + "\uffff", lo)
+        return set(self.entries[lo:hi])
+
+    def _rank(self, entries: Iterable[int], limit: int) -> List[int]:
+        return heapq.nlargest(limit, entries, key=lambda e: (self.weights[e], -len(self.texts[e])))
+
+    def suggest(self, prefix: str, limit: int = 8, kind: Optional[str] = None) -> List[dict]:
+        """Return up to ``limit`` suggestions for ``prefix``, most popular first."""
+        norm = normalize(prefix)
+        if not norm:
+            return []
+
+        if len(norm) <= self.precompute_depth and kind is None and limit <= self.top_k:
+            ranked = self._precomputed.get(norm, [])
+        else:
+            entries = self._entries_in_range(norm)
+            if kind is not None:
+                entries = [e for e in entries if self.types[e] == kind]
+            ranked = self._rank(entries, limit)
+
+        return [
+            {"text": self.texts[e], "type": self.types[e], "weight": self.weights[e]}
+            for e in ranked[:limit]
+        ]
+
+
+def build_suggest_index(records: Iterable[dict]) -> SuggestIndex:
+    """Build a ``SuggestIndex`` from crawled movie records.
+
+    A movie's weight is its number of filming locations; a location's weight
+    is the number of movies filmed there.
+    """
+    weights: Counter = Counter()
+    for record in records:
+        title, _ = parse_title(record.get("title") or "")
+        locations = record.get("locations") or []
+        if title:
+            weights[(title, MOVIE)] += max(len(locations), 1)
+        for name in {(loc.get("name") or "").strip() for loc in locations}:
+            if name:
+                weights[(name, LOCATION)] += 1
+    return SuggestIndex(dict(weights))
+
+
+def build_suggest_index_from_snapshot(snapshot) -> SuggestIndex:
+    """Same as ``build_suggest_index`` but computed on the columns of a ``Snapshot``.
+
+    Weights are counted with NumPy over string ids, so only distinct titles
+    and location names are ever decoded.
+    """
+    weights: Counter = Counter()
+    loc_counts = np.diff(snapshot.column("movie_loc_offsets"))
+
+    titles = np.asarray(snapshot.column("movie_title"))
+    title_weights = np.bincount(titles, weights=np.maximum(loc_counts, 1))
+    for title_id in np.flatnonzero(title_weights):
+        title, _ = parse_title(snapshot.string(title_id))
+        if title:
+            weights[(title, MOVIE)] += int(title_weights[title_id])
+
+    names, inverse = np.unique(np.asarray(snapshot.column("loc_name")), return_inverse=True)
+    # Distinct ids can still be the same name once stripped
+    canonical: Dict[str, int] = {}
+    canon_of_name = np.array(
+        [canonical.setdefault(snapshot.string(n).strip(), len(canonical)) for n in names], dtype=np.int64
+    )
+    if len(canonical):
+        movie_of_loc = np.repeat(np.arange(len(loc_counts), dtype=np.int64), loc_counts)
+        # Each movie counts once per location name
+        pairs = np.unique(movie_of_loc * len(canonical) + canon_of_name[inverse])
+        movies_per_name = np.bincount(pairs % len(canonical), minlength=len(canonical))
+        for name, canon in canonical.items():
+            if name:
+                weights[(name, LOCATION)] += int(movies_per_name[canon])
+    return SuggestIndex(dict(weights))
@@ -0,0 +1,18 @@
+"""Text normalization shared by the in-memory indexes and index-time enrichment."""
+
+import re
+import unicodedata
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and collapse punctuation/whitespace to single spaces."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+
+def slugify(text: str) -> str:
+    """``"(500) Days of Summer"`` -> ``"500-days-of-summer"``."""
+    return normalize(text).replace(" ", "-")
@@ -0,0 +1,82 @@
+"""Offline topic clustering of the indexed corpus.
+
+Instead of asking Solr to run Carrot2 over every search result page, the
+indexer clusters the whole corpus once (TF-IDF + MiniBatchKMeans) and stores
+each document's topic in the ``topic_label`` docValues field. Search then
+gets its clusters from a cheap facet on that field.
+
+scikit-learn is only imported by ``assign_topics``, which runs at index time.
+"""
+
+from typing import Dict, List
+
+TOPIC_FIELDS = ("title", "location_name", "location_description", "content")
+
+
+def _doc_text(doc: dict) -> str:
+    return " ".join(str(doc.get(field) or "") for field in TOPIC_FIELDS)
+
+
+def assign_topics(docs: List[dict], n_topics: int = 24, label_terms: int = 3, random_state: int = 0) -> int:
+    """Cluster ``docs`` and set ``topic_id``/``topic_label`` on each one in place.
+
+    Labels are the highest weighted terms of each cluster centroid, e.g.
+    ``"castle, scotland, edinburgh"``. Returns the number of topics found.
+    """
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    if len(docs) < 2:
+        return 0
+
+    vectorizer = TfidfVectorizer(
+        stop_words="english",
+        # Words only: years and house numbers make poor cluster labels
+        token_pattern=r"(?u)\b[^\W\d_]{2,}\b",
+        max_df=0.5,
+        min_df=2 if len(docs) > 50 else 1,
+        max_features=50000,
+        sublinear_tf=True,
+    )
+    matrix = vectorizer.fit_transform([_doc_text(d) for d in docs])
+    if matrix.shape[1] == 0:
+        return 0
+
+    n_clusters = min(n_topics, len(docs))
+    model = MiniBatchKMeans(
+        n_clusters=n_clusters, random_state=random_state, batch_size=2048, n_init=3
+    )
+    assignments = model.fit_predict(matrix)
+
+    terms = vectorizer.get_feature_names_out()
+    labels = []
+    for centroid in model.cluster_centers_:
+        top = centroid.argsort()[::-1][:label_terms]
+        labels.append(", ".join(terms[i] for i in top))
+
+    for doc, topic in zip(docs, assignments):
+        doc["topic_id"] = int(topic)
+        doc["topic_label"] = labels[topic]
+    return n_clusters
+
+
+def topic_clusters(docs: List[dict], topic_counts: List[dict]) -> List[dict]:
+    """Build the search ``clusters`` payload from a ``topic`` facet and a result page.
+
+    Same shape as the Carrot2 clusters (``labels`` and ``docs``) plus the
+    number of matching documents in the whole result set.
+    """
+    page: Dict[str, List[str]] = {}
+    for doc in docs:
+        label = doc.get("topic_label")
+        if isinstance(label, list):
+            label = label[0] if label else None
+        if label:
+            page.setdefault(label, []).append(doc.get("id"))
+
+    clusters = []
+    for bucket in topic_counts:
+        ids = page.get(bucket["value"])
+        if ids:
+            clusters.append({"labels": [bucket["value"]], "docs": ids, "count": bucket["count"]})
+    return clusters
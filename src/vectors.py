@@ -0,0 +1,192 @@
+"""Dense retrieval with LSA embeddings trained on our own corpus.
+
+At index time documents are embedded with TF-IDF followed by TruncatedSVD
+(no downloaded models) and written to ``artifacts/``:
+
+- ``lsa_model.joblib``: fitted vectorizer + SVD, used to embed queries
+- ``lsa_ids.json``: document ids, the row number is the position
+- ``lsa_vectors.npy``: float16 ``(n, dims)`` unit vectors, memory-mapped
+- ``lsa_centroids.npy`` / ``lsa_list_offsets.npy`` / ``lsa_list_rows.npy``:
+  an IVF index, i.e. k-means centroids and the rows assigned to each one
+  stored contiguously, so an approximate search only scores the rows of the
+  ``nprobe`` closest centroids.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.artifacts import ARTIFACTS_DIR, save_array, save_json
+
+MODEL_FILE = "lsa_model.joblib"
+IDS_FILE = "lsa_ids.json"
+VECTORS_FILE = "lsa_vectors.npy"
+CENTROIDS_FILE = "lsa_centroids.npy"
+OFFSETS_FILE = "lsa_list_offsets.npy"
+ROWS_FILE = "lsa_list_rows.npy"
+
+# Rows scored per block in brute-force search, bounds the float32 temporary
+BLOCK_ROWS = 65536
+
+
+def _doc_text(doc: dict) -> str:
+    return " ".join(
+        str(doc.get(field) or "")
+        for field in ("title", "location_name", "location_address", "location_description", "content")
+    )
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+
+def build_vector_index(
+    docs: List[dict], dims: int = 128, n_lists: Optional[int] = None, out_dir: str = ARTIFACTS_DIR
+) -> int:
+    """Train the LSA model on ``docs`` and write vectors plus the IVF index. Returns rows written."""
+    import joblib
+    from sklearn.cluster import MiniBatchKMeans
+    from sklearn.decomposition import TruncatedSVD
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    if len(docs) < 3:
+        return 0
+    vectorizer = TfidfVectorizer(stop_words="english", sublinear_tf=True, max_features=200000, dtype=np.float32)
+    tfidf = vectorizer.fit_transform([_doc_text(d) for d in docs])
+    dims = max(1, min(dims, tfidf.shape[1] - 1, len(docs) - 1))
+    svd = TruncatedSVD(n_components=dims, random_state=0)
+    vectors = _normalize_rows(svd.fit_transform(tfidf).astype(np.float32))
+
+    # Roughly sqrt(n) lists keeps both the centroid scan and each list small
+    n_lists = n_lists or max(1, min(int(np.sqrt(len(docs))), 4096))
+    kmeans = MiniBatchKMeans(n_clusters=n_lists, random_state=0, batch_size=4096, n_init=3)
+    assignments = kmeans.fit_predict(vectors)
+    centroids = _normalize_rows(kmeans.cluster_centers_.astype(np.float32))
+    rows = np.argsort(assignments, kind="stable").astype(np.int32)
+    offsets = np.zeros(n_lists + 1, dtype=np.int64)
+    np.cumsum(np.bincount(assignments, minlength=n_lists), out=offsets[1:])
+
+    os.makedirs(out_dir, exist_ok=True)
+    model_path = os.path.join(out_dir, MODEL_FILE)
+    joblib.dump({"vectorizer": vectorizer, "svd": svd}, model_path + ".tmp")
+    os.replace(model_path + ".tmp", model_path)
+    # The API may have the old arrays mapped: replace the files, never rewrite them
+    save_array(os.path.join(out_dir, VECTORS_FILE), vectors.astype(np.float16))
+    save_array(os.path.join(out_dir, CENTROIDS_FILE), centroids)
+    save_array(os.path.join(out_dir, OFFSETS_FILE), offsets)
+    save_array(os.path.join(out_dir, ROWS_FILE), rows)
+    save_json(os.path.join(out_dir, IDS_FILE), [d["id"] for d in docs])
+    return len(docs)
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the ``k`` largest scores, best first."""
+    if len(scores) > k:
+        top = np.argpartition(-scores, k)[:k]
+    else:
+        top = np.arange(len(scores))
+    return top[np.argsort(-scores[top], kind="stable")]
+
+
+class VectorIndex:
+    """Query-side view over the artifacts written by ``build_vector_index``."""
+
+    def __init__(self, model: dict, ids: List[str], vectors, centroids, offsets, rows):
+        self.vectorizer = model["vectorizer"]
+        self.svd = model["svd"]
+        self.ids = ids
+        self.vectors = vectors
+        self.centroids = centroids
+        self.offsets = offsets
+        self.rows = rows
+
+    @classmethod
+    def load(cls, directory: str = ARTIFACTS_DIR) -> Optional["VectorIndex"]:
+        """Load the model and memory-map the vectors; ``None`` if never built or unreadable."""
+        import pickle
+
+        import joblib
+
+        try:
+            model = joblib.load(os.path.join(directory, MODEL_FILE))
+            with open(os.path.join(directory, IDS_FILE), "r", encoding="utf-8") as f:
+                ids = json.load(f)
+            arrays = [
+                np.load(os.path.join(directory, name), mmap_mode="r")
+                for name in (VECTORS_FILE, CENTROIDS_FILE, OFFSETS_FILE, ROWS_FILE)
+            ]
+        except FileNotFoundError:
+            return None
+        except (
+            OSError, ValueError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, IndexError, KeyError
+        ) as e:
+            # Truncated or written by an incompatible scikit-learn: serve without it
+            print(f"Could not load the vector index from {directory}: {e!r}")
+            return None
+        return cls(model, ids, *arrays)
+
+    def embed(self, text: str) -> np.ndarray:
+        vector = self.svd.transform(self.vectorizer.transform([text]))[0].astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def search_exact(self, query: np.ndarray, k: int = 10) -> List[Tuple[str, float]]:
+        """Brute-force cosine top-k over every vector, block by block."""
+        best_rows, best_scores = [], []
+        for start in range(0, len(self.vectors), BLOCK_ROWS):
+            scores = self.vectors[start : start + BLOCK_ROWS].astype(np.float32) @ query
+            top = _top_k(scores, k)
+            best_rows.append(top + start)
+            best_scores.append(scores[top])
+        rows, scores = np.concatenate(best_rows), np.concatenate(best_scores)
+        top = _top_k(scores, k)
+        return [(self.ids[rows[i]], float(scores[i])) for i in top]
+
+    def search_ivf(self, query: np.ndarray, k: int = 10, nprobe: int = 8) -> List[Tuple[str, float]]:
+        """Approximate top-k scoring only the lists of the ``nprobe`` nearest centroids."""
+        lists = _top_k(self.centroids @ query, nprobe)
+        # Sorted rows turn the gather into mostly sequential reads of the memory map
+        candidates = np.sort(
+            np.concatenate([self.rows[self.offsets[i] : self.offsets[i + 1]] for i in lists])
+        )
+        if not len(candidates):
+            return []
+        scores = self.vectors[candidates].astype(np.float32) @ query
+        top = _top_k(scores, k)
+        return [(self.ids[candidates[i]], float(scores[i])) for i in top]
+
+    def search(self, text: str, k: int = 10, exact: bool = False, nprobe: int = 8) -> List[Tuple[str, float]]:
+        query = self.embed(text)
+        if not query.any():
+            return []
+        return self.search_exact(query, k) if exact else self.search_ivf(query, k, nprobe)
+
+
+def fuse_scores(
+    keyword: List[Tuple[str, float]], vector: List[Tuple[str, float]], alpha: float = 0.5
+) -> List[Tuple[str, float]]:
+    """Hybrid ranking: ``alpha * vector + (1 - alpha) * keyword`` after min-max scaling.
+
+    BM25 scores are unbounded and cosine scores are not, so each list is
+    scaled to [0, 1] first. A document missing from one list gets 0 there.
+    """
+
+    def scaled(hits: List[Tuple[str, float]]) -> Dict[str, float]:
+        if not hits:
+            return {}
+        values = [score for _, score in hits]
+        lo, hi = min(values), max(values)
+        if hi == lo:
+            return {doc_id: 1.0 for doc_id, _ in hits}
+        return {doc_id: (score - lo) / (hi - lo) for doc_id, score in hits}
+
+    kw, vec = scaled(keyword), scaled(vector)
+    fused = {
+        doc_id: alpha * vec.get(doc_id, 0.0) + (1 - alpha) * kw.get(doc_id, 0.0)
+        for doc_id in list(kw) + list(vec)
+    }
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
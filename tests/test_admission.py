@@ -0,0 +1,42 @@
+"""Rate limiter and concurrency limiter."""
+
+from src.admission import ConcurrencyLimiter, RateLimiter, retry_after_header
+
+
+def test_bucket_allows_a_burst_then_reports_the_wait():
+    limiter = RateLimiter(rate=2, burst=5)
+    assert all(limiter.take("client") == 0 for _ in range(5))
+    wait = limiter.take("client", cost=2)
+    assert 0.5 < wait <= 1.0
+    assert limiter.take("other") == 0
+    assert limiter.stats()["rejected"] == 1
+
+
+def test_costs_are_weighted():
+    limiter = RateLimiter(rate=1, burst=10)
+    assert limiter.take("client", cost=9.5) == 0
+    assert limiter.take("client", cost=1) > 0
+    assert limiter.take("client", cost=0.2) == 0
+
+
+def test_oldest_clients_are_evicted():
+    limiter = RateLimiter(rate=1, burst=1, max_clients=2)
+    for client in ("a", "b", "c"):
+        limiter.take(client)
+    assert limiter.stats()["clients"] == 2
+    # "a" was evicted and starts over with a full bucket
+    assert limiter.take("a") == 0
+
+
+def test_concurrency_limiter_sheds_beyond_the_queue():
+    slots = ConcurrencyLimiter(max_concurrent=2, max_queued=0)
+    assert slots.acquire() and slots.acquire()
+    assert not slots.acquire()
+    slots.release()
+    assert slots.acquire()
+    assert slots.stats()["rejected"] == 1
+
+
+def test_retry_after_is_at_least_one_second():
+    assert retry_after_header(0.01) == "1"
+    assert retry_after_header(2.1) == "3"
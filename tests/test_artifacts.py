@@ -0,0 +1,71 @@
+"""Index version tracking and versioned resources."""
+
+import threading
+import time
+
+import pytest
+
+import src.artifacts
+from src.artifacts import VersionedResource, bump_index_version
+
+
+@pytest.fixture(autouse=True)
+def artifacts_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(src.artifacts, "ARTIFACTS_DIR", str(tmp_path))
+
+
+def test_reloads_when_the_version_changes():
+    builds = []
+    resource = VersionedResource(lambda: builds.append(1) or len(builds), check_interval=0)
+    assert resource.get() == 1
+    assert resource.get() == 1
+    bump_index_version()
+    assert resource.get() == 2
+
+
+def test_background_reload_keeps_serving_the_old_value():
+    release = threading.Event()
+    builds = []
+
+    def loader():
+        if builds:
+            release.wait(5)
+        builds.append(1)
+        return len(builds)
+
+    resource = VersionedResource(loader, check_interval=0, background=True)
+    assert resource.get() == 1
+    version = bump_index_version()
+    started = time.monotonic()
+    assert resource.get() == 1
+    assert resource.get() == 1
+    assert time.monotonic() - started < 1
+    release.set()
+    deadline = time.monotonic() + 5
+    while resource.version != version and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert resource.get() == 2
+    # Only one rebuild was started for the version change
+    assert len(builds) == 2
+
+
+def test_failed_background_reload_keeps_the_old_value():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        if len(calls) == 2:
+            raise RuntimeError("data file half written")
+        return len(calls)
+
+    resource = VersionedResource(loader, check_interval=0, background=True)
+    assert resource.get() == 1
+    bump_index_version()
+    resource.get()
+    deadline = time.monotonic() + 5
+    while len(calls) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+        resource.get()
+    while resource.get() != 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert resource.get() == 3
@@ -0,0 +1,40 @@
+"""/api/batch: body validation and per-sub-query admission."""
+
+import pytest
+
+import src.api
+from src.api import create_app
+
+
+def make_client(tmp_path):
+    # prefork: no warm-up thread, nothing talks to Solr at startup
+    return create_app(static_folder=str(tmp_path), prefork=True).test_client()
+
+
+@pytest.mark.parametrize("body", [[{"type": "search"}], "search", 3, None])
+def test_body_must_be_an_object(tmp_path, body):
+    response = make_client(tmp_path).post("/api/batch", json=body)
+    assert response.status_code == 400
+
+
+def test_bad_sub_queries_fail_on_their_own(tmp_path):
+    client = make_client(tmp_path)
+    response = client.post(
+        "/api/batch",
+        json={"queries": ["search", {"type": "nope"}, {"type": "mlt", "params": ["q"]}, {"id": "m", "type": "mlt"}]},
+    )
+    assert response.status_code == 200
+    results = response.get_json()["results"]
+    assert [r["status"] for r in results] == [400, 400, 400, 400]
+    assert results[3]["id"] == "m"
+    assert client.get("/api/metrics").get_json()["concurrency"]["in_flight"] == 0
+
+
+def test_each_sub_query_takes_a_query_slot(tmp_path, monkeypatch):
+    monkeypatch.setattr(src.api, "MAX_CONCURRENT_QUERIES", 0)
+    monkeypatch.setattr(src.api, "MAX_QUEUED_QUERIES", 0)
+    client = make_client(tmp_path)
+    response = client.post("/api/batch", json={"queries": [{"type": "mlt"}, {"type": "browse"}]})
+    # The batch itself is admitted, its sub-queries are shed
+    assert response.status_code == 200
+    assert [r["status"] for r in response.get_json()["results"]] == [429, 429]
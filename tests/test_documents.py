@@ -0,0 +1,73 @@
+"""Crawled records -> Solr documents, with and without a snapshot."""
+
+import json
+
+import pytest
+
+import src.documents
+from src.documents import transform_files
+from src.snapshot import Snapshot, build_snapshot
+
+RECORDS = [
+    {
+        "url": "https://example.com/a",
+        "title": "Alpha | 1999",
+        "text_content": "About Alpha",
+        "image": "a.jpg",
+        "locations": [
+            {"name": "Tower", "address": "Tower, London, Greater London, England, United Kingdom", "latitude": 51.5, "longitude": -0.07},
+            {"name": "Beach", "descriptions": ["First visit.", "Second visit."], "latitude": "34.0", "longitude": "-118.5"},
+            {"name": None, "latitude": 0, "longitude": 0},
+            {"name": "Nowhere", "latitude": "n/a", "longitude": 3},
+        ],
+    },
+    # No URL: ids fall back to the document's position in the file
+    {"title": "Beta (2005)", "locations": [{"name": "Bridge", "description": "Río Tajo", "latitude": 39.8, "longitude": -4.0}]},
+    {"title": "Gamma", "text_content": "No locations at all"},
+    {"url": "https://example.com/d", "title": "Delta | 2010", "locations": []},
+]
+
+
+def write_ndjson(path, records):
+    path.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def data_files(tmp_path):
+    return [
+        write_ndjson(tmp_path / "one.json", RECORDS * 3),
+        write_ndjson(tmp_path / "two.json", list(reversed(RECORDS))),
+    ]
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_snapshot_gives_the_same_documents(tmp_path, data_files, monkeypatch, workers):
+    # Several chunks per file, so chunk offsets matter for the fallback ids
+    monkeypatch.setattr(src.documents, "CHUNK_RECORDS", 3)
+    build_snapshot(data_files, str(tmp_path / "snapshot"))
+    snapshot = Snapshot.load(str(tmp_path / "snapshot"))
+
+    from_files = transform_files(data_files, workers=workers)
+    from_snapshot = transform_files(data_files, snapshot=snapshot, workers=workers)
+    assert from_snapshot == from_files
+    fallback_ids = [doc["id"] for doc in from_files[0][1] if not doc["id"].startswith("https://")]
+    assert fallback_ids == ["loc_4", "movie_5", "loc_11", "movie_12", "loc_18", "movie_19"]
+
+
+def test_a_bad_file_does_not_disturb_the_others(tmp_path, monkeypatch):
+    monkeypatch.setattr(src.documents, "CHUNK_RECORDS", 2)
+    good = [write_ndjson(tmp_path / "good1.json", RECORDS * 2), write_ndjson(tmp_path / "good2.json", RECORDS)]
+    # Fails in a worker: "locations" is not a list
+    corrupt = write_ndjson(tmp_path / "corrupt.json", RECORDS + [{"title": "Bad", "locations": 5}] + RECORDS)
+    unreadable = str(tmp_path / "missing.json")
+    files = [good[0], corrupt, unreadable, good[1]]
+
+    expected = [transform_files([path], workers=1)[0] for path in good]
+    results = transform_files(files, workers=2)
+    assert [path for path, _ in results] == files
+    assert results[1][1] == [] and results[2][1] == []
+    for (path, docs), (expected_path, expected_docs) in zip([results[0], results[3]], expected):
+        assert path == expected_path
+        assert [doc["id"] for doc in docs] == [doc["id"] for doc in expected_docs]
+        assert docs == expected_docs
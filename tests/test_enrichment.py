@@ -0,0 +1,68 @@
+"""City and country from geocoded addresses."""
+
+import pytest
+
+from src.enrichment import country_name, parse_address
+
+
+@pytest.mark.parametrize(
+    "address, expected",
+    [
+        (
+            "Shakespeare, Leicester Square, Mayfair, City of Westminster, Greater London, England, WC2H 7DE, United Kingdom",
+            ("London", "United Kingdom"),
+        ),
+        (
+            "Stage 16, Studio City Neighborhood Council District, Los Angeles, Los Angeles County, California, 91604, United States",
+            ("Los Angeles", "United States"),
+        ),
+        ("Davidstraße, Bogenhausen, München, Bayern, 81927, Deutschland", ("München", "Germany")),
+        ("Viale dei Quattro Venti, Roma, Roma Capitale, Lazio, 00152, Italia", ("Roma", "Italy")),
+        ("Madrid, Comunidad de Madrid, España", ("Madrid", "Spain")),
+        ("Пресненский район, Москва, Центральный федеральный округ, 123104, Россия", ("Москва", "Russia")),
+        ("Burlington Gardens, Dublin, County Dublin, Leinster, Éire / Ireland", ("Dublin", "Ireland")),
+        ("Amsterdam, Noord-Holland, Nederland, 1171 PE, Nederland", ("Amsterdam", "Netherlands")),
+    ],
+)
+def test_city_and_country(address, expected):
+    assert parse_address(address) == expected
+
+
+@pytest.mark.parametrize(
+    "address, city",
+    [
+        (
+            "Quartier des Champs-Élysées, Paris 8e Arrondissement, Paris, Île-de-France, France métropolitaine, France",
+            "Paris",
+        ),
+        ("Garden District, Toronto Centre, Toronto, Golden Horseshoe, Ontario, M5B 1Z2, Canada", "Toronto"),
+        ("New Orleans, Orleans Parish, Louisiana, United States", "New Orleans"),
+        ("Praha, obvod Praha 1, Hlavní město Praha, Praha, Česko", "Praha"),
+    ],
+)
+def test_admin_regions_are_not_the_city(address, city):
+    assert parse_address(address)[0] == city
+
+
+@pytest.mark.parametrize(
+    "address",
+    ["Canadian Building, 432 South Main Street", "Orpheum Theatre, 849 South Broadway", "Lake Avenue, Pasadena", "Main Street"],
+)
+def test_addresses_without_a_known_country_yield_nothing(address):
+    assert parse_address(address) == (None, None)
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("USA", "United States"),
+        ("Deutschland", "Germany"),
+        ("Česko", "Czechia"),
+        ("België / Belgique / Belgien", "Belgium"),
+        ("Κύπρος - Kıbrıs", "Cyprus"),
+        ("Schweiz/Suisse/Svizzera/Svizra", "Switzerland"),
+        ("South Broadway", None),
+    ],
+)
+def test_country_name(name, expected):
+    assert country_name(name) == expected
@@ -0,0 +1,122 @@
+"""Export serialization, cursor paging and the /api/export endpoint."""
+
+import csv
+import gzip
+import io
+import json
+from types import SimpleNamespace
+
+import pytest
+
+import src.export
+from src.api import create_app
+from src.export import csv_lines, gzip_stream, ndjson_lines
+from src.indexer import Indexer
+
+DOCS = [
+    {"id": "a", "title": "Tower, London", "year": 1999, "city": ["London"], "url": "https://x/a"},
+    {"id": "b", "title": 'Say "hi"', "country": ["Italy", "France"]},
+    {"id": "c", "title": "Château"},
+]
+
+
+@pytest.fixture
+def client(tmp_path):
+    # prefork: no warm-up thread, nothing talks to Solr at startup
+    return create_app(static_folder=str(tmp_path), prefork=True).test_client()
+
+
+def exports_in_flight(client):
+    return client.get("/api/metrics").get_json()["exports"]["in_flight"]
+
+
+@pytest.mark.parametrize("limit", ["-1", "0", "ten"])
+def test_bad_limit_is_rejected_without_taking_a_slot(client, limit):
+    response = client.get(f"/api/export?limit={limit}")
+    assert response.status_code == 400
+    assert exports_in_flight(client) == 0
+
+
+def test_limit_cuts_the_stream_and_the_slot_is_released(client, monkeypatch):
+    docs = [{"id": str(i), "title": f"t{i}"} for i in range(10)]
+    monkeypatch.setattr(Indexer, "export", lambda self, **kwargs: iter(docs))
+    response = client.get("/api/export?fields=id&limit=3")
+    assert response.get_data() == b'{"id":"0"}\n{"id":"1"}\n{"id":"2"}\n'
+    response.close()
+    assert exports_in_flight(client) == 0
+
+
+def test_slot_is_released_when_the_export_cannot_start(client, monkeypatch):
+    def broken(self, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(Indexer, "export", broken)
+    assert client.get("/api/export").status_code == 500
+    assert exports_in_flight(client) == 0
+
+
+def test_ndjson_lines(monkeypatch):
+    monkeypatch.setattr(src.export, "CHUNK_DOCS", 2)
+    chunks = list(ndjson_lines(iter(DOCS), ["id", "city", "country"]))
+    assert len(chunks) == 2
+    lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    # Single-element lists are unwrapped, longer ones joined; absent fields left out
+    assert lines == [{"id": "a", "city": "London"}, {"id": "b", "country": "Italy; France"}, {"id": "c"}]
+
+
+def test_csv_lines(monkeypatch):
+    monkeypatch.setattr(src.export, "CHUNK_DOCS", 2)
+    chunks = list(csv_lines(iter(DOCS), ["id", "title", "year"]))
+    assert len(chunks) == 2
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert rows == [["id", "title", "year"], ["a", "Tower, London", "1999"], ["b", 'Say "hi"', ""], ["c", "Château", ""]]
+    # Headers only for an empty export
+    assert b"".join(csv_lines(iter([]), ["id"])) == b"id\r\n"
+
+
+def test_gzip_stream_is_one_member_flushed_per_chunk():
+    chunks = [b"one\n" * 50, b"two\n" * 50]
+    parts = list(gzip_stream(iter(chunks)))
+    assert len(parts) == 3
+    assert gzip.decompress(b"".join(parts)) == b"".join(chunks)
+
+
+def test_cursor_paging_reads_every_page(monkeypatch):
+    pages = {"*": (DOCS[:2], "c1"), "c1": (DOCS[2:], "c2"), "c2": ([], "c2")}
+    calls = []
+
+    def search(self, q, **params):
+        calls.append(params)
+        docs, next_cursor = pages[params["cursorMark"]]
+        return SimpleNamespace(docs=docs, nextCursorMark=next_cursor)
+
+    monkeypatch.setattr(Indexer, "_search", search)
+    indexer = Indexer(solr_url="http://localhost:1/solr/movies")
+    docs = indexer.export(query="tower", filters=["year:[1990 TO *]"], fields=["id", "title"], page_size=2)
+    assert [d["id"] for d in docs] == ["a", "b", "c"]
+    assert [c["cursorMark"] for c in calls] == ["*", "c1", "c2"]
+    assert all(c["sort"] == "id asc" and c["rows"] == 2 and c["fl"] == "id,title" for c in calls)
+    assert calls[0]["fq"] == ["year:[1990 TO *]"]
+
+
+def test_export_endpoint_streams_gzip_csv(client, monkeypatch):
+    seen = {}
+
+    def export(self, **kwargs):
+        seen.update(kwargs)
+        return iter(DOCS)
+
+    monkeypatch.setattr(Indexer, "export", export)
+    response = client.get("/api/export?format=csv&fields=id,title&country=Italy", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="export.csv"'
+    assert response.headers["Cache-Control"] == "no-store"
+    assert gzip.decompress(response.get_data()).decode("utf-8").splitlines()[:2] == ["id,title", 'a,"Tower, London"']
+    assert seen == {"query": None, "filters": ["{!term f=country}Italy"], "fields": ["id", "title"]}
+    response.close()
+    assert exports_in_flight(client) == 0
+
+
+def test_unknown_format_or_field_is_rejected(client):
+    assert client.get("/api/export?format=xml").status_code == 400
+    assert client.get("/api/export?fields=id,secret").status_code == 400
@@ -0,0 +1,74 @@
+"""Facet definitions, response parsing and the /api/facets filters."""
+
+import json
+from types import SimpleNamespace
+
+from src.api import create_app
+from src.facets import FACETS, facet_names, json_facet_param, parse_facets
+from src.indexer import Indexer
+
+
+def test_facet_names():
+    assert facet_names(None) == [] and facet_names("") == []
+    assert facet_names("country, city,unknown") == ["country", "city"]
+    assert facet_names("city,all") == list(FACETS)
+
+
+def test_json_facet_param_is_stable():
+    param = json_facet_param(["decade", "country"])
+    assert json.loads(param) == {"decade": FACETS["decade"], "country": FACETS["country"]}
+    # Same clause text for the same facets, whatever the order
+    assert param == json_facet_param(["country", "decade"])
+
+
+def test_parse_facets():
+    raw = {
+        "count": 12,
+        "country": {"buckets": [{"val": "France", "count": 7}, {"val": "Italy", "count": 5}]},
+        "decade": {"buckets": [{"val": 1990, "count": 4}, {"val": 2000.0, "count": 8}]},
+    }
+    assert parse_facets(raw, ["country", "decade", "city"]) == {
+        "country": [{"value": "France", "count": 7}, {"value": "Italy", "count": 5}],
+        "decade": [{"value": "1990s", "count": 4}, {"value": "2000s", "count": 8}],
+        "city": [],
+    }
+    assert parse_facets(None, ["source"]) == {"source": []}
+
+
+def test_facet_counts_send_filters_and_no_rows(monkeypatch):
+    calls = []
+
+    def search(self, q, **params):
+        calls.append((q, params))
+        return SimpleNamespace(raw_response={"facets": {"city": {"buckets": [{"val": "Roma", "count": 2}]}}})
+
+    monkeypatch.setattr(Indexer, "_search", search)
+    indexer = Indexer(solr_url="http://localhost:1/solr/movies")
+    counts = indexer.facet_counts(filters=["{!term f=country}Italy"], facets=["city"])
+    assert counts == {"city": [{"value": "Roma", "count": 2}]}
+    q, params = calls[0]
+    assert q == "*:*"
+    assert params["rows"] == 0
+    assert params["fq"] == ["{!term f=country}Italy"]
+    assert json.loads(params["json.facet"]) == {"city": FACETS["city"]}
+
+
+def test_facets_endpoint_uses_the_table_only_when_unfiltered(tmp_path, monkeypatch):
+    calls = []
+
+    def facet_counts(self, query=None, filters=None, facets=None):
+        calls.append((query, filters, facets))
+        return {name: [{"value": "x", "count": 1}] for name in facets or FACETS}
+
+    monkeypatch.setattr(Indexer, "facet_counts", facet_counts)
+    client = create_app(static_folder=str(tmp_path), prefork=True).test_client()
+
+    assert client.get("/api/facets?facets=country").get_json() == {"facets": {"country": [{"value": "x", "count": 1}]}}
+    client.get("/api/facets?facets=country")
+    # Built once for the whole table
+    assert calls == [(None, None, None)]
+
+    client.get("/api/facets?facets=city&country=Italy&year_from=1990")
+    assert calls[-1] == (None, ["{!term f=country}Italy", "year:[1990 TO *]"], ["city"])
+    client.get("/api/facets?q=castle&facets=all")
+    assert calls[-1] == ("castle", [], list(FACETS))
@@ -0,0 +1,89 @@
+"""Polygon and route-corridor geometry."""
+
+import json
+import math
+
+import numpy as np
+import pytest
+
+from src.geo import (
+    KM_PER_DEGREE,
+    corridor_matches,
+    doc_coordinates,
+    parse_polygon,
+    parse_route,
+    points_in_polygons,
+    route_boxes,
+)
+
+SQUARE = [[0, 0], [10, 0], [10, 10], [0, 10], [0, 0]]  # [lon, lat]
+HOLE = [[4, 4], [6, 4], [6, 6], [4, 6], [4, 4]]
+
+
+def test_polygon_with_hole():
+    polygons = parse_polygon({"type": "Polygon", "coordinates": [SQUARE, HOLE]})
+    lat = np.array([1.0, 5.0, 11.0, 9.9])
+    lon = np.array([1.0, 5.0, 5.0, 9.9])
+    assert points_in_polygons(lat, lon, polygons).tolist() == [True, False, False, True]
+
+
+def test_multipolygon_feature_from_json():
+    far = [[20, 20], [21, 20], [21, 21], [20, 21]]
+    feature = {"type": "Feature", "geometry": {"type": "MultiPolygon", "coordinates": [[SQUARE], [far]]}}
+    polygons = parse_polygon(json.dumps(feature))
+    assert len(polygons) == 2
+    assert points_in_polygons(np.array([20.5]), np.array([20.5]), polygons).tolist() == [True]
+
+
+@pytest.mark.parametrize(
+    "value",
+    ["not json", {"type": "Point", "coordinates": [0, 0]}, {"type": "Polygon", "coordinates": [[[0, 0], [1, 1]]]}],
+)
+def test_invalid_polygons(value):
+    with pytest.raises(ValueError):
+        parse_polygon(value)
+
+
+def test_route_formats():
+    assert parse_route("51.5,-0.1; 52.2,0.1").tolist() == [[51.5, -0.1], [52.2, 0.1]]
+    line = '{"type": "LineString", "coordinates": [[-0.1, 51.5], [0.1, 52.2]]}'
+    assert parse_route(line).tolist() == [[51.5, -0.1], [52.2, 0.1]]
+    with pytest.raises(ValueError):
+        parse_route("51.5,-0.1")
+    with pytest.raises(ValueError):
+        parse_route("95,0;96,0")
+
+
+def test_corridor_matches_brute_force():
+    route = np.array([[50.0, 0.0], [50.0, 1.0], [51.0, 1.0]])
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(49.8, 51.2, 500)
+    lon = rng.uniform(-0.2, 1.2, 500)
+    keep, distance, along, length = corridor_matches(lat, lon, route, width_km=10)
+
+    def to_segment(p_lat, p_lon, a, b):
+        scale = KM_PER_DEGREE * math.cos(math.radians((a[0] + b[0]) / 2))
+        ax, ay, bx, by = a[1] * scale, a[0] * KM_PER_DEGREE, b[1] * scale, b[0] * KM_PER_DEGREE
+        px, py = p_lon * scale, p_lat * KM_PER_DEGREE
+        t = max(0.0, min(1.0, ((px - ax) * (bx - ax) + (py - ay) * (by - ay)) / ((bx - ax) ** 2 + (by - ay) ** 2)))
+        return math.hypot(px - ax - t * (bx - ax), py - ay - t * (by - ay))
+
+    expected = {
+        i for i in range(len(lat)) if min(to_segment(lat[i], lon[i], route[j], route[j + 1]) for j in range(2)) <= 10
+    }
+    assert set(keep.tolist()) == expected
+    assert (np.diff(along) >= 0).all()
+    assert length == pytest.approx(KM_PER_DEGREE * math.cos(math.radians(50)) + KM_PER_DEGREE, rel=1e-6)
+
+
+def test_route_boxes_are_bounded():
+    route = np.column_stack([np.linspace(40, 50, 200), np.linspace(0, 10, 200)])
+    boxes = route_boxes(route, width_km=5)
+    assert len(boxes) <= 32
+    assert boxes[0][0] < 40 and boxes[-1][2] > 50
+
+
+def test_doc_coordinates_handle_missing_and_lists():
+    lat, lon = doc_coordinates([{"location_pt": "1.5,2.5"}, {"location_pt": ["3,4"]}, {}])
+    assert lat[:2].tolist() == [1.5, 3.0] and lon[:2].tolist() == [2.5, 4.0]
+    assert math.isnan(lat[2])
@@ -0,0 +1,51 @@
+"""ETag/If-None-Match on the cached API endpoints."""
+
+import time
+
+import pytest
+
+import src.artifacts
+from src.api import create_app
+from src.indexer import Indexer
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(src.artifacts, "ARTIFACTS_DIR", str(tmp_path / "artifacts"))
+    monkeypatch.setattr(Indexer, "facet_counts", lambda self, **kwargs: {"country": [["France", 3]]})
+    # prefork: no warm-up thread, nothing talks to Solr at startup
+    return create_app(static_folder=str(tmp_path), prefork=True).test_client()
+
+
+def test_matching_if_none_match_gets_a_304(client):
+    response = client.get("/api/facets?facets=country")
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"].startswith("public")
+
+    again = client.get("/api/facets?facets=country", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["ETag"] == etag
+    assert again.get_data() == b""
+
+
+def test_different_params_get_a_different_etag(client):
+    etags = {
+        client.get(f"/api/facets?{query}").headers["ETag"]
+        for query in ("facets=country", "facets=city", "facets=country&facets=city", "facets=city&facets=country")
+    }
+    assert len(etags) == 4
+    # Reordering different parameter names keeps the tag
+    assert client.get("/api/facets?facets=country&x=1").headers["ETag"] == client.get(
+        "/api/facets?x=1&facets=country"
+    ).headers["ETag"]
+
+
+def test_reindexing_invalidates_the_etag(client):
+    etag = client.get("/api/facets?facets=country").headers["ETag"]
+    src.artifacts.bump_index_version()
+    # The version file is checked at most once a second
+    time.sleep(1.1)
+    response = client.get("/api/facets?facets=country", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
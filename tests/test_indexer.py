@@ -0,0 +1,23 @@
+"""Indexer read helpers."""
+
+from types import SimpleNamespace
+
+from src.indexer import Indexer
+
+
+def test_get_documents_keeps_ids_with_commas_whole(monkeypatch):
+    ids = ["https://example.com/a,b__loc_0", "movie_3", "https://example.com/c__loc_1"]
+    calls = []
+
+    def search(self, q, **params):
+        calls.append((q, params))
+        # Solr splits the value on the separator named in the local params
+        local_params, _, value = q.partition("}")
+        separator = local_params.split("separator='")[1][0]
+        return SimpleNamespace(docs=[{"id": doc_id} for doc_id in reversed(value.split(separator))])
+
+    monkeypatch.setattr(Indexer, "_search", search)
+    indexer = Indexer(solr_url="http://localhost:1/solr/movies")
+    assert [doc["id"] for doc in indexer.get_documents(ids, fq=["year:[2000 TO *]"])] == ids
+    assert calls[0][1] == {"rows": 3, "fq": ["year:[2000 TO *]"]}
+    assert indexer.get_documents([]) == []
@@ -0,0 +1,64 @@
+"""Precomputed more-like-this table."""
+
+import numpy as np
+
+from src.artifacts import save_array
+from src.neighbors import NeighborTable, build_neighbor_table
+
+
+def corpus(n):
+    topics = ["castle tower scotland", "beach surf california", "bridge river london"]
+    return [{"id": f"d{i}", "title": f"{topics[i % 3]} {i}", "content": topics[i % 3]} for i in range(n)]
+
+
+def test_neighbors_share_a_topic(tmp_path):
+    assert build_neighbor_table(corpus(30), k=5, chunk_size=7, out_dir=str(tmp_path)) == 30
+    table = NeighborTable.load(str(tmp_path))
+    similar = table.similar("d0", count=5)
+    assert len(similar) == 5
+    assert all(int(doc_id[1:]) % 3 == 0 for doc_id, _ in similar)
+    assert "d0" not in dict(similar)
+    assert [score for _, score in similar] == sorted((score for _, score in similar), reverse=True)
+
+
+def test_missing_table_loads_as_none(tmp_path):
+    assert NeighborTable.load(str(tmp_path)) is None
+
+
+def test_rebuild_keeps_loaded_tables_readable(tmp_path):
+    build_neighbor_table(corpus(300), k=5, out_dir=str(tmp_path))
+    old = NeighborTable.load(str(tmp_path))
+    expected = old.similar("d299")
+    # A smaller corpus used to truncate the file under the old memory map
+    build_neighbor_table(corpus(10), k=5, out_dir=str(tmp_path))
+    assert old.similar("d299") == expected
+    assert len(NeighborTable.load(str(tmp_path)).ids) == 10
+
+
+def test_save_array_replaces_the_file(tmp_path):
+    path = str(tmp_path / "a.npy")
+    save_array(path, np.arange(1000))
+    mapped = np.load(path, mmap_mode="r")
+    save_array(path, np.arange(3))
+    assert int(mapped[999]) == 999
+    assert np.load(path).tolist() == [0, 1, 2]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.npy"]
+
+
+def test_chunks_match_a_brute_force_ranking(tmp_path):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    from src.neighbors import _doc_text
+
+    docs = corpus(40)
+    # A budget this small forces one-row chunks
+    build_neighbor_table(docs, k=50, workers=2, memory_budget=1, out_dir=str(tmp_path))
+    table = NeighborTable.load(str(tmp_path))
+    assert table.neighbors.shape == (40, 50)
+
+    matrix = TfidfVectorizer(stop_words="english", sublinear_tf=True).fit_transform([_doc_text(d) for d in docs])
+    sims = (matrix @ matrix.T).toarray()
+    for row in (0, 17, 39):
+        expected = {f"d{col}" for col in np.flatnonzero(sims[row] > 1e-6) if col != row}
+        assert {doc_id for doc_id, _ in table.similar(f"d{row}", count=50)} == expected
+    assert table.neighbors[0, 39:].tolist() == [-1] * 11
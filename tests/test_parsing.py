@@ -0,0 +1,52 @@
+"""The lxml crawler parsers against the BeautifulSoup code they replaced."""
+
+import glob
+import os
+import sys
+
+import pytest
+
+CRAWLER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "crawler")
+sys.path.insert(0, CRAWLER_DIR)
+
+from bench_parsing import PARSERS  # noqa: E402
+from parsing import parse_ca_title, parse_ml_movie  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "parsing")
+
+
+def fixture_cases():
+    for kind, parsers in PARSERS.items():
+        for path in sorted(glob.glob(os.path.join(FIXTURES, f"{kind}_*.html"))):
+            yield pytest.param(kind, path, id=os.path.basename(path))
+
+
+@pytest.mark.parametrize("kind, path", list(fixture_cases()))
+def test_new_parsers_match_the_old_output(kind, path):
+    with open(path, "r", encoding="utf-8") as f:
+        page = f.read()
+    # First the old html.parser soup, last the parser the crawlers use now;
+    # the SoupStrainer variants in between only exist for the benchmark
+    (_, old), *_, (_, new) = PARSERS[kind]
+    assert new(page) == old(page)
+
+
+def read(name):
+    with open(os.path.join(FIXTURES, name), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_movie_page_fields():
+    movie = parse_ml_movie(read("ml_movie_tenet.html"))
+    assert movie["title"] == "Tenet | 2020"
+    assert movie["image_src"] == "/movies/t/Tenet-poster.jpg"
+    assert [loc["name"] for loc in movie["locations"]] == ["National Opera House", "Linnahall", "Oslo Airport", "Amalfi Coast"]
+    # Each mentioning paragraph once, in page order
+    assert len(movie["locations"][1]["descriptions"]) == 3
+    assert parse_ml_movie(read("ml_movie_no_content.html")) is None
+    assert parse_ml_movie(read("ml_movie_no_heading.html"))["title"] is None
+
+
+def test_title_markers():
+    markers = parse_ca_title(read("ca_title_1.html"))
+    assert [m["name"] for m in markers["markers"]] == ["Bow & Arrow Pub", "L Street Tavern"]
@@ -0,0 +1,36 @@
+"""Search parameters and filter clauses."""
+
+from src.query import build_filter_queries, build_search_params, escape_query
+
+
+def test_special_characters_are_escaped():
+    assert escape_query("title:(castle)") == r"title\:\(castle\)"
+    assert escape_query('"castle hill"') == '"castle hill"'
+    assert escape_query('castle "hill') == r'castle \"hill'
+    assert escape_query("rome AND paris") == "rome and paris"
+
+
+def test_term_filters():
+    assert build_filter_queries(country="Italy") == ["{!term f=country}Italy"]
+    assert build_filter_queries(city=["Rome", "Milan", " "]) == ["{!terms f=city}Milan,Rome"]
+    assert build_filter_queries(has_coordinates=False) == ["-location_pt:[-90,-180 TO 90,180]"]
+
+
+def test_search_params_use_edismax():
+    q, params = build_search_params("castle -hill", filters=["{!term f=country}Italy"])
+    assert q == r"castle \-hill"
+    assert params["defType"] == "edismax"
+    assert params["qf"] == "title^3 movie_title^2 location_name^2 location_address^1 content^1"
+    assert params["pf"] == "title^5 location_name^3"
+    assert params["fq"] == ["{!term f=country}Italy"]
+
+
+def test_empty_query_matches_everything():
+    assert build_search_params("  ", filters=["year:[2000 TO *]"]) == ("*:*", {"fq": ["year:[2000 TO *]"]})
+    assert build_search_params(None) == ("*:*", {})
+
+
+def test_year_bounds_are_clamped():
+    # Solr rejects values that overflow the int field with a 400
+    assert build_filter_queries(year_from=99999999999) == ["year:[9999 TO *]"]
+    assert build_filter_queries(year_from=-5, year_to=1999) == ["year:[0 TO 1999]"]
@@ -0,0 +1,50 @@
+"""Sampled query log: writing, rotation and reading back."""
+
+import json
+import time
+
+import pytest
+
+from src.querylog import QueryLog, iter_entries, log_file_name, log_files, top_queries
+
+
+def entry(ts, q, status=200):
+    return {"ts": ts, "endpoint": "search", "path": "/api/search", "params": {"q": [q]}, "status": status}
+
+
+def write(directory, name, entries):
+    with open(directory / name, "a", encoding="utf-8") as f:
+        for e in entries:
+            f.write(json.dumps(e) + "\n")
+
+
+def test_writer_rotates_files(tmp_path):
+    log = QueryLog(str(tmp_path), sample_rate=1.0, max_bytes=200, backup_count=2)
+    for i in range(30):
+        log.record(entry(i, f"q{i}"))
+        # One batch per entry, so the size check runs after each one
+        deadline = time.monotonic() + 5
+        while log.written <= i and time.monotonic() < deadline:
+            time.sleep(0.001)
+    log.close()
+    names = sorted(p.name for p in tmp_path.iterdir())
+    assert names == ["queries.ndjson", "queries.ndjson.1", "queries.ndjson.2"]
+    ts = [e["ts"] for e in iter_entries(str(tmp_path))]
+    assert ts == sorted(ts) and ts[-1] == 29
+
+
+def test_worker_logs_are_merged_by_time(tmp_path):
+    write(tmp_path, log_file_name(0), [entry(1, "a"), entry(4, "b")])
+    write(tmp_path, log_file_name(1), [entry(2, "b"), entry(3, "b", status=503)])
+    write(tmp_path, log_file_name(1) + ".1", [entry(0, "a")])
+    write(tmp_path, "other.ndjson", [entry(9, "ignored")])
+    assert [len(files) for files in log_files(str(tmp_path))] == [1, 2]
+    assert [e["ts"] for e in iter_entries(str(tmp_path))] == [0, 1, 2, 3, 4]
+    assert top_queries(str(tmp_path), n=1) == [("search", {"q": ["a"]})]
+
+
+def test_unwritable_directory_raises(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    with pytest.raises(OSError):
+        QueryLog(str(blocker / "logs"))
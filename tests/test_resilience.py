@@ -0,0 +1,77 @@
+"""Circuit breaker and stale store."""
+
+import pytest
+
+from src.resilience import CircuitBreaker, CircuitOpenError, StaleStore
+
+
+class ClientError(Exception):
+    pass
+
+
+def fail(error):
+    def fn():
+        raise error
+
+    return fn
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(3):
+        with pytest.raises(RuntimeError):
+            breaker.call(fail(RuntimeError("down")))
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.call(lambda: "never called")
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2)
+    with pytest.raises(RuntimeError):
+        breaker.call(fail(RuntimeError("down")))
+    assert breaker.call(lambda: "ok") == "ok"
+    with pytest.raises(RuntimeError):
+        breaker.call(fail(RuntimeError("down")))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_ignored_errors_do_not_open_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, ignore=lambda e: isinstance(e, ClientError))
+    for _ in range(5):
+        with pytest.raises(ClientError):
+            breaker.call(fail(ClientError("bad request")))
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.stats()["consecutive_failures"] == 0
+
+
+def test_nested_open_circuit_is_not_a_failure():
+    breaker = CircuitBreaker(failure_threshold=1)
+    with pytest.raises(CircuitOpenError):
+        breaker.call(fail(CircuitOpenError("inner breaker")))
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_probe_closes_or_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    with pytest.raises(RuntimeError):
+        breaker.call(fail(RuntimeError("down")))
+    assert breaker.state == CircuitBreaker.OPEN
+    # reset_timeout has passed: the next call is the probe
+    with pytest.raises(RuntimeError):
+        breaker.call(fail(RuntimeError("still down")))
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.call(lambda: "back") == "back"
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_stale_store_evicts_least_recently_used():
+    store = StaleStore(max_entries=2)
+    store.put("a", 1)
+    store.put("b", 2)
+    assert store.get("a")[0] == 1
+    store.put("c", 3)
+    assert store.get("b") is None
+    assert store.get("a")[0] == 1 and store.get("c")[0] == 3
+
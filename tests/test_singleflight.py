@@ -0,0 +1,63 @@
+"""Coalescing of identical concurrent calls."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.singleflight import SingleFlight
+
+
+def wait_for_waiters(flight, count):
+    deadline = time.monotonic() + 5
+    while flight.coalesced < count and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def work():
+        runs.append(1)
+        release.wait(5)
+        return {"docs": [1, 2]}
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        futures = [pool.submit(flight.do, "q", work) for _ in range(5)]
+        wait_for_waiters(flight, 4)
+        release.set()
+        results = [f.result() for f in futures]
+
+    assert runs == [1]
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"executed": 1, "coalesced": 4, "in_flight": 0, "coalesced_ratio": 0.8}
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        raise ConnectionError("solr down")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flight.do, "q", work) for _ in range(3)]
+        wait_for_waiters(flight, 2)
+        release.set()
+        for future in futures:
+            with pytest.raises(ConnectionError, match="solr down"):
+                future.result()
+    assert flight.in_flight() == 0
+
+
+def test_nothing_is_cached_after_the_call():
+    flight = SingleFlight()
+    assert flight.do("q", lambda: 1) == 1
+    assert flight.do("q", lambda: 2) == 2
+    # Different keys never wait on each other
+    assert flight.do("other", lambda: 3) == 3
+    assert flight.stats()["coalesced"] == 0
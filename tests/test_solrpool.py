@@ -0,0 +1,147 @@
+"""SolrPool against several local fake Solr servers."""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pysolr
+import pytest
+
+from src.solrpool import SolrPool, is_client_error
+
+
+class FakeSolr:
+    """A core URL answering ``/select`` and ``/admin/ping`` with a settable status and body."""
+
+    def __init__(self, name):
+        self.name = name
+        self.status = 200
+        self.body = None  # Raw body instead of a result naming this node
+        self.requests = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if "/admin/ping" in self.path:
+                    status, body = (200, {"status": "OK"}) if fake.status == 200 else (fake.status, {})
+                    self._send(status, json.dumps(body))
+                    return
+                fake.requests += 1
+                body = fake.body
+                if body is None:
+                    body = json.dumps({"response": {"numFound": 1, "start": 0, "docs": [{"id": fake.name}]}})
+                self._send(fake.status, body)
+
+            def _send(self, status, body):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/solr/movies"
+        threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def servers():
+    fakes = [FakeSolr(f"node{i}") for i in range(3)]
+    yield fakes
+    for fake in fakes:
+        fake.close()
+
+
+def search(pool):
+    return pool.read(lambda solr: solr.search("*:*")).docs[0]["id"]
+
+
+def test_reads_go_to_the_least_busy_node(servers):
+    pool = SolrPool([s.url for s in servers], health_interval=0)
+    pool.nodes[0].outstanding = 2
+    pool.nodes[1].outstanding = 1
+    assert search(pool) == "node2"
+    assert [n.outstanding for n in pool.nodes] == [2, 1, 0]
+
+
+def test_idle_nodes_share_the_traffic(servers):
+    pool = SolrPool([s.url for s in servers], health_interval=0)
+    answered = {search(pool) for _ in range(60)}
+    assert answered == {"node0", "node1", "node2"}
+
+
+def test_server_error_is_retried_on_another_node(servers):
+    pool = SolrPool([s.url for s in servers[:2]], health_interval=0)
+    servers[0].status = 503
+    pool.nodes[1].outstanding = 1  # node0 is picked first
+    assert search(pool) == "node1"
+    assert not pool.nodes[0].healthy
+    assert pool.nodes[0].failures == 1
+    # Unhealthy nodes get no traffic while a healthy one is left
+    pool.nodes[1].outstanding = 0
+    assert {search(pool) for _ in range(10)} == {"node1"}
+
+
+def test_errors_on_every_node_are_raised(servers):
+    pool = SolrPool([s.url for s in servers[:2]], health_interval=0)
+    for fake in servers[:2]:
+        fake.status = 500
+    with pytest.raises(pysolr.SolrError):
+        search(pool)
+    assert [n.outstanding for n in pool.nodes] == [0, 0]
+
+
+def test_client_errors_are_not_retried_and_keep_the_node(servers):
+    pool = SolrPool([s.url for s in servers[:2]], health_interval=0)
+    for fake in servers[:2]:
+        fake.status = 400
+        fake.body = json.dumps({"error": {"msg": "bad request"}})
+    with pytest.raises(pysolr.SolrError) as raised:
+        search(pool)
+    assert is_client_error(raised.value)
+    assert servers[0].requests + servers[1].requests == 1
+    assert all(n.healthy and n.outstanding == 0 for n in pool.nodes)
+
+
+def test_undecodable_response_releases_the_node(servers):
+    pool = SolrPool([servers[0].url], health_interval=0)
+    servers[0].body = "<html>proxy error</html>"
+    with pytest.raises(Exception):
+        search(pool)
+    assert pool.nodes[0].outstanding == 0
+
+
+def test_single_node_is_healthy_again_after_a_success(servers):
+    pool = SolrPool([servers[0].url], health_interval=0)
+    servers[0].status = 500
+    with pytest.raises(pysolr.SolrError):
+        search(pool)
+    assert not pool.nodes[0].healthy
+    servers[0].status = 200
+    assert search(pool) == "node0"
+    assert pool.nodes[0].healthy
+
+
+def test_health_checks_bring_a_node_back(servers):
+    pool = SolrPool([s.url for s in servers[:2]], health_interval=0.05)
+    pool.nodes[0].healthy = False
+    assert search(pool) == "node1"  # The first read starts the checks
+    for _ in range(40):
+        if pool.nodes[0].healthy:
+            break
+        time.sleep(0.05)
+    assert pool.nodes[0].healthy
+
+
+def test_writes_go_to_the_leader(servers):
+    pool = SolrPool([s.url for s in servers], leader_url=servers[1].url, health_interval=0)
+    assert pool.write(lambda solr: solr.search("*:*")).docs[0]["id"] == "node1"
@@ -0,0 +1,56 @@
+"""Symmetric-delete spelling correction."""
+
+import pytest
+
+from src.spelling import SpellingIndex, build_spelling_index, edit_distance
+
+DOCS = [
+    {"movie_title": "Edinburgh Castle", "location_name": "Castle Rock", "content": "castle esplanade"},
+    {"movie_title": "The Thirty Nine Steps", "location_name": "Forth Bridge", "content": "bridge over the forth"},
+    {"movie_title": "Skyfall", "location_name": "Glen Etive", "content": "glen road castle"},
+    {"movie_title": "Castle Keep", "location_name": "Kent", "content": "a typoo seen once"},
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    build_spelling_index(DOCS, out_dir=str(tmp_path))
+    return SpellingIndex.load(str(tmp_path))
+
+
+@pytest.mark.parametrize(
+    "a, b, distance",
+    [("castle", "castle", 0), ("castel", "castle", 1), ("casle", "castle", 1), ("cstel", "castle", 2), ("a", "bcd", 3)],
+)
+def test_edit_distance(a, b, distance):
+    assert edit_distance(a, b, 5) == distance
+
+
+def test_edit_distance_stops_at_the_limit():
+    assert edit_distance("edinburgh", "skyfall", 2) == 3
+
+
+def test_known_words_and_corrections(index):
+    assert index.lookup("castle") == "castle"
+    assert index.lookup("castel") == "castle"
+    assert index.lookup("edinbrugh") == "edinburgh"
+    assert index.lookup("qqqqqq") is None
+
+
+def test_short_words_allow_one_edit(index):
+    # "tenet" is two edits from "kent"
+    assert index.lookup("tenet") is None
+
+
+def test_content_only_words_need_two_documents(index):
+    assert "typoo" not in index.word_ids
+    assert "castle" in index.word_ids
+
+
+def test_correct_query(index):
+    assert index.correct("Edinburg Castel") == "edinburgh castle"
+    assert index.correct("forth bridge") is None
+
+
+def test_missing_index_loads_as_none(tmp_path):
+    assert SpellingIndex.load(str(tmp_path)) is None
@@ -0,0 +1,50 @@
+"""Static frontend caching headers and compressed variants."""
+
+import gzip
+
+import pytest
+
+from src.api import create_app
+from src.static import IMMUTABLE, REVALIDATE, SHORT
+
+SCRIPT = b"console.log('hello');\n" * 100
+
+
+@pytest.fixture
+def client(tmp_path):
+    dist = tmp_path / "dist"
+    (dist / "assets").mkdir(parents=True)
+    (dist / "index.html").write_bytes(b"<!doctype html><div id=root></div>")
+    (dist / "assets" / "index-B4x9cD2e.js").write_bytes(SCRIPT)
+    (dist / "favicon.svg").write_bytes(b"<svg/>")
+    return create_app(static_folder=str(dist), prefork=True).test_client()
+
+
+def test_cache_control_by_file_kind(client):
+    assert client.get("/").headers["Cache-Control"] == REVALIDATE
+    assert client.get("/assets/index-B4x9cD2e.js").headers["Cache-Control"] == IMMUTABLE
+    assert client.get("/favicon.svg").headers["Cache-Control"] == SHORT
+
+
+def test_etag_revalidation(client):
+    response = client.get("/")
+    assert response.status_code == 200
+    again = client.get("/", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+    assert again.get_data() == b""
+
+
+def test_compressed_variant_has_its_own_etag(client):
+    plain = client.get("/assets/index-B4x9cD2e.js", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/assets/index-B4x9cD2e.js", headers={"Accept-Encoding": "gzip"})
+    assert plain.get_data() == SCRIPT and "Content-Encoding" not in plain.headers
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(gzipped.get_data()) == SCRIPT
+    assert gzipped.headers["Vary"] == "Accept-Encoding"
+    assert gzipped.headers["ETag"] != plain.headers["ETag"]
+
+
+def test_client_routes_get_the_app_shell(client):
+    shell = client.get("/movie/123")
+    assert shell.status_code == 200 and shell.headers["Cache-Control"] == REVALIDATE
+    assert client.get("/missing.js").status_code == 404
@@ -0,0 +1,64 @@
+"""Typeahead index: prefixes, ranking and the snapshot build."""
+
+import json
+
+from src.snapshot import Snapshot, build_snapshot
+from src.suggest import LOCATION, MOVIE, SuggestIndex, build_suggest_index, build_suggest_index_from_snapshot
+
+RECORDS = [
+    {"title": "(500) Days of Summer | 2009", "locations": [{"name": "Angels Flight"}, {"name": "Bradbury Building"}]},
+    {"title": "Blade Runner | 1982", "locations": [{"name": "Bradbury Building"}, {"name": "Union Station"}, {"name": " "}]},
+    {"title": "Summer Lovers (1982)", "locations": []},
+    {"title": "Summertime", "locations": [{"name": "Venice"}]},
+]
+
+
+def texts(suggestions):
+    return [s["text"] for s in suggestions]
+
+
+def table(index):
+    return sorted(zip(index.texts, index.types, index.weights))
+
+
+def test_every_word_start_is_a_prefix():
+    index = build_suggest_index(RECORDS)
+    assert "(500) Days of Summer" in texts(index.suggest("summ"))
+    assert texts(index.suggest("days of")) == ["(500) Days of Summer"]
+    assert texts(index.suggest("  BRAD ")) == ["Bradbury Building"]
+    assert index.suggest("xyz") == [] and index.suggest("  ") == []
+
+
+def test_weights_rank_suggestions():
+    index = build_suggest_index(RECORDS)
+    suggestions = index.suggest("b")
+    # Blade Runner has 3 locations (one blank), Bradbury Building 2 movies
+    assert suggestions[0] == {"text": "Blade Runner", "type": MOVIE, "weight": 3}
+    assert suggestions[1] == {"text": "Bradbury Building", "type": LOCATION, "weight": 2}
+    # A movie without locations still counts once; ties go to the shorter text
+    assert texts(index.suggest("summer")) == ["(500) Days of Summer", "Summertime", "Summer Lovers"]
+
+
+def test_precomputed_prefixes_match_a_full_scan():
+    index = build_suggest_index(RECORDS)
+    full = SuggestIndex({(text, kind): weight for text, kind, weight in table(index)}, precompute_depth=0)
+    for prefix in ("s", "su", "sum", "b", "u", "v"):
+        precomputed, scanned = index.suggest(prefix, limit=20), full.suggest(prefix, limit=20)
+        # Equal weight and length may come in any order
+        assert sorted(texts(precomputed)) == sorted(texts(scanned))
+        assert [(s["weight"], len(s["text"])) for s in precomputed] == [(s["weight"], len(s["text"])) for s in scanned]
+
+
+def test_type_filter_and_limit():
+    index = build_suggest_index(RECORDS)
+    assert texts(index.suggest("b", kind=LOCATION)) == ["Bradbury Building"]
+    assert len(index.suggest("s", limit=1)) == 1
+
+
+def test_snapshot_build_matches_the_record_build(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_text("\n".join(json.dumps(r) for r in RECORDS), encoding="utf-8")
+    build_snapshot([str(path)], str(tmp_path / "snapshot"))
+    from_snapshot = build_suggest_index_from_snapshot(Snapshot.load(str(tmp_path / "snapshot")))
+    from_records = build_suggest_index(RECORDS)
+    assert table(from_snapshot) == table(from_records)
@@ -0,0 +1,77 @@
+"""LSA vector index: building, loading and searching."""
+
+import os
+import random
+
+import numpy as np
+import pytest
+
+from src.vectors import MODEL_FILE, VectorIndex, build_vector_index, fuse_scores
+
+
+def corpus(n):
+    topics = ["castle tower scotland highlands", "beach surf california sunset", "bridge river london fog"]
+    return [{"id": f"d{i}", "title": f"{topics[i % 3]} {i}", "content": topics[i % 3]} for i in range(n)]
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    build_vector_index(corpus(60), dims=8, out_dir=str(tmp_path))
+    return str(tmp_path)
+
+
+def test_missing_index_loads_as_none(tmp_path):
+    assert VectorIndex.load(str(tmp_path)) is None
+
+
+@pytest.mark.parametrize("content", [b"", b"\x80\x04garbage", b"not a pickle at all"])
+def test_corrupt_model_loads_as_none(index_dir, content, capsys):
+    with open(os.path.join(index_dir, MODEL_FILE), "wb") as f:
+        f.write(content)
+    assert VectorIndex.load(index_dir) is None
+    assert "Could not load the vector index" in capsys.readouterr().out
+
+
+def test_search_finds_the_matching_topic(index_dir):
+    index = VectorIndex.load(index_dir)
+    hits = index.search("surf at the beach", k=5, exact=True)
+    assert len(hits) == 5
+    assert all(int(doc_id[1:]) % 3 == 1 for doc_id, _ in hits)
+    assert index.search("zzzz unknown words") == []
+
+
+def test_ivf_recall_against_exact_search(tmp_path):
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(400)]
+    docs = [{"id": str(i), "title": " ".join(rng.choices(words, k=12))} for i in range(2000)]
+    build_vector_index(docs, dims=32, out_dir=str(tmp_path))
+    index = VectorIndex.load(str(tmp_path))
+    assert len(index.centroids) == 44
+
+    queries = [index.embed(" ".join(rng.choices(words, k=4))) for _ in range(30)]
+    recall = []
+    for query in queries:
+        exact = {doc_id for doc_id, _ in index.search_exact(query, k=10)}
+        approx = index.search_ivf(query, k=10, nprobe=8)
+        # Scores of the hits it does find are exact
+        assert [score for _, score in approx] == sorted((score for _, score in approx), reverse=True)
+        recall.append(len(exact & {doc_id for doc_id, _ in approx}) / 10)
+    assert np.mean(recall) >= 0.6
+    # Probing every list is an exact search
+    query = queries[0]
+    all_lists = index.search_ivf(query, k=10, nprobe=len(index.centroids))
+    assert [doc_id for doc_id, _ in all_lists] == [doc_id for doc_id, _ in index.search_exact(query, k=10)]
+
+
+def test_fuse_scores_scales_each_list():
+    keyword = [("a", 12.0), ("b", 7.0), ("c", 2.0)]
+    vector = [("c", 0.9), ("d", 0.5)]
+    fused = dict(fuse_scores(keyword, vector, alpha=0.5))
+    assert fused == pytest.approx({"a": 0.5, "b": 0.25, "c": 0.5, "d": 0.0})
+    assert fuse_scores(keyword, vector, alpha=1.0)[0] == ("c", 1.0)
+    assert [doc_id for doc_id, _ in fuse_scores(keyword, vector, alpha=0.0)][0] == "a"
+
+
+def test_fuse_scores_with_an_empty_or_flat_list():
+    assert fuse_scores([], [("a", 0.3)], alpha=0.5) == [("a", 0.5)]
+    assert dict(fuse_scores([("a", 4.0), ("b", 4.0)], [], alpha=0.25)) == {"a": 0.75, "b": 0.75}